@@ -0,0 +1,410 @@
+"""Proxy gambar dengan cache di disk (dipakai ``views.proxy_image``).
+
+Gambar disimpan di ``IMAGE_PROXY_CACHE_DIR`` dengan nama hash SHA-256 dari
+URL-nya: ``<hash>.img`` berisi body, ``<hash>.json`` berisi content type dan
+ETag. Akses terakhir dicatat lewat mtime; jika total ukuran melewati
+``IMAGE_PROXY_CACHE_BYTES``, file yang paling lama tidak dipakai dihapus.
+
+Origin diambil lewat satu ``requests.Session`` bersama (koneksi di-pool),
+dibatasi ``IMAGE_PROXY_ALLOWED_HOSTS`` dan ``IMAGE_PROXY_MAX_BYTES``. Host
+dicek sekali lalu koneksi dibuat ke alamat IP hasil pengecekan itu
+(``PinnedAdapter``), jadi DNS rebinding di antara cek dan fetch tidak bisa
+mengarahkan proxy ke layanan internal.
+
+``fetch``/``fetch_variant`` mengembalikan file yang sudah dibuka: eviction dari
+request lain boleh menghapus file di disk tanpa mengganggu respons yang sedang
+dikirim.
+
+Varian kecil (``w``/``h``/``format``) dibuat sekali dengan Pillow lalu disimpan
+di store yang sama. Pillow opsional: tanpa Pillow gambar asli yang dikirim.
+"""
+
+import hashlib
+import io
+import ipaddress
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urljoin, urlparse
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow opsional
+    Image = None
+
+CHUNK_SIZE = 64 * 1024
+MAX_REDIRECTS = 3
+
+
+class ProxyError(Exception):
+    """Gambar tidak bisa dilayani; ``status`` dipakai sebagai status HTTP."""
+
+    def __init__(self, message, status=502):
+        super().__init__(message)
+        self.status = status
+
+
+# ---------------------------------------------------------------------------
+# HTTP session bersama
+# ---------------------------------------------------------------------------
+
+class PinnedAdapter(HTTPAdapter):
+    """Adapter untuk request yang URL-nya sudah ditulis ulang ke alamat IP.
+
+    ``request.pinned_hostname`` berisi nama host asli; untuk HTTPS nama itu
+    dipakai sebagai SNI dan untuk verifikasi sertifikat, koneksinya ke IP.
+    """
+
+    def build_connection_pool_key_attributes(self, request, verify, cert=None):
+        host_params, pool_kwargs = super().build_connection_pool_key_attributes(request, verify, cert)
+        hostname = getattr(request, "pinned_hostname", None)
+        if hostname and host_params["scheme"] == "https":
+            pool_kwargs["server_hostname"] = hostname
+            pool_kwargs["assert_hostname"] = hostname
+        return host_params, pool_kwargs
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                # proxy dari env akan me-resolve host sendiri (melewati pin)
+                session.trust_env = False
+                adapter = PinnedAdapter(pool_connections=16, pool_maxsize=32)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                session.headers["User-Agent"] = "SportWatch-ImageProxy/1.0"
+                _session = session
+    return _session
+
+
+# ---------------------------------------------------------------------------
+# Allow-list
+# ---------------------------------------------------------------------------
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def _origin(parsed):
+    try:
+        port = parsed.port
+    except ValueError:
+        return None
+    return parsed.scheme, (parsed.hostname or "").lower(), port or DEFAULT_PORTS.get(parsed.scheme)
+
+
+def _resolve(host, port):
+    """Semua alamat IP untuk ``host``; kosong jika tidak bisa di-resolve."""
+    try:
+        infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except (socket.gaierror, UnicodeError):
+        return []
+    return [ipaddress.ip_address(info[4][0].split("%")[0]) for info in infos]
+
+
+def check_url(url, own_origin=None):
+    """Alamat IP yang boleh dipakai untuk mengambil ``url``; ``ProxyError`` jika tidak boleh.
+
+    Host yang tercantum di ``IMAGE_PROXY_ALLOWED_HOSTS`` dipercaya apa adanya.
+    Origin situs ini sendiri (``own_origin``, skema/host/port harus sama persis)
+    dan ``"*"`` hanya diterima jika semua alamatnya publik, supaya ``localhost``,
+    jaringan privat atau metadata cloud tidak bisa dijangkau (SSRF).
+    """
+    parsed = urlparse(url)
+    origin = _origin(parsed)
+    if parsed.scheme not in ("http", "https") or not parsed.hostname or origin is None:
+        raise ProxyError("Unsupported image URL", status=400)
+    _, host, port = origin
+
+    allowed = [h.lower() for h in settings.IMAGE_PROXY_ALLOWED_HOSTS]
+    listed = any(
+        pattern == host or (pattern.startswith("*.") and host.endswith(pattern[1:]))
+        for pattern in allowed
+    )
+    if not listed and not ("*" in allowed or (own_origin and origin == _origin(urlparse(own_origin)))):
+        raise ProxyError("Image host not allowed", status=403)
+
+    addresses = _resolve(host, port)
+    if not addresses:
+        raise ProxyError("Cannot resolve image host")
+    if not listed and not all(address.is_global for address in addresses):
+        raise ProxyError("Image host not allowed", status=403)
+    return addresses[0]
+
+
+# ---------------------------------------------------------------------------
+# Store di disk
+# ---------------------------------------------------------------------------
+
+# ukuran total dihitung incremental per proses; direktori dipindai ulang
+# sesekali supaya tulisan dari proses lain ikut terhitung
+RESCAN_INTERVAL = 300
+
+
+class ImageStore:
+    def __init__(self, root, max_bytes):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size = None  # None = belum pernah dipindai
+        self._scanned_at = 0.0
+
+    @staticmethod
+    def key(url):
+        return hashlib.sha256(url.encode()).hexdigest()
+
+    def _paths(self, key):
+        return self.root / f"{key}.img", self.root / f"{key}.json"
+
+    def get(self, key):
+        """``(file, meta)`` jika ada di cache, sekaligus tandai baru dipakai.
+
+        File dibuka di bawah lock eviction; setelah terbuka, file tetap bisa
+        dibaca walaupun dihapus oleh ``evict()``. Pemanggil wajib menutupnya.
+        """
+        body, meta_path = self._paths(key)
+        with self._lock:
+            try:
+                meta = json.loads(meta_path.read_text())
+                fh = open(body, "rb")
+            except (OSError, ValueError):
+                # termasuk file yang baru saja di-evict (oleh proses lain)
+                return None
+        try:
+            os.utime(body)
+        except OSError:
+            pass
+        return fh, meta
+
+    def put(self, key, chunks, content_type, limit):
+        """Tulis ``chunks`` ke disk (atomic) lalu kembalikan ``(file, meta)`` seperti ``get``.
+
+        ``ProxyError`` jika lebih dari ``limit``.
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        body, meta_path = self._paths(key)
+        digest = hashlib.md5()
+        size = 0
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                for chunk in chunks:
+                    size += len(chunk)
+                    if size > limit:
+                        raise ProxyError("Image too large", status=413)
+                    digest.update(chunk)
+                    fh.write(chunk)
+            meta = {"content_type": content_type, "etag": f'"{digest.hexdigest()}"', "size": size}
+            with self._lock:
+                try:
+                    previous = body.stat().st_size
+                except FileNotFoundError:
+                    previous = 0
+                os.replace(tmp, body)
+                meta_path.write_text(json.dumps(meta))
+                fh = open(body, "rb")
+                if self._size is not None:
+                    self._size += size - previous
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+        # boleh ikut terhapus di sini: handle yang sudah terbuka tetap valid
+        self.evict()
+        return fh, meta
+
+    def evict(self):
+        """Hapus file yang paling lama tidak dipakai jika total melewati batas.
+
+        Direktori hanya dipindai jika ukuran yang dicatat melewati batas (atau
+        sudah ``RESCAN_INTERVAL`` detik sejak pindaian terakhir), bukan di
+        setiap ``put``.
+        """
+        with self._lock:
+            fresh = time.monotonic() - self._scanned_at < RESCAN_INTERVAL
+            if self._size is not None and self._size <= self.max_bytes and fresh:
+                return
+            try:
+                entries = [(p.stat(), p) for p in self.root.glob("*.img")]
+            except OSError:
+                return
+            total = sum(st.st_size for st, _ in entries)
+            if total > self.max_bytes:
+                for st, path in sorted(entries, key=lambda e: e[0].st_mtime):
+                    for victim in (path, path.with_suffix(".json")):
+                        try:
+                            victim.unlink()
+                        except FileNotFoundError:
+                            pass
+                    total -= st.st_size
+                    if total <= self.max_bytes:
+                        break
+            self._size = total
+            self._scanned_at = time.monotonic()
+
+
+_store = None
+
+
+def get_store():
+    global _store
+    root = Path(settings.IMAGE_PROXY_CACHE_DIR)
+    max_bytes = settings.IMAGE_PROXY_CACHE_BYTES
+    if _store is None or (_store.root, _store.max_bytes) != (root, max_bytes):
+        _store = ImageStore(root, max_bytes)
+    return _store
+
+
+# ---------------------------------------------------------------------------
+# Ambil dari origin
+# ---------------------------------------------------------------------------
+
+def _pinned_request(session, url, address):
+    """Request GET ke ``address`` dengan ``Host`` (dan SNI) dari ``url``."""
+    parsed = urlparse(url)
+    ip = f"[{address}]" if address.version == 6 else str(address)
+    netloc = ip if parsed.port is None else f"{ip}:{parsed.port}"
+    host_header = parsed.netloc.rpartition("@")[2]
+    request = session.prepare_request(
+        requests.Request("GET", parsed._replace(netloc=netloc).geturl(), headers={"Host": host_header})
+    )
+    request.pinned_hostname = parsed.hostname
+    return request
+
+
+def _open_origin(url, own_origin):
+    """GET dengan redirect manual supaya setiap hop ikut dicek allow-list."""
+    session = get_session()
+    for _ in range(MAX_REDIRECTS + 1):
+        address = check_url(url, own_origin)
+        response = session.send(
+            _pinned_request(session, url, address),
+            stream=True,
+            timeout=settings.IMAGE_PROXY_TIMEOUT,
+            allow_redirects=False,
+        )
+        if response.is_redirect:
+            location = response.headers.get("Location")
+            response.close()
+            url = urljoin(url, location)
+            continue
+        return response
+    raise ProxyError("Too many redirects")
+
+
+def fetch(url, own_origin=None):
+    """Kembalikan ``(file, meta)`` untuk ``url``, dari cache atau origin."""
+    store = get_store()
+    key = store.key(url)
+    cached = store.get(key)
+    if cached is not None:
+        return cached
+
+    limit = settings.IMAGE_PROXY_MAX_BYTES
+    try:
+        response = _open_origin(url, own_origin)
+        with response:
+            response.raise_for_status()
+            content_type = response.headers.get("Content-Type", "image/jpeg").split(";")[0]
+            if not content_type.startswith("image/"):
+                raise ProxyError("Origin did not return an image")
+            length = response.headers.get("Content-Length")
+            if length and length.isdigit() and int(length) > limit:
+                raise ProxyError("Image too large", status=413)
+            return store.put(key, response.iter_content(CHUNK_SIZE), content_type, limit)
+    except requests.RequestException as exc:
+        raise ProxyError(f"Error fetching image: {exc}") from exc
+
+
+# ---------------------------------------------------------------------------
+# Varian (resize + re-encode)
+# ---------------------------------------------------------------------------
+
+FORMATS = {
+    "webp": ("WEBP", "image/webp"),
+    "jpeg": ("JPEG", "image/jpeg"),
+    "jpg": ("JPEG", "image/jpeg"),
+}
+# gambar asli lebih besar dari ini tidak di-decode (decompression bomb)
+MAX_SOURCE_PIXELS = 40_000_000
+
+
+def can_resize():
+    return Image is not None
+
+
+def parse_variant(width, height, fmt, accept=""):
+    """Validasi parameter query; ``None`` jika tidak ada varian yang diminta.
+
+    Tanpa ``format`` eksplisit, WebP dipilih jika klien mengirim
+    ``Accept: image/webp``, selain itu JPEG.
+    """
+    if not (width or height or fmt):
+        return None
+    limit = settings.IMAGE_PROXY_MAX_DIMENSION
+    size = []
+    for value in (width, height):
+        if not value:
+            size.append(None)
+            continue
+        if not value.isdigit() or not 0 < int(value) <= limit:
+            raise ProxyError(f"w/h must be between 1 and {limit}", status=400)
+        size.append(int(value))
+    fmt = (fmt or "").lower()
+    if not fmt or fmt == "auto":
+        fmt = "webp" if "image/webp" in accept else "jpeg"
+    if fmt not in FORMATS:
+        raise ProxyError("format must be webp or jpeg", status=400)
+    return size[0], size[1], "jpeg" if fmt == "jpg" else fmt
+
+
+def _render(source, width, height, fmt):
+    pil_format, _ = FORMATS[fmt]
+    with Image.open(source) as img:
+        if img.width * img.height > MAX_SOURCE_PIXELS:
+            raise ProxyError("Image too large", status=413)
+        target = (width or img.width, height or img.height)
+        # JPEG bisa di-decode langsung pada skala kecil (jauh lebih cepat)
+        img.draft("RGB", target)
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail(target)
+        if pil_format == "JPEG" and img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        out = io.BytesIO()
+        img.save(out, pil_format, quality=settings.IMAGE_PROXY_QUALITY)
+    return out.getvalue()
+
+
+def fetch_variant(url, variant, own_origin=None):
+    """Seperti ``fetch`` tapi untuk varian ``(w, h, format)``; dibuat sekali lalu di-cache."""
+    if variant is None or not can_resize():
+        return fetch(url, own_origin)
+
+    width, height, fmt = variant
+    store = get_store()
+    key = store.key(f"{url}#w={width or ''}&h={height or ''}&f={fmt}")
+    cached = store.get(key)
+    if cached is not None:
+        return cached
+
+    source, meta = fetch(url, own_origin)
+    try:
+        with source:
+            data = _render(source, width, height, fmt)
+    except (OSError, Image.DecompressionBombError) as exc:
+        raise ProxyError(f"Cannot decode image: {exc}") from exc
+    return store.put(key, [data], FORMATS[fmt][1], len(data))
@@ -1,3 +1,214 @@
-from django.test import TestCase
+import io
+import shutil
+import socket
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from . import image_proxy
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 2048
+
+
+class _Origin(BaseHTTPRequestHandler):
+    hits = {}
+    hosts = []
+    photo = PNG
+
+    def do_GET(self):
+        _Origin.hits[self.path] = _Origin.hits.get(self.path, 0) + 1
+        _Origin.hosts.append(self.headers.get("Host"))
+        if self.path == "/redirect.png":
+            self.send_response(302)
+            self.send_header("Location", "http://10.0.0.1/secret.png")
+            self.end_headers()
+            return
+        if self.path == "/page.html":
+            body, content_type = b"<html></html>", "text/html"
+        elif self.path == "/photo.png":
+            body, content_type = _Origin.photo, "image/png"
+        elif self.path == "/big.png":
+            body, content_type = PNG * 4, "image/png"
+        else:
+            body, content_type = PNG, "image/png"
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class ProxyImageTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _Origin)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.origin = f"http://127.0.0.1:{cls.server.server_port}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir, ignore_errors=True)
+        override = override_settings(
+            IMAGE_PROXY_CACHE_DIR=self.cache_dir,
+            IMAGE_PROXY_ALLOWED_HOSTS=["127.0.0.1"],
+            IMAGE_PROXY_MAX_BYTES=len(PNG) * 2,
+            IMAGE_PROXY_CACHE_BYTES=len(PNG) * 2,
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        _Origin.hits.clear()
+        _Origin.hosts.clear()
+
+    def get(self, path, params=None, **headers):
+        query = {"url": self.origin + path, **(params or {})}
+        return self.client.get(reverse("api_auth:proxy_image"), query, **headers)
+
+    def test_caches_on_disk_and_revalidates(self):
+        first = self.get("/a.png")
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(b"".join(first.streaming_content), PNG)
+        self.assertIn("max-age", first["Cache-Control"])
+
+        second = self.get("/a.png")
+        self.assertEqual(b"".join(second.streaming_content), PNG)
+        self.assertEqual(_Origin.hits["/a.png"], 1)
+
+        self.assertEqual(self.get("/a.png", HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 304)
+
+    def test_lru_eviction_keeps_store_bounded(self):
+        for name in ("/a.png", "/b.png", "/a.png", "/c.png"):
+            b"".join(self.get(name).streaming_content)
+        # kapasitas dua gambar: b paling lama tidak dipakai
+        self.get("/a.png")
+        self.get("/b.png")
+        self.assertEqual(_Origin.hits, {"/a.png": 1, "/b.png": 2, "/c.png": 1})
+
+    def test_eviction_does_not_scan_on_every_put(self):
+        real_glob = Path.glob
+        with mock.patch.object(Path, "glob", autospec=True, side_effect=real_glob) as glob:
+            b"".join(self.get("/a.png").streaming_content)
+            b"".join(self.get("/b.png").streaming_content)
+            self.assertEqual(glob.call_count, 1)  # pindaian awal saja
+            b"".join(self.get("/c.png").streaming_content)  # melewati batas
+            self.assertEqual(glob.call_count, 2)
+        self.get("/a.png")
+        self.assertEqual(_Origin.hits["/a.png"], 2)  # a paling lama, sudah dihapus
+
+    def test_rejections(self):
+        self.assertEqual(self.get("/big.png").status_code, 413)
+        self.assertEqual(self.get("/page.html").status_code, 502)
+        self.assertEqual(self.get("/redirect.png").status_code, 403)
+        response = self.client.get(reverse("api_auth:proxy_image"), {"url": "http://169.254.169.254/x.png"})
+        self.assertEqual(response.status_code, 403)
+
+    def test_default_allow_list_is_not_wildcard(self):
+        from sport_watch import settings as project_settings
+
+        self.assertNotIn("*", project_settings.IMAGE_PROXY_ALLOWED_HOSTS)
+        with self.settings(IMAGE_PROXY_ALLOWED_HOSTS=project_settings.IMAGE_PROXY_ALLOWED_HOSTS):
+            self.assertEqual(self.get("/a.png").status_code, 403)
+            response = self.client.get(
+                reverse("api_auth:proxy_image"), {"url": "https://images.example.org/a.png"}
+            )
+            self.assertEqual(response.status_code, 403)
+
+    @override_settings(IMAGE_PROXY_ALLOWED_HOSTS=["*"])
+    def test_wildcard_still_blocks_internal_addresses(self):
+        self.assertEqual(self.get("/a.png").status_code, 403)
+        self.assertIs(image_proxy.get_session(), image_proxy.get_session())
+
+    @override_settings(IMAGE_PROXY_ALLOWED_HOSTS=[])
+    def test_own_host_needs_exact_origin_and_public_address(self):
+        url = reverse("api_auth:proxy_image")
+        # host sama dengan situs ini tapi port lain (mis. Redis) atau loopback
+        for target in ("http://localhost:6379/", "http://localhost/media/a.png", self.origin + "/a.png"):
+            response = self.client.get(url, {"url": target}, HTTP_HOST="localhost")
+            self.assertEqual(response.status_code, 403, target)
+        response = self.client.get(url, {"url": self.origin + "/a.png"}, HTTP_HOST=self.origin[7:])
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(_Origin.hits, {})
+
+    @override_settings(IMAGE_PROXY_ALLOWED_HOSTS=["images.example.test"])
+    def test_connects_to_the_checked_address(self):
+        real = socket.getaddrinfo
+        answers = iter(["127.0.0.1"])
+
+        def rebinding(host, *args, **kwargs):
+            if host == "images.example.test":
+                # jawaban pertama untuk cek, berikutnya alamat lain (rebinding)
+                return real(next(answers, "192.0.2.1"), *args, **kwargs)
+            return real(host, *args, **kwargs)
+
+        target = f"http://images.example.test:{self.server.server_port}/pinned.png"
+        with mock.patch("socket.getaddrinfo", side_effect=rebinding):
+            response = self.client.get(reverse("api_auth:proxy_image"), {"url": target})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), PNG)
+        self.assertEqual(_Origin.hosts, [f"images.example.test:{self.server.server_port}"])
+
+    def test_evicted_file_is_still_served(self):
+        b"".join(self.get("/a.png").streaming_content)
+        real_fetch = image_proxy.fetch_variant
+
+        def fetch_then_evict(*args, **kwargs):
+            image, meta = real_fetch(*args, **kwargs)
+            # request lain menghapus file di antara cache dan FileResponse
+            shutil.rmtree(self.cache_dir)
+            return image, meta
+
+        with mock.patch.object(image_proxy, "fetch_variant", side_effect=fetch_then_evict):
+            response = self.get("/a.png")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), PNG)
+
+        response = self.get("/a.png")
+        self.assertEqual(b"".join(response.streaming_content), PNG)
+        self.assertEqual(_Origin.hits["/a.png"], 2)
+
+    def test_variant_parameters_are_validated(self):
+        self.assertEqual(self.get("/a.png", {"w": "0"}).status_code, 400)
+        self.assertEqual(self.get("/a.png", {"w": "99999"}).status_code, 400)
+        self.assertEqual(self.get("/a.png", {"w": "100", "format": "gif"}).status_code, 400)
+
+    @unittest.skipIf(image_proxy.can_resize(), "Pillow terpasang")
+    def test_variant_without_pillow_serves_original(self):
+        response = self.get("/a.png", {"w": "100"})
+        self.assertEqual(b"".join(response.streaming_content), PNG)
+
+    @unittest.skipUnless(image_proxy.can_resize(), "butuh Pillow")
+    def test_resized_variant_is_rendered_once(self):
+        from PIL import Image
+
+        buf = io.BytesIO()
+        Image.new("RGB", (800, 600), "red").save(buf, "PNG")
+        _Origin.photo = buf.getvalue()
+        self.addCleanup(setattr, _Origin, "photo", PNG)
+
+        with self.settings(IMAGE_PROXY_MAX_BYTES=len(_Origin.photo), IMAGE_PROXY_CACHE_BYTES=10**7):
+            response = self.get("/photo.png", {"w": "200"}, HTTP_ACCEPT="image/webp,*/*")
+            self.assertEqual(response["Content-Type"], "image/webp")
+            self.assertIn("Accept", response["Vary"])
+            with Image.open(io.BytesIO(b"".join(response.streaming_content))) as img:
+                self.assertEqual(img.size, (200, 150))
+
+            response = self.get("/photo.png", {"w": "200", "format": "jpeg"})
+            self.assertEqual(response["Content-Type"], "image/jpeg")
+            b"".join(response.streaming_content)
+            self.get("/photo.png", {"w": "200", "format": "jpeg"})
+        self.assertEqual(_Origin.hits["/photo.png"], 1)
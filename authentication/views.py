@@ -1,11 +1,12 @@
 import json
 from django.contrib.auth import authenticate, login as auth_login, logout as auth_logout
 from django.contrib.auth.decorators import login_required
+from django.conf import settings
 from django.contrib.auth.models import User
 
 from django.http import JsonResponse, HttpResponse
 from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.http import require_POST, require_GET
+from django.views.decorators.http import require_POST, require_GET, require_safe
 from django.utils.html import strip_tags
 import requests
 
@@ -139,6 +140,13 @@ def logout_user(request):
 
 from urllib.parse import urlparse
 
+from django.http import FileResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+
+from . import image_proxy
+
+
+@require_safe
 def proxy_image(request):
     image_url = request.GET.get('url')
     if not image_url:
@@ -150,14 +158,31 @@ def proxy_image(request):
         image_url = request.build_absolute_uri(image_url)
 
     try:
-        response = requests.get(image_url, timeout=10)
-        response.raise_for_status()
-        return HttpResponse(
-            response.content,
-            content_type=response.headers.get('Content-Type', 'image/jpeg'),
+        # ?w=&h=&format=webp|jpeg: varian kecil untuk grid/kartu
+        variant = image_proxy.parse_variant(
+            request.GET.get('w'),
+            request.GET.get('h'),
+            request.GET.get('format'),
+            accept=request.headers.get('Accept', ''),
+        )
+        image, meta = image_proxy.fetch_variant(
+            image_url, variant, own_origin=f"{request.scheme}://{request.get_host()}"
         )
-    except requests.RequestException as e:
-        return HttpResponse(f'Error fetching image: {str(e)}', status=500)
+    except image_proxy.ProxyError as e:
+        return HttpResponse(str(e), status=e.status)
+
+    if meta["etag"] in request.headers.get("If-None-Match", ""):
+        image.close()
+        response = HttpResponse(status=304)
+    else:
+        # file sudah dibuka oleh cache (aman dari eviction); dikirim per
+        # potongan dan ditutup oleh FileResponse
+        response = FileResponse(image, content_type=meta["content_type"])
+    response["ETag"] = meta["etag"]
+    patch_cache_control(response, public=True, max_age=settings.IMAGE_PROXY_MAX_AGE)
+    if variant is not None and image_proxy.can_resize() and not request.GET.get('format'):
+        patch_vary_headers(response, ['Accept'])
+    return response
 
 
 @require_GET
@@ -1,3 +1,20 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import Order, OrderItem
+
+
+class OrderItemInline(admin.TabularInline):
+    model = OrderItem
+    extra = 0
+    readonly_fields = ("product", "name_snapshot", "qty", "unit_price")
+    can_delete = False
+
+
+@admin.register(Order)
+class OrderAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "status", "total", "created_at")
+    list_filter = ("status", "created_at")
+    search_fields = ("user__username", "idempotency_key")
+    readonly_fields = ("user", "session_key", "idempotency_key", "subtotal", "shipping", "total", "created_at")
+    list_select_related = ("user",)
+    inlines = [OrderItemInline]
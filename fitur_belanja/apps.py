@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class FiturBelanjaConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'fitur_belanja'
+
+    def ready(self):
+        from . import signals  # noqa: F401
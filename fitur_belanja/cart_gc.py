@@ -0,0 +1,84 @@
+# fitur_belanja/cart_gc.py
+"""Pembersihan cart yang ditinggalkan.
+
+Cart tamu dihapus jika sesinya sudah kedaluwarsa/hilang atau tidak ada
+aktivitas selama ``idle_days``; cart milik user hanya dihapus jika kosong dan
+juga menganggur selama itu. Penghapusan dilakukan per batch (satu transaksi
+pendek per batch) supaya tidak mengunci tabel lama-lama.
+"""
+
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from .models import Cart, CartItem
+
+DB_SESSION_ENGINES = {
+    "django.contrib.sessions.backends.db",
+    "django.contrib.sessions.backends.cached_db",
+}
+
+
+@dataclass
+class CollectResult:
+    carts: int = 0
+    items: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+
+
+def _sessions_in_db():
+    return settings.SESSION_ENGINE in DB_SESSION_ENGINES
+
+
+def stale_carts(idle_days=None, now=None):
+    """Queryset cart yang boleh dihapus."""
+    now = now or timezone.now()
+    if idle_days is None:
+        idle_days = settings.CART_GC_IDLE_DAYS
+    idle = Q(updated_at__lt=now - timedelta(days=idle_days))
+
+    guest = Q(user__isnull=True) & idle
+    if _sessions_in_db():
+        # sesi lain (cache/signed cookie) tidak bisa dicek dari DB: cukup pakai umur cart
+        live_session = Session.objects.filter(
+            session_key=OuterRef("session_key"), expire_date__gt=now
+        )
+        guest = Q(user__isnull=True) & (idle | ~Exists(live_session))
+
+    has_items = CartItem.objects.filter(cart=OuterRef("pk"))
+    empty_user_cart = Q(user__isnull=False) & idle & ~Exists(has_items)
+    return Cart.objects.filter(guest | empty_user_cart)
+
+
+def collect(idle_days=None, batch_size=None, dry_run=False):
+    """Hapus cart basi per ``batch_size`` baris; mengembalikan ``CollectResult``."""
+    batch_size = batch_size or settings.CART_GC_BATCH_SIZE
+    started = time.monotonic()
+    result = CollectResult()
+    # cutoff dihitung sekali supaya batch berikutnya tidak "mengejar" cart baru
+    candidates = stale_carts(idle_days, now=timezone.now()).order_by("pk")
+
+    if dry_run:
+        result.carts = candidates.count()
+        result.items = CartItem.objects.filter(cart__in=candidates.values("pk")).count()
+    else:
+        while True:
+            ids = list(candidates.values_list("pk", flat=True)[:batch_size])
+            if not ids:
+                break
+            with transaction.atomic():
+                # filter ulang: cart yang baru dipakai lagi sejak SELECT tidak ikut terhapus
+                _, per_model = candidates.filter(pk__in=ids).delete()
+            result.carts += per_model.get(Cart._meta.label, 0)
+            result.items += per_model.get(CartItem._meta.label, 0)
+            result.batches += 1
+
+    result.seconds = time.monotonic() - started
+    return result
@@ -0,0 +1,137 @@
+# fitur_belanja/checkout.py
+"""Checkout berbasis set.
+
+Semua baris produk di keranjang dikunci dengan satu ``SELECT ... FOR UPDATE``
+(urut id supaya dua checkout tidak saling deadlock), stok dikurangi dengan
+satu ``UPDATE`` bersyarat (``stock >= qty``) untuk seluruh produk, lalu item
+keranjang dihapus dengan satu ``DELETE``. Jumlah round-trip tidak lagi
+bergantung pada banyaknya item.
+
+Setiap checkout yang berhasil dicatat sebagai ``Order`` + ``OrderItem``.
+Dengan ``idempotency_key`` yang sama, submit ulang (double-click, retry dari
+aplikasi mobile) mengembalikan order yang sudah ada tanpa mengurangi stok lagi.
+"""
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, IntegerField, Q, When
+from django.utils import timezone
+
+from shop.models import Product
+
+from .models import Cart, CartItem, Order, OrderItem
+
+
+class CheckoutError(ValueError):
+    """Checkout ditolak; pesan aman ditampilkan ke pembeli."""
+
+
+def _owned_by(order, cart, user):
+    if user is not None and user.is_authenticated:
+        return order.user_id == user.pk
+    return order.user_id is None and order.session_key == cart.session_key
+
+
+def _existing_order(key, cart, user):
+    order = Order.objects.filter(idempotency_key=key).first()
+    if order is not None and not _owned_by(order, cart, user):
+        raise CheckoutError("Kode transaksi tidak valid, silakan muat ulang halaman checkout.")
+    return order
+
+
+def checkout_cart(cart, user=None, idempotency_key=None, shipping=0):
+    """Bayar isi ``cart``: kurangi stok, catat order, kosongkan keranjang.
+
+    Mengembalikan ``(order, created)``; ``created`` bernilai False jika
+    ``idempotency_key`` sudah pernah dipakai. Melempar ``CheckoutError`` (dan
+    tidak mengubah apa pun) jika keranjang kosong, ada produk milik pembeli
+    sendiri, produk tidak aktif, atau stok tidak cukup.
+    """
+    key = idempotency_key or None
+    try:
+        with transaction.atomic():
+            # kunci cart dulu: dua submit untuk keranjang yang sama diproses bergiliran
+            Cart.objects.select_for_update().filter(pk=cart.pk).first()
+            if key:
+                existing = _existing_order(key, cart, user)
+                if existing is not None:
+                    return existing, False
+            order = _place_order(cart, user, key, shipping)
+    except IntegrityError:
+        # submit paralel dengan key sama dari keranjang lain; yang kalah ikut
+        # mengembalikan order pemenang (semua perubahannya sudah di-rollback)
+        existing = _existing_order(key, cart, user) if key else None
+        if existing is None:
+            raise
+        return existing, False
+    return order, True
+
+
+def _place_order(cart, user, key, shipping):
+    items = list(
+        CartItem.objects.filter(cart=cart).values_list("product_id", "qty", "unit_price")
+    )
+    if not items:
+        raise CheckoutError("Keranjang masih kosong.")
+    if any(product_id is None for product_id, _, _ in items):
+        raise CheckoutError("Ada produk di keranjang yang sudah tidak tersedia.")
+
+    wanted = {}
+    prices = {}
+    for product_id, qty, unit_price in items:
+        wanted[product_id] = wanted.get(product_id, 0) + qty
+        prices[product_id] = unit_price
+
+    products = {
+        p.pk: p
+        for p in Product.objects.select_for_update()
+        .filter(pk__in=wanted)
+        .order_by("pk")
+    }
+
+    for product_id, qty in wanted.items():
+        p = products.get(product_id)
+        if p is None:
+            raise CheckoutError("Ada produk di keranjang yang sudah tidak tersedia.")
+        if user is not None and user.is_authenticated and p.created_by_id == user.pk:
+            raise CheckoutError(f"Tidak boleh membeli produk sendiri: {p.name}")
+        if p.status != "active" or qty > p.stock:
+            raise CheckoutError(f"Stok tidak cukup untuk {p.name} (tersisa {p.stock})")
+
+    # satu UPDATE untuk semua produk; kondisi stock >= qty tetap dicek di DB
+    # sebagai pengaman terakhir walaupun baris sudah dikunci
+    condition = Q()
+    stock_cases, sold_cases = [], []
+    for product_id, qty in wanted.items():
+        condition |= Q(pk=product_id, stock__gte=qty, status="active")
+        stock_cases.append(When(pk=product_id, then=F("stock") - qty))
+        sold_cases.append(When(pk=product_id, then=F("total_sold") + qty))
+    updated = Product.objects.filter(condition).update(
+        stock=Case(*stock_cases, output_field=IntegerField()),
+        total_sold=Case(*sold_cases, output_field=IntegerField()),
+        updated_at=timezone.now(),
+    )
+    if updated != len(wanted):
+        raise CheckoutError("Stok berubah saat checkout, silakan coba lagi.")
+
+    subtotal = sum(qty * prices[product_id] for product_id, qty in wanted.items())
+    order = Order.objects.create(
+        user=user if user is not None and user.is_authenticated else None,
+        session_key=cart.session_key,
+        idempotency_key=key,
+        subtotal=subtotal,
+        shipping=shipping,
+        total=subtotal + shipping,
+    )
+    OrderItem.objects.bulk_create(
+        OrderItem(
+            order=order,
+            product_id=product_id,
+            name_snapshot=products[product_id].name,
+            qty=qty,
+            unit_price=prices[product_id],
+        )
+        for product_id, qty in wanted.items()
+    )
+
+    CartItem.objects.filter(cart=cart).delete()
+    return order
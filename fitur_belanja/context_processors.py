@@ -1,6 +1,10 @@
 # fitur_belanja/context_processors.py
-from .utils import cart_from_request
+from django.utils.functional import SimpleLazyObject
+
+from .utils import cart_count
+
 
 def cart_badge(request):
-    cart = cart_from_request(request)
-    return {"cart_count": cart.item_count if cart else 0}
+    # dievaluasi hanya jika template benar-benar memakai {{ cart_count }},
+    # dan tidak pernah membuat cart/sesi baru
+    return {"cart_count": SimpleLazyObject(lambda: cart_count(request))}
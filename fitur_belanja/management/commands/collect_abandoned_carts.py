@@ -0,0 +1,43 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from fitur_belanja.cart_gc import collect
+
+
+class Command(BaseCommand):
+    help = 'Deletes abandoned carts (expired guest sessions or idle carts) in small batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--idle-days',
+            type=int,
+            default=settings.CART_GC_IDLE_DAYS,
+            help='Carts without activity for this many days are considered abandoned.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.CART_GC_BATCH_SIZE,
+            help='Carts deleted per transaction.',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Only count what would be deleted.')
+        parser.add_argument('--loop', action='store_true', help='Keep collecting every --interval seconds.')
+        parser.add_argument('--interval', type=int, default=3600, help='Seconds between runs when --loop is set.')
+
+    def handle(self, *args, **options):
+        while True:
+            result = collect(
+                idle_days=options['idle_days'],
+                batch_size=options['batch_size'],
+                dry_run=options['dry_run'],
+            )
+            verb = 'Would delete' if options['dry_run'] else 'Deleted'
+            self.stdout.write(self.style.SUCCESS(
+                f'{verb} {result.carts} carts and {result.items} cart items '
+                f'in {result.batches} batches ({result.seconds:.2f}s).'
+            ))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
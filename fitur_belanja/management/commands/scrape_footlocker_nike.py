@@ -1,27 +1,28 @@
-import requests
 from bs4 import BeautifulSoup
 from django.core.management.base import BaseCommand
 import json
 
+from sport_watch.scraping import add_fetcher_arguments, fetcher_from_options
+
 class Command(BaseCommand):
     help = 'Scrapes product data from footlocker.id/nike.html and saves it to a JSON file.'
 
     def add_arguments(self, parser):
+        add_fetcher_arguments(parser)
         parser.add_argument('--output', type=str, help='Path to the output JSON file', default='footlocker_nike.json')
 
     def handle(self, *args, **options):
         output_file = options['output']
-        self.scrape_footlocker_nike(output_file)
+        with fetcher_from_options(options) as fetcher:
+            self.scrape_footlocker_nike(output_file, fetcher)
 
-    def scrape_footlocker_nike(self, output_file):
+    def scrape_footlocker_nike(self, output_file, fetcher):
         URL = "https://www.footlocker.id/nike.html"
         scraped_data = []
 
-        try:
-            page = requests.get(URL)
-            page.raise_for_status()
-        except requests.exceptions.RequestException as e:
-            self.stdout.write(self.style.ERROR(f"Error fetching URL: {e}"))
+        page = fetcher.get(URL)
+        if not page.ok:
+            self.stdout.write(self.style.ERROR(f"Error fetching URL: {page.error}"))
             return
 
         soup = BeautifulSoup(page.content, "html.parser")
@@ -16,10 +16,17 @@ class Cart(models.Model):
         indexes = [models.Index(fields=["user","session_key"])]
 
     def __str__(self): return f"Cart({self.pk})"
+    def touch(self):
+        # tandai aktivitas tanpa save() penuh; dipakai GC cart (cart_gc)
+        Cart.objects.filter(pk=self.pk).update(updated_at=timezone.now())
     @property
-    def item_count(self): return sum(i.qty for i in self.items.all())
+    def summary(self):
+        from .summary import CartSummary
+        return CartSummary.for_cart(self)
     @property
-    def total(self): return sum(i.subtotal for i in self.items.select_related("product"))
+    def item_count(self): return self.summary.item_count
+    @property
+    def total(self): return self.summary.total
 
 class CartItem(models.Model):
     cart        = models.ForeignKey(Cart, related_name="items", on_delete=models.CASCADE)
@@ -33,3 +40,43 @@ class CartItem(models.Model):
 
     @property
     def subtotal(self): return self.qty * self.unit_price
+
+
+class Order(models.Model):
+    """Buku besar checkout: satu baris per pembayaran yang berhasil."""
+
+    class Status(models.TextChoices):
+        PAID = "PAID", "Paid"
+        CANCELLED = "CANCELLED", "Cancelled"
+
+    user            = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL, related_name="orders")
+    session_key     = models.CharField(max_length=40, null=True, blank=True)
+    # dikirim oleh form checkout / header Idempotency-Key; submit ulang
+    # dengan key yang sama mengembalikan order yang sudah ada
+    idempotency_key = models.CharField(max_length=64, null=True, blank=True)
+    status          = models.CharField(max_length=12, choices=Status.choices, default=Status.PAID)
+    subtotal        = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    shipping        = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    total           = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    created_at      = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        ordering = ["-id"]
+        constraints = [
+            models.UniqueConstraint(fields=["idempotency_key"], name="uniq_order_idempotency_key")
+        ]
+        indexes = [models.Index(fields=["user", "-id"])]
+
+    def __str__(self): return f"Order({self.pk})"
+
+
+class OrderItem(models.Model):
+    order         = models.ForeignKey(Order, related_name="items", on_delete=models.CASCADE)
+    product       = models.ForeignKey(Product, on_delete=models.SET_NULL, related_name="order_items",
+    null=True, blank=True, )
+    name_snapshot = models.CharField(max_length=200)
+    qty           = models.PositiveIntegerField()
+    unit_price    = models.DecimalField(max_digits=12, decimal_places=2)
+
+    @property
+    def subtotal(self): return self.qty * self.unit_price
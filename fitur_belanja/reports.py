@@ -0,0 +1,32 @@
+# fitur_belanja/reports.py
+"""Agregasi penjualan dari buku besar Order/OrderItem.
+
+Berbeda dengan ``Product.total_sold`` (counter tunggal), ledger bisa
+difilter per periode, dan baris order tetap ada walaupun produknya dihapus.
+"""
+
+from django.db.models import DecimalField, ExpressionWrapper, F, Max, Sum
+
+from .models import Order, OrderItem
+
+
+def paid_items(since=None, until=None):
+    qs = OrderItem.objects.filter(order__status=Order.Status.PAID)
+    if since is not None:
+        qs = qs.filter(order__created_at__gte=since)
+    if until is not None:
+        qs = qs.filter(order__created_at__lt=until)
+    return qs
+
+
+def sales_by_product(since=None, until=None):
+    """``[{product_id, name, units, revenue}, ...]`` urut dari terlaris."""
+    revenue = ExpressionWrapper(
+        F("qty") * F("unit_price"), output_field=DecimalField(max_digits=16, decimal_places=2)
+    )
+    return (
+        paid_items(since, until)
+        .values("product_id")
+        .annotate(name=Max("name_snapshot"), units=Sum("qty"), revenue=Sum(revenue))
+        .order_by("-units", "name")
+    )
@@ -0,0 +1,12 @@
+# fitur_belanja/signals.py
+from django.contrib.auth.signals import user_logged_in
+from django.dispatch import receiver
+
+from .utils import merge_guest_cart
+
+
+@receiver(user_logged_in)
+def merge_cart_on_login(sender, request, user, **kwargs):
+    # request bisa None untuk login di luar siklus HTTP (mis. test client)
+    if request is not None and hasattr(request, "session"):
+        merge_guest_cart(request, user)
@@ -0,0 +1,61 @@
+# fitur_belanja/summary.py
+"""Ringkasan keranjang (jumlah item, subtotal, ongkir, total) dari satu query.
+
+Dipakai halaman keranjang/checkout, badge navbar dan endpoint ``/api/cart/``
+supaya angka-angka itu tidak lagi dihitung dengan menjumlahkan item di Python.
+"""
+
+from dataclasses import dataclass
+from decimal import Decimal
+
+from django.db.models import Count, DecimalField, F, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import CartItem
+
+SHIPPING_FEE = Decimal("0")  # demo: gratis/flat
+
+_ZERO = Value(Decimal("0"), output_field=DecimalField(max_digits=14, decimal_places=2))
+
+
+@dataclass(frozen=True)
+class CartSummary:
+    lines: int = 0
+    item_count: int = 0
+    subtotal: Decimal = Decimal("0")
+    shipping: Decimal = SHIPPING_FEE
+
+    @property
+    def total(self):
+        return self.subtotal + self.shipping
+
+    @property
+    def is_empty(self):
+        return self.lines == 0
+
+    @classmethod
+    def for_cart(cls, cart):
+        """Hitung ringkasan ``cart`` (boleh None) dengan satu aggregate."""
+        if cart is None or cart.pk is None:
+            return cls()
+        row = CartItem.objects.filter(cart=cart).aggregate(
+            lines=Count("id"),
+            item_count=Coalesce(Sum("qty"), 0),
+            subtotal=Coalesce(
+                Sum(
+                    F("qty") * F("unit_price"),
+                    output_field=DecimalField(max_digits=14, decimal_places=2),
+                ),
+                _ZERO,
+            ),
+        )
+        return cls(**row)
+
+    def as_json(self):
+        return {
+            "lines": self.lines,
+            "item_count": self.item_count,
+            "subtotal": float(self.subtotal),
+            "shipping": float(self.shipping),
+            "total": float(self.total),
+        }
@@ -1,3 +1,378 @@
-from django.test import TestCase
+import random
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from shop.models import Category, Product
+
+from .cart_gc import collect
+from .checkout import CheckoutError, checkout_cart
+from .context_processors import cart_badge
+from .models import Cart, CartItem, Order
+from .reports import sales_by_product
+from .summary import CartSummary
+from .utils import CART_COUNT_SESSION_KEY
+
+
+class CartBadgeTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name="Badge")
+        self.product = Product.objects.create(
+            name="Bola Badge", category=category, price=100, stock=10
+        )
+        self.user = get_user_model().objects.create_user(username="badge", password="secret123")
+
+    def test_anonymous_pages_never_create_carts_or_sessions(self):
+        response = self.client.get(reverse("shop:list"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["cart_count"], 0)
+        self.assertFalse(Cart.objects.exists())
+        self.assertFalse(Session.objects.exists())
+
+    def test_badge_is_lazy(self):
+        request = self.client.get(reverse("shop:list")).wsgi_request
+        with self.assertNumQueries(0):
+            cart_badge(request)
+
+    def test_count_is_cached_in_session_by_mutations(self):
+        self.client.post(reverse("api_cart:add_to_cart"), {"product_id": str(self.product.id), "qty": 2})
+        self.assertEqual(self.client.session[CART_COUNT_SESSION_KEY]["count"], 2)
+
+        item = CartItem.objects.get()
+        self.client.post(reverse("api_cart:update_qty"), {"item_id": item.id, "qty": 5})
+        self.assertEqual(self.client.session[CART_COUNT_SESSION_KEY]["count"], 5)
+
+        response = self.client.get(reverse("shop:list"))
+        self.assertEqual(response.context["cart_count"], 5)
+
+        self.client.post(reverse("api_cart:clear_cart"))
+        self.assertEqual(self.client.session[CART_COUNT_SESSION_KEY]["count"], 0)
+
+    def test_cached_count_is_not_reused_for_another_owner(self):
+        self.client.post(reverse("api_cart:add_to_cart"), {"product_id": str(self.product.id), "qty": 2})
+        session = self.client.session
+        session[CART_COUNT_SESSION_KEY] = {"owner": self.user.pk, "count": 99, "at": 0}
+        session.save()
+
+        response = self.client.get(reverse("shop:list"))
+        self.assertEqual(response.context["cart_count"], 2)
+
+
+class CheckoutTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name="Checkout")
+        self.products = [
+            Product.objects.create(name=f"Produk {i}", category=self.category, price=100, stock=5)
+            for i in range(10)
+        ]
+        self.cart = Cart.objects.create(session_key="checkout")
+
+    def fill_cart(self, products, qty=1):
+        CartItem.objects.bulk_create(
+            CartItem(cart=self.cart, product=p, qty=qty, unit_price=p.final_price) for p in products
+        )
+
+    def test_query_count_does_not_depend_on_cart_size(self):
+        self.fill_cart(self.products[:2])
+        with self.assertNumQueries(9) as small:
+            checkout_cart(self.cart)
+        self.fill_cart(self.products, qty=2)
+        with self.assertNumQueries(len(small.captured_queries)):
+            order, _ = checkout_cart(self.cart)
+
+        self.assertEqual(order.items.count(), 10)
+        self.assertFalse(self.cart.items.exists())
+        stock = dict(Product.objects.filter(category=self.category).values_list("name", "stock"))
+        self.assertEqual(stock["Produk 0"], 2)
+        self.assertEqual(stock["Produk 9"], 3)
+
+    def test_insufficient_stock_changes_nothing(self):
+        self.fill_cart(self.products[:2])
+        CartItem.objects.filter(product=self.products[1]).update(qty=6)
+
+        with self.assertRaisesMessage(CheckoutError, "Stok tidak cukup untuk Produk 1"):
+            checkout_cart(self.cart)
+        self.assertEqual(self.cart.items.count(), 2)
+        self.assertEqual(Product.objects.get(pk=self.products[0].pk).stock, 5)
+
+    def test_cannot_buy_own_product(self):
+        owner = get_user_model().objects.create_user(username="owner", password="secret123")
+        Product.objects.filter(pk=self.products[0].pk).update(created_by=owner)
+        self.fill_cart(self.products[:1])
+        with self.assertRaises(CheckoutError):
+            checkout_cart(self.cart, owner)
+
+    def test_checkout_view(self):
+        self.client.post(
+            reverse("api_cart:add_to_cart"), {"product_id": str(self.products[0].id), "qty": 3}
+        )
+        response = self.client.post(reverse("fitur_belanja:checkout"))
+        self.assertRedirects(response, reverse("shop:list"), fetch_redirect_response=False)
+        self.products[0].refresh_from_db()
+        self.assertEqual((self.products[0].stock, self.products[0].total_sold), (2, 3))
+
+
+class CheckoutConcurrencyTests(TransactionTestCase):
+    buyers = 20
+    stock = 5
+
+    def test_concurrent_buyers_never_oversell(self):
+        category = Category.objects.create(name="Stress")
+        product = Product.objects.create(
+            name="Edisi Terbatas", category=category, price=100, stock=self.stock
+        )
+        carts = []
+        for i in range(self.buyers):
+            cart = Cart.objects.create(session_key=f"buyer-{i}")
+            CartItem.objects.create(cart=cart, product=product, qty=1, unit_price=100)
+            carts.append(cart)
+
+        barrier = threading.Barrier(self.buyers)
+        outcomes = []
+
+        def buy(cart):
+            try:
+                barrier.wait()
+                for _ in range(200):
+                    try:
+                        checkout_cart(cart)
+                        outcomes.append("ok")
+                        return
+                    except OperationalError:
+                        # SQLite tidak punya row lock dan menolak penulis kedua
+                        # ("database table is locked"); coba lagi sebentar kemudian
+                        time.sleep(random.uniform(0.001, 0.01))
+                    except CheckoutError:
+                        outcomes.append("rejected")
+                        return
+                outcomes.append("gave_up")
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=buy, args=(cart,)) for cart in carts]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        product.refresh_from_db()
+        sold = outcomes.count("ok")
+        # di PostgreSQL semua pembeli dilayani bergiliran lewat row lock; di
+        # SQLite sebagian bisa menyerah karena lock, tapi invarian tetap sama
+        self.assertGreaterEqual(product.stock, 0)
+        self.assertGreater(sold, 0)
+        self.assertEqual(product.stock, self.stock - sold)
+        self.assertEqual(product.total_sold, sold)
+        self.assertEqual(CartItem.objects.count(), self.buyers - sold)
+        self.assertEqual(Order.objects.count(), sold)
+        if "rejected" in outcomes:
+            self.assertEqual(product.stock, 0)
+
+
+class OrderLedgerTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name="Ledger")
+        self.product = Product.objects.create(name="Jersey", category=category, price=250, stock=10)
+        self.user = get_user_model().objects.create_user(username="buyer", password="secret123")
+        self.client.force_login(self.user)
+
+    def add(self, qty=1):
+        self.client.post(
+            reverse("api_cart:add_to_cart"), {"product_id": str(self.product.id), "qty": qty}
+        )
+
+    def test_checkout_records_order_and_is_idempotent(self):
+        self.add(2)
+        form = self.client.get(reverse("fitur_belanja:checkout"))
+        key = form.context["idempotency_key"]
+
+        for _ in range(3):  # double-click / retry
+            response = self.client.post(reverse("fitur_belanja:checkout"), {"idempotency_key": key})
+            self.assertRedirects(response, reverse("shop:list"), fetch_redirect_response=False)
+
+        order = Order.objects.get()
+        self.assertEqual((order.user, order.total), (self.user, 500))
+        self.assertEqual(list(order.items.values_list("name_snapshot", "qty")), [("Jersey", 2)])
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 8)
+
+    def test_key_from_another_buyer_is_rejected(self):
+        self.add()
+        other = get_user_model().objects.create_user(username="other", password="secret123")
+        Order.objects.create(user=other, idempotency_key="shared", total=1)
+
+        self.client.post(reverse("fitur_belanja:checkout"), {"idempotency_key": "shared"})
+        self.assertEqual(Order.objects.filter(user=self.user).count(), 0)
+        self.assertEqual(CartItem.objects.filter(cart__user=self.user).count(), 1)
+
+    def test_order_history_keyset_pagination(self):
+        for _ in range(5):
+            self.add()
+            self.client.post(reverse("fitur_belanja:checkout"), {"idempotency_key": ""})
+        url = reverse("api_cart:orders")
+
+        first = self.client.get(url, {"per_page": 3}).json()
+        self.assertEqual(len(first["results"]), 3)
+        with self.assertNumQueries(4):  # sesi, user, order, item
+            second = self.client.get(url, {"per_page": 3, "cursor": first["next_cursor"]}).json()
+        self.assertEqual(len(second["results"]), 2)
+        self.assertIsNone(second["next_cursor"])
+        ids = [o["id"] for o in first["results"] + second["results"]]
+        self.assertEqual(ids, sorted(ids, reverse=True))
+        self.assertEqual(second["results"][0]["items"][0]["name"], "Jersey")
+
+        self.client.logout()
+        self.assertEqual(self.client.get(url).status_code, 401)
+
+    def test_sales_report_aggregates_ledger(self):
+        self.add(2)
+        self.client.post(reverse("fitur_belanja:checkout"))
+        self.add(1)
+        self.client.post(reverse("fitur_belanja:checkout"))
+
+        row = sales_by_product().get(product_id=self.product.pk)
+        self.assertEqual((row["units"], row["revenue"]), (3, 750))
+
+
+class GuestCartMergeTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name="Merge")
+        self.products = [
+            Product.objects.create(name=f"Merge {i}", category=category, price=100, stock=20)
+            for i in range(3)
+        ]
+        self.user = get_user_model().objects.create_user(username="merge", password="secret123")
+
+    def add(self, product, qty):
+        self.client.post(reverse("api_cart:add_to_cart"), {"product_id": str(product.id), "qty": qty})
+
+    def test_login_merges_guest_items_into_existing_cart(self):
+        cart = Cart.objects.create(user=self.user)
+        CartItem.objects.create(cart=cart, product=self.products[0], qty=1, unit_price=100)
+
+        self.add(self.products[0], 2)
+        self.add(self.products[1], 4)
+        self.assertTrue(self.client.login(username="merge", password="secret123"))
+
+        self.assertFalse(Cart.objects.filter(user=None).exists())
+        qty = dict(cart.items.values_list("product_id", "qty"))
+        self.assertEqual(qty, {self.products[0].pk: 3, self.products[1].pk: 4})
+        self.assertEqual(self.client.session[CART_COUNT_SESSION_KEY]["count"], 7)
+        self.assertNotIn("cart_sk", self.client.session)
+
+    def test_merge_query_count_does_not_depend_on_cart_size(self):
+        for product in self.products:
+            self.add(product, 1)
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.login(username="merge", password="secret123")
+        small = len(ctx.captured_queries)
+        self.client.logout()
+
+        other = get_user_model().objects.create_user(username="merge2", password="secret123")
+        self.add(self.products[0], 1)
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.login(username="merge2", password="secret123")
+        self.assertEqual(len(ctx.captured_queries), small)
+        self.assertEqual(Cart.objects.get(user=other).items.count(), 1)
+
+    def test_login_without_guest_cart_creates_nothing(self):
+        self.client.login(username="merge", password="secret123")
+        self.assertFalse(Cart.objects.exists())
+
+
+class CartSummaryTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name="Summary")
+        self.products = [
+            Product.objects.create(name=f"Summary {i}", category=category, price=100, stock=20)
+            for i in range(3)
+        ]
+
+    def test_summary_is_one_aggregate_query(self):
+        cart = Cart.objects.create(session_key="summary")
+        CartItem.objects.bulk_create(
+            CartItem(cart=cart, product=p, qty=i + 1, unit_price=Decimal("12.50"))
+            for i, p in enumerate(self.products)
+        )
+        with self.assertNumQueries(1):
+            summary = CartSummary.for_cart(cart)
+        self.assertEqual((summary.lines, summary.item_count), (3, 6))
+        self.assertEqual(summary.subtotal, Decimal("75.00"))
+        self.assertEqual(summary.total, summary.subtotal + summary.shipping)
+        self.assertEqual(cart.total, summary.total)
+
+    def test_empty_cart(self):
+        summary = CartSummary.for_cart(Cart.objects.create(session_key="kosong"))
+        self.assertTrue(summary.is_empty)
+        self.assertEqual((summary.item_count, summary.subtotal), (0, 0))
+
+    def test_summary_endpoint(self):
+        url = reverse("api_cart:summary")
+        self.assertEqual(self.client.get(url).json()["item_count"], 0)
+        self.assertFalse(Session.objects.exists())
+
+        self.client.post(
+            reverse("api_cart:add_to_cart"), {"product_id": str(self.products[0].id), "qty": 3}
+        )
+        data = self.client.get(url).json()
+        self.assertEqual((data["lines"], data["item_count"]), (1, 3))
+        self.assertEqual(data["total"], 300.0)
+        self.assertNotIn("items", data)
+
+
+class AbandonedCartTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name="GC")
+        self.product = Product.objects.create(name="Bola GC", category=category, price=100, stock=10)
+        self.user = get_user_model().objects.create_user(username="gc", password="secret123")
+        self.old = timezone.now() - timedelta(days=60)
+
+    def make_cart(self, idle=False, items=1, **kwargs):
+        cart = Cart.objects.create(**kwargs)
+        for _ in range(items):
+            CartItem.objects.create(cart=cart, product=self.product, qty=1, unit_price=100)
+        if idle:
+            Cart.objects.filter(pk=cart.pk).update(updated_at=self.old)
+        return cart
+
+    def test_collects_expired_and_idle_carts_in_batches(self):
+        Session.objects.create(
+            session_key="hidup", session_data="", expire_date=timezone.now() + timedelta(days=1)
+        )
+        live = self.make_cart(session_key="hidup")
+        for i in range(5):
+            self.make_cart(session_key=f"hilang-{i}")  # sesinya sudah tidak ada
+        self.make_cart(idle=True, session_key="hidup")
+        user_cart = self.make_cart(idle=True, user=self.user)
+        empty_user_cart = self.make_cart(idle=True, items=0, user=get_user_model().objects.create(username="gc2"))
+
+        out = StringIO()
+        call_command("collect_abandoned_carts", "--dry-run", stdout=out)
+        self.assertIn("Would delete 7 carts and 6 cart items", out.getvalue())
+        self.assertEqual(Cart.objects.count(), 9)
+
+        result = collect(batch_size=2)
+        self.assertEqual((result.carts, result.items, result.batches), (7, 6, 4))
+        self.assertEqual(
+            set(Cart.objects.values_list("pk", flat=True)), {live.pk, user_cart.pk}
+        )
+        self.assertFalse(Cart.objects.filter(pk=empty_user_cart.pk).exists())
+
+    def test_adding_items_counts_as_activity(self):
+        self.client.post(reverse("api_cart:add_to_cart"), {"product_id": str(self.product.id), "qty": 1})
+        cart = Cart.objects.get()
+        Cart.objects.filter(pk=cart.pk).update(updated_at=self.old)
+
+        self.client.post(reverse("api_cart:add_to_cart"), {"product_id": str(self.product.id), "qty": 1})
+        self.assertEqual(collect().carts, 0)
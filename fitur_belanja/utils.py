@@ -1,28 +1,7 @@
 # fitur_belanja/utils.py
-from .models import Cart
-
-def get_or_create_cart(request):
-    if request.user.is_authenticated:
-        cart, _ = Cart.objects.get_or_create(user=request.user)
-        # merge guest cart by session if ada
-        sk = request.session.session_key
-        if sk:
-            try:
-                g = Cart.objects.get(session_key=sk, user__isnull=True)
-                for it in g.items.all():
-                    tgt, _ = cart.items.get_or_create(product=it.product, defaults={"qty":0,"unit_price":it.unit_price})
-                    tgt.qty += it.qty
-                    tgt.save(update_fields=["qty"])
-                g.delete()
-            except Cart.DoesNotExist:
-                pass
-        return cart
-    # guest
-    if not request.session.session_key:
-        request.session.create()
-    return Cart.objects.get_or_create(session_key=request.session.session_key)[0]
-
-from .models import Cart
+from .models import Cart, CartItem
+from django.db import transaction
+from django.utils import timezone
 from django.utils.crypto import get_random_string
 
 def cart_from_request(request):
@@ -37,3 +16,108 @@ def cart_from_request(request):
     request.session["cart_sk"] = sk
     cart, _ = Cart.objects.get_or_create(session_key=sk, user=None)
     return cart
+
+
+# kompatibilitas: nama lama, merge sekarang dilakukan sekali saat login
+get_or_create_cart = cart_from_request
+
+
+def merge_guest_cart(request, user):
+    """Pindahkan isi cart tamu ke cart milik ``user``. Dipanggil dari ``user_logged_in``.
+
+    ``login()`` mengganti session key sebelum signal dikirim, jadi cart tamu
+    dicari lewat ``cart_sk`` yang ikut terbawa di data sesi. Semua item
+    digabung dengan satu upsert (``bulk_create(update_conflicts=True)``).
+    """
+    sk = request.session.get("cart_sk") or request.session.session_key
+    if not sk:
+        return None
+
+    with transaction.atomic():
+        guest = Cart.objects.select_for_update().filter(session_key=sk, user=None).first()
+        if guest is None:
+            return None
+        cart, _ = Cart.objects.get_or_create(user=user)
+
+        guest_items = list(
+            guest.items.filter(product__isnull=False).values_list("product_id", "qty", "unit_price")
+        )
+        if guest_items:
+            existing = dict(
+                cart.items.filter(product_id__in=[pid for pid, _, _ in guest_items])
+                .values_list("product_id", "qty")
+            )
+            CartItem.objects.bulk_create(
+                [
+                    CartItem(cart=cart, product_id=pid, qty=existing.get(pid, 0) + qty, unit_price=price)
+                    for pid, qty, price in guest_items
+                ],
+                update_conflicts=True,
+                unique_fields=["cart", "product"],
+                update_fields=["qty", "unit_price"],
+            )
+        guest.delete()
+        cart.touch()
+
+    request.session.pop("cart_sk", None)
+    refresh_cart_count(request, cart)
+    return cart
+
+
+# ---------------------------------------------------------------------------
+# Badge jumlah item di navbar.
+# Jumlah disimpan di sesi bersama pemilik (user id / None untuk tamu) dan waktu
+# hitung; endpoint yang mengubah keranjang memperbaruinya, dan nilai yang lebih
+# tua dari CART_COUNT_TTL dihitung ulang (mis. keranjang diubah dari perangkat lain).
+# ---------------------------------------------------------------------------
+
+CART_COUNT_SESSION_KEY = "cart_count"
+CART_COUNT_TTL = 300
+
+
+def find_cart(request):
+    """Cart milik request tanpa pernah membuat cart atau sesi baru."""
+    if request.user.is_authenticated:
+        return Cart.objects.filter(user=request.user).order_by("pk").first()
+    sk = request.session.session_key
+    if not sk:
+        return None
+    return Cart.objects.filter(session_key=sk, user=None).order_by("pk").first()
+
+
+def _cart_owner(request):
+    return request.user.pk if request.user.is_authenticated else None
+
+
+def remember_cart_count(request, count, owner=None):
+    request.session[CART_COUNT_SESSION_KEY] = {
+        "owner": owner if owner is not None else _cart_owner(request),
+        "count": count,
+        "at": int(timezone.now().timestamp()),
+    }
+    return count
+
+
+def refresh_cart_count(request, cart=None):
+    """Hitung ulang dari DB lalu simpan di sesi. Dipanggil setelah keranjang berubah."""
+    if cart is None:
+        cart = find_cart(request)
+    return remember_cart_count(
+        request, cart.item_count if cart else 0, owner=cart.user_id if cart else None
+    )
+
+
+def cart_count(request):
+    # tamu tanpa sesi pasti belum punya cart: tidak perlu query sama sekali
+    if not request.user.is_authenticated and not request.session.session_key:
+        return 0
+
+    cached = request.session.get(CART_COUNT_SESSION_KEY)
+    now = int(timezone.now().timestamp())
+    if (
+        cached
+        and cached.get("owner") == _cart_owner(request)
+        and now - cached.get("at", 0) < CART_COUNT_TTL
+    ):
+        return cached["count"]
+    return refresh_cart_count(request)
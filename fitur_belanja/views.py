@@ -1,12 +1,14 @@
 # fitur_belanja/views.py
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import require_GET, require_POST
 from django.db import transaction
 from shop.models import Product
-from .models import CartItem
+from .models import CartItem, Order
 from django.contrib import messages
-from .utils import cart_from_request
+from .checkout import CheckoutError, checkout_cart
+from .summary import SHIPPING_FEE, CartSummary
+from .utils import cart_from_request, find_cart, refresh_cart_count, remember_cart_count
 import json
 import uuid
 
@@ -18,15 +20,16 @@ def shopping(request):
         .filter(cart=cart)
         .order_by("id")
     )
-    subtotal = sum(i.subtotal for i in items)
-    shipping = 0  # demo: gratis/flat
-    total = subtotal + shipping
+    summary = CartSummary.for_cart(cart)
+    # ringkasan sudah dihitung, sekalian segarkan badge navbar tanpa query tambahan
+    remember_cart_count(request, summary.item_count, owner=cart.user_id)
     return render(request, "fitur_belanja/cart.html", {
         "cart": cart,
         "items": items,
-        "subtotal": subtotal,
-        "shipping": shipping,
-        "total": total,
+        "summary": summary,
+        "subtotal": summary.subtotal,
+        "shipping": summary.shipping,
+        "total": summary.total,
     })
 
 
@@ -71,10 +74,11 @@ def add_to_cart(request):
             item.qty += qty
             item.unit_price = product.final_price
             item.save(update_fields=["qty", "unit_price"])
+        cart.touch()
 
     return JsonResponse({
         "ok": True,
-        "cart_count": cart.item_count,
+        "cart_count": refresh_cart_count(request, cart),
         "message": "Success add to cart"
     })
 
@@ -86,7 +90,12 @@ def update_qty(request):
     item = get_object_or_404(CartItem, id=item_id, cart=cart)
     item.qty = qty
     item.save()
-    return JsonResponse({"ok": True, "subtotal": float(item.subtotal)})
+    cart.touch()
+    return JsonResponse({
+        "ok": True,
+        "subtotal": float(item.subtotal),
+        "cart_count": refresh_cart_count(request, cart),
+    })
 
 @require_POST
 def remove_item(request):
@@ -99,76 +108,114 @@ def remove_item(request):
         item.delete()
 
     # setelah delete, total dihitung ulang otomatis dari property
-    return JsonResponse({"success": True})
+    return JsonResponse({"success": True, "cart_count": refresh_cart_count(request, cart)})
 
 
 @require_POST
 def clear_cart(request):
     cart = cart_from_request(request)
     cart.items.all().delete()
+    remember_cart_count(request, 0)
     return JsonResponse({"ok": True, "cart_count": 0})
 
 
 
 def _cart_totals(cart):
+    summary = CartSummary.for_cart(cart)
     items = (CartItem.objects
-             .select_related("product", "cart")
+             .select_related("product")
              .filter(cart=cart)
              .order_by("id"))
-    subtotal = sum(i.subtotal for i in items)
-    shipping = 0
-    total = subtotal + shipping
-    return items, subtotal, shipping, total
+    return items, summary
 
 def checkout(request):
     cart = cart_from_request(request)
-    items, subtotal, shipping, total = _cart_totals(cart)
-
-    
-    if not items.exists():
-        messages.info(request, "Keranjang masih kosong.")
-        return redirect("fitur_belanja:shopping")
 
     if request.method == "POST":
-     
+        # form menyertakan key per halaman checkout; klien mobile boleh memakai header
+        key = (
+            request.POST.get("idempotency_key")
+            or request.headers.get("Idempotency-Key")
+            or None
+        )
         try:
-            with transaction.atomic():
-               
-                for it in items.select_related("product"):
-                    p = it.product
-
-                  
-                    if request.user.is_authenticated and p.created_by_id == request.user.id:
-                        raise ValueError(f"Tidak boleh membeli produk sendiri: {p.name}")
-
-                    if p.status != "active" or it.qty > p.stock:
-                        raise ValueError(f"Stok tidak cukup untuk {p.name} (tersisa {p.stock})")
-
-                   
-                    p.stock -= it.qty
-                    p.total_sold += it.qty
-                    p.save(update_fields=["stock", "total_sold", "updated_at"])
-
-                cart.items.all().delete()
-
-            messages.success(request, "Pembayaran berhasil. Terima kasih! 🎉")
+            order, created = checkout_cart(
+                cart, request.user, idempotency_key=key, shipping=SHIPPING_FEE
+            )
+            remember_cart_count(request, 0)
+
+            if created:
+                messages.success(request, "Pembayaran berhasil. Terima kasih! 🎉")
+            else:
+                messages.info(request, "Pesanan ini sudah diproses sebelumnya.")
             
             return redirect("shop:list")
 
-        except ValueError as e:
+        except CheckoutError as e:
             messages.error(request, str(e))
-          
-            return render(request, "fitur_belanja/checkout.html", {
-                "items": items,
-                "subtotal": subtotal,
-                "shipping": shipping,
-                "total": total,
-            })
-
-  
+
+    items, summary = _cart_totals(cart)
+    if summary.is_empty:
+        messages.info(request, "Keranjang masih kosong.")
+        return redirect("fitur_belanja:shopping")
+
     return render(request, "fitur_belanja/checkout.html", {
         "items": items,
-        "subtotal": subtotal,
-        "shipping": shipping,
-        "total": total,
+        "summary": summary,
+        "subtotal": summary.subtotal,
+        "shipping": summary.shipping,
+        "total": summary.total,
+        "idempotency_key": uuid.uuid4().hex,
+    })
+
+
+@require_GET
+def cart_summary(request):
+    """Ringkasan keranjang tanpa baris item, untuk badge/footer di aplikasi mobile."""
+    cart = find_cart(request)
+    summary = CartSummary.for_cart(cart)
+    if cart is not None:  # tamu tanpa cart tidak perlu dibuatkan sesi
+        remember_cart_count(request, summary.item_count, owner=cart.user_id)
+    return JsonResponse(summary.as_json())
+
+
+def _order_json(order):
+    return {
+        "id": order.pk,
+        "status": order.status,
+        "total": float(order.total),
+        "created_at": order.created_at.isoformat(),
+        "items": [
+            {
+                "product_id": str(item.product_id) if item.product_id else None,
+                "name": item.name_snapshot,
+                "qty": item.qty,
+                "unit_price": float(item.unit_price),
+            }
+            for item in order.items.all()
+        ],
+    }
+
+
+@require_GET
+def orders_json(request):
+    """Riwayat order user, keyset pagination: ?cursor=<next_cursor>&per_page=N."""
+    if not request.user.is_authenticated:
+        return JsonResponse({"error": "Authentication required."}, status=401)
+    try:
+        per_page = max(1, min(int(request.GET.get("per_page", 10)), 50))
+        cursor = int(request.GET["cursor"]) if request.GET.get("cursor") else None
+    except ValueError:
+        return JsonResponse({"error": "cursor/per_page tidak valid"}, status=400)
+
+    qs = Order.objects.filter(user=request.user).order_by("-id")
+    if cursor is not None:
+        qs = qs.filter(id__lt=cursor)
+    orders = list(qs.prefetch_related("items")[: per_page + 1])
+    has_next = len(orders) > per_page
+    orders = orders[:per_page]
+
+    return JsonResponse({
+        "results": [_order_json(order) for order in orders],
+        "next_cursor": str(orders[-1].pk) if has_next else None,
     })
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import SearchPreference, SearchLog
+from .models import SearchDailyStat, SearchPreference, SearchLog
 
 
 @admin.register(SearchPreference)
@@ -76,3 +76,11 @@ class SearchLogAdmin(admin.ModelAdmin):
     search_fields = ("keyword", "user__username")
     autocomplete_fields = ("user", "preference")
     readonly_fields = ("created_at", "updated_at")
+
+
+@admin.register(SearchDailyStat)
+class SearchDailyStatAdmin(admin.ModelAdmin):
+    list_display = ("date", "keyword", "scope", "search_count", "avg_result_count")
+    list_filter = ("scope", "date")
+    search_fields = ("keyword",)
+    date_hierarchy = "date"
@@ -0,0 +1,191 @@
+"""Rollup harian untuk analitik pencarian.
+
+``SearchLog`` hanya dibaca sekali per hari oleh ``rollup_day``; endpoint
+analitik membaca ``SearchDailyStat`` yang ukurannya sebanding dengan jumlah
+keyword unik per hari, bukan jumlah pencarian. Hari yang belum (lengkap)
+direkap -- hari rekap terakhir dan sesudahnya, termasuk hari ini -- dibaca
+dari log mentah supaya ``summary`` tetap terkini. Log mentah yang sudah
+direkap boleh dihapus oleh ``prune_logs``; hari tanpa rekap tidak pernah
+dihapus.
+"""
+
+import datetime
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, Max, Min, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import SearchDailyStat, SearchLog
+
+
+def _day_bounds(day):
+    start = timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+    return start, start + datetime.timedelta(days=1)
+
+
+def rollup_day(day):
+    """Hitung ulang rekap satu hari. Aman dijalankan berulang kali.
+
+    Hari tanpa log mentah (mis. sudah dihapus ``prune_logs``) tidak disentuh,
+    supaya rekap yang sudah ada tidak ikut terhapus.
+    """
+    start, end = _day_bounds(day)
+    rows = (
+        SearchLog.objects.filter(created_at__gte=start, created_at__lt=end)
+        .order_by()
+        .values("keyword", "scope")
+        .annotate(search_count=Count("id"), result_total=Sum("result_count"))
+    )
+    stats = [
+        SearchDailyStat(
+            date=day,
+            keyword=row["keyword"],
+            scope=row["scope"],
+            search_count=row["search_count"],
+            result_total=row["result_total"] or 0,
+        )
+        for row in rows
+    ]
+    if not stats:
+        return 0
+    with transaction.atomic():
+        SearchDailyStat.objects.filter(date=day).delete()
+        SearchDailyStat.objects.bulk_create(stats, batch_size=500)
+    return len(stats)
+
+
+def pending_days(since=None, until=None):
+    """Hari yang perlu direkap: dari rekap terakhir (diulang, bisa jadi parsial) s.d. hari ini."""
+    until = until or timezone.localdate()
+    if since is None:
+        last = SearchDailyStat.objects.aggregate(last=Max("date"))["last"]
+        if last is not None:
+            since = last
+        else:
+            first = SearchLog.objects.aggregate(first=Min("created_at"))["first"]
+            if first is None:
+                return []
+            since = timezone.localdate(first)
+    days = []
+    day = since
+    while day <= until:
+        days.append(day)
+        day += datetime.timedelta(days=1)
+    return days
+
+
+def rollup(since=None, until=None):
+    """Rekap semua hari yang tertunda. Mengembalikan ``{tanggal: jumlah baris}``."""
+    return {day: rollup_day(day) for day in pending_days(since, until)}
+
+
+def retention_cutoff(retention_days):
+    """Hari pertama yang log mentahnya masih disimpan; ``None`` jika tidak ada pruning."""
+    if not retention_days:
+        return None
+    return timezone.localdate() - datetime.timedelta(days=retention_days)
+
+
+def unrolled_days(before):
+    """Hari sebelum ``before`` yang punya log mentah tetapi belum punya rekap."""
+    logged = set(
+        SearchLog.objects.filter(created_at__lt=_day_bounds(before)[0])
+        .annotate(day=TruncDate("created_at"))
+        .order_by()
+        .values_list("day", flat=True)
+        .distinct()
+    )
+    if not logged:
+        return []
+    rolled = set(
+        SearchDailyStat.objects.filter(date__in=logged)
+        .order_by()
+        .values_list("date", flat=True)
+        .distinct()
+    )
+    return sorted(logged - rolled)
+
+
+def prune_logs(retention_days):
+    """Hapus SearchLog yang lebih tua dari ``retention_days`` dan sudah direkap.
+
+    Hari yang terlewat rollup (mis. karena ``--since`` melompati celah) tidak
+    punya rekap; log mentahnya dibiarkan sampai hari itu direkap.
+    """
+    cutoff_day = retention_cutoff(retention_days)
+    if cutoff_day is None:
+        return 0
+    last_rolled = SearchDailyStat.objects.aggregate(last=Max("date"))["last"]
+    if last_rolled is None:
+        return 0
+    # hari terakhir yang direkap bisa saja belum lengkap, jangan dihapus
+    cutoff_day = min(cutoff_day, last_rolled)
+    cutoff, _ = _day_bounds(cutoff_day)
+    logs = SearchLog.objects.filter(created_at__lt=cutoff)
+    gaps = unrolled_days(cutoff_day)
+    if gaps:
+        logs = logs.exclude(created_at__date__in=gaps)
+    deleted, _ = logs.delete()
+    return deleted
+
+
+def _live_from(start):
+    """Hari pertama (>= start) yang dibaca dari log mentah, bukan dari rekap."""
+    last_rolled = SearchDailyStat.objects.aggregate(last=Max("date"))["last"]
+    if last_rolled is None:
+        return start
+    # hari rekap terakhir bisa parsial (rollup dijalankan di tengah hari)
+    return max(start, last_rolled)
+
+
+def summary(start, end, limit=8):
+    live_from = _live_from(start)
+    totals = defaultdict(lambda: [0, 0])  # (keyword, scope) -> [jumlah, total hasil]
+    rolled_until = min(live_from, end + datetime.timedelta(days=1))  # eksklusif
+    if start < rolled_until:
+        rolled = (
+            SearchDailyStat.objects.filter(date__gte=start, date__lt=rolled_until)
+            .order_by()
+            .values("keyword", "scope")
+            .annotate(total=Sum("search_count"), result_total=Sum("result_total"))
+        )
+        for row in rolled:
+            bucket = totals[row["keyword"], row["scope"]]
+            bucket[0] += row["total"]
+            bucket[1] += row["result_total"] or 0
+    if live_from <= end:
+        live = (
+            SearchLog.objects.filter(
+                created_at__gte=_day_bounds(live_from)[0], created_at__lt=_day_bounds(end)[1]
+            )
+            .order_by()
+            .values("keyword", "scope")
+            .annotate(total=Count("id"), result_total=Sum("result_count"))
+        )
+        for row in live:
+            bucket = totals[row["keyword"], row["scope"]]
+            bucket[0] += row["total"]
+            bucket[1] += row["result_total"] or 0
+
+    keywords = defaultdict(lambda: [0, 0])
+    scopes = defaultdict(int)
+    for (keyword, scope), (total, result_total) in totals.items():
+        keywords[keyword][0] += total
+        keywords[keyword][1] += result_total
+        scopes[scope] += total
+    ranked = sorted(keywords.items(), key=lambda item: (-item[1][0], item[0]))[:limit]
+    top_queries = [
+        {
+            "keyword": keyword,
+            "total": total,
+            "avg_result_count": round(result_total / total, 2),
+        }
+        for keyword, (total, result_total) in ranked
+    ]
+    scope_breakdown = [
+        {"scope": scope, "total": total}
+        for scope, total in sorted(scopes.items(), key=lambda item: (-item[1], item[0]))
+    ]
+    return {"top_queries": top_queries, "scope_breakdown": scope_breakdown}
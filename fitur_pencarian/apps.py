@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class FiturPencarianConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'fitur_pencarian'
+
+    def ready(self):
+        from . import signals  # noqa: F401
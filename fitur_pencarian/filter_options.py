@@ -0,0 +1,110 @@
+"""Opsi filter pencarian (kategori berita, kategori produk, brand) yang di-cache.
+
+Dipakai oleh ``ajax_filter_options`` dan pilihan select di ``SearchForm`` /
+``SearchPreferenceForm``. Kunci cache memuat token versi milik modul ini
+(diganti oleh signal Brand/KategoriBerita) dan versi pohon kategori produk.
+Dengan cache per proses token itu berumur pendek (``version_timeout()``),
+jadi perubahan dari proses lain terlihat paling lambat setelah
+``CACHE_VERSION_TTL`` detik.
+
+Endpoint ``ajax_filter_options`` tidak bergantung pada token itu: ETag-nya
+(``data_state``) dihitung dari data, dan body di-cache per nilai ETag.
+"""
+
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max
+
+from portal_berita.models import KategoriBerita
+from shop import category_tree
+from shop.models import Brand, Category
+from sport_watch.caching import version_timeout
+from sport_watch.conditional import make_etag
+
+VERSION_KEY = "search:filter_options:version"
+OPTIONS_KEY = "search:filter_options:{version}:{tree_version}"
+STATE_OPTIONS_KEY = "search:filter_options:state:{state}"
+TIMEOUT = 60 * 60
+
+
+def _version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, timeout=version_timeout())
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def _build(tree=None):
+    tree = tree or category_tree.get_tree()
+    return {
+        "news_categories": [
+            {"id": str(pk), "name": nama}
+            for pk, nama in KategoriBerita.objects.order_by("nama").values_list("id", "nama")
+        ],
+        "product_categories": [
+            {"id": str(pk), "name": path} for pk, path in tree.options()
+        ],
+        "brands": [
+            {"id": str(pk), "name": name}
+            for pk, name in Brand.objects.order_by("name").values_list("id", "name")
+        ],
+    }
+
+
+def get_filter_options():
+    key = OPTIONS_KEY.format(version=_version(), tree_version=category_tree.current_version())
+    options = cache.get(key)
+    if options is None:
+        options = _build()
+        cache.set(key, options, TIMEOUT)
+    return options
+
+
+def data_state(request=None):
+    """Penanda isi opsi filter yang dihitung dari data (sama di semua proses).
+
+    Brand dan Category memakai jumlah baris + ``updated_at`` terbaru;
+    KategoriBerita tidak punya timestamp, jadi seluruh (id, nama)-nya di-hash
+    (tabelnya kecil). Disimpan di ``request`` karena dipanggil untuk ETag dan
+    lagi oleh view.
+    """
+    cached = getattr(request, "_filter_options_state", None)
+    if cached is not None:
+        return cached
+    state = make_etag(
+        *Brand.objects.aggregate(n=Count("id"), updated=Max("updated_at")).values(),
+        *Category.objects.aggregate(n=Count("id"), updated=Max("updated_at")).values(),
+        *KategoriBerita.objects.order_by("nama").values_list("id", "nama"),
+    )
+    if request is not None:
+        request._filter_options_state = state
+    return state
+
+
+def options_for_state(state):
+    """Opsi filter untuk ``data_state``; dibangun dari DB (tanpa pohon lokal) jika belum di-cache."""
+    key = STATE_OPTIONS_KEY.format(state=state)
+    options = cache.get(key)
+    if options is None:
+        options = _build(category_tree.get_tree(fresh=True))
+        cache.set(key, options, TIMEOUT)
+    return options
+
+
+def choices(name, empty_label):
+    """Pilihan ``<select>`` untuk salah satu daftar opsi, diawali label kosong."""
+    return [("", empty_label)] + [
+        (item["id"], item["name"]) for item in get_filter_options()[name]
+    ]
+
+
+def _bump():
+    cache.set(VERSION_KEY, uuid.uuid4().hex, timeout=version_timeout())
+
+
+def invalidate():
+    _bump()
+    transaction.on_commit(_bump)
@@ -1,7 +1,10 @@
+from functools import partial
+
 from django import forms
 from portal_berita.models import KategoriBerita
 from shop.models import Category, Brand
 
+from .filter_options import choices
 from .models import SearchPreference
 
 
@@ -99,10 +102,13 @@ class SearchForm(forms.Form):
         self.fields["product_category"].queryset = Category.objects.order_by("name")
         self.fields["brand"].queryset = Brand.objects.order_by("name")
 
-        # ganti label kosong default "---------" → custom
-        self.fields["news_category"].empty_label = "All News"
-        self.fields["product_category"].empty_label = "All Products"
-        self.fields["brand"].empty_label = "All Brands"  # opsional, biar konsisten
+        # pilihan select diambil dari cache saat dirender (lazy), queryset hanya
+        # dipakai validasi; label kosong default "---------" → custom
+        self.fields["news_category"].choices = partial(choices, "news_categories", "All News")
+        self.fields["product_category"].choices = partial(
+            choices, "product_categories", "All Products"
+        )
+        self.fields["brand"].choices = partial(choices, "brands", "All Brands")
 
     def clean(self):
         cleaned = super().clean()
@@ -201,10 +207,14 @@ class SearchPreferenceForm(forms.ModelForm):
         self.fields["default_product_category"].queryset = Category.objects.order_by("name")
         self.fields["default_brand"].queryset = Brand.objects.order_by("name")
 
-        # ganti label kosong default "---------" → custom
-        self.fields["default_news_category"].empty_label = "All News"
-        self.fields["default_product_category"].empty_label = "All Products"
-        self.fields["default_brand"].empty_label = "All Brands"  # opsional
+        # pilihan dari cache (lihat SearchForm); label kosong custom
+        self.fields["default_news_category"].choices = partial(
+            choices, "news_categories", "All News"
+        )
+        self.fields["default_product_category"].choices = partial(
+            choices, "product_categories", "All Products"
+        )
+        self.fields["default_brand"].choices = partial(choices, "brands", "All Brands")
 
         if not user or not user.is_staff:
             self.fields["role_visibility"].choices = [
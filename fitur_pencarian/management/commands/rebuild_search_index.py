@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from fitur_pencarian import search
+from portal_berita.models import Berita
+from shop.models import Product
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the full-text search index for published news and active products.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        backend = search.get_backend()
+        backend.clear()
+        batch_size = options['batch_size']
+
+        news = Berita.objects.filter(is_published=True).select_related('kategori')
+        news_count = 0
+        for berita in news.iterator(chunk_size=batch_size):
+            search.index_instance(berita, backend)
+            news_count += 1
+
+        products = Product.objects.filter(status='active').select_related('category', 'brand')
+        product_count = 0
+        for product in products.iterator(chunk_size=batch_size):
+            search.index_instance(product, backend)
+            product_count += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Indexed {news_count} news items and {product_count} products '
+            f'with {type(backend).__name__}.'
+        ))
@@ -0,0 +1,48 @@
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from fitur_pencarian import analytics
+
+
+def _parse_date(value):
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError as exc:
+        raise CommandError(f'Invalid date {value!r}, expected YYYY-MM-DD.') from exc
+
+
+class Command(BaseCommand):
+    help = 'Rolls SearchLog rows up into daily SearchDailyStat rows and prunes old raw logs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', type=_parse_date, help='First day to (re)build, YYYY-MM-DD.')
+        parser.add_argument('--until', type=_parse_date, help='Last day to (re)build, YYYY-MM-DD. Defaults to today.')
+        parser.add_argument(
+            '--retention-days',
+            type=int,
+            default=getattr(settings, 'SEARCH_LOG_RETENTION_DAYS', 90),
+            help='Delete raw SearchLog rows older than this many days once rolled up (0 keeps everything).',
+        )
+
+    def handle(self, *args, **options):
+        cutoff = analytics.retention_cutoff(options['retention_days'])
+        if options['since'] and cutoff and options['since'] < cutoff:
+            self.stdout.write(self.style.WARNING(
+                f'Raw logs before {cutoff} may already be pruned; days without raw logs keep their existing stats.'
+            ))
+        result = analytics.rollup(since=options['since'], until=options['until'])
+        rows = sum(result.values())
+        self.stdout.write(self.style.SUCCESS(f'Rolled up {len(result)} days into {rows} stat rows.'))
+
+        pruned = analytics.prune_logs(options['retention_days'])
+        if cutoff:
+            gaps = analytics.unrolled_days(cutoff)
+            if gaps:
+                self.stdout.write(self.style.WARNING(
+                    f'Kept raw logs for {len(gaps)} day(s) without stats (first {gaps[0]}); '
+                    f'roll them up with --since={gaps[0]}.'
+                ))
+        if pruned:
+            self.stdout.write(self.style.SUCCESS(f'Pruned {pruned} search log rows.'))
@@ -0,0 +1,74 @@
+# Generated by Django 5.2.18 on 2025-12-09 10:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def create_engine_structures(apps, schema_editor):
+    # struktur khusus backend: FTS5 di SQLite, tsvector + GIN di PostgreSQL
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        try:
+            schema_editor.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS fitur_pencarian_searchfts "
+                "USING fts5(body, kind UNINDEXED, object_id UNINDEXED, "
+                "tokenize='unicode61 remove_diacritics 2')"
+            )
+        except Exception:
+            # SQLite tanpa FTS5: backend posting list tetap bisa dipakai
+            pass
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            "ALTER TABLE fitur_pencarian_searchdocument ADD COLUMN tsv tsvector "
+            "GENERATED ALWAYS AS (to_tsvector('simple', body)) STORED"
+        )
+        schema_editor.execute(
+            "CREATE INDEX fitur_pencarian_searchdocument_tsv_gin "
+            "ON fitur_pencarian_searchdocument USING GIN (tsv)"
+        )
+
+
+def drop_engine_structures(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS fitur_pencarian_searchfts")
+    elif vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS fitur_pencarian_searchdocument_tsv_gin")
+        schema_editor.execute("ALTER TABLE fitur_pencarian_searchdocument DROP COLUMN IF EXISTS tsv")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fitur_pencarian', '0005_merge_20251024_2049'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('news', 'Berita'), ('product', 'Produk')], max_length=10)),
+                ('object_id', models.CharField(max_length=64)),
+                ('body', models.TextField(blank=True)),
+                ('length', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='uniq_search_document')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SearchPosting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('tf', models.PositiveIntegerField(default=1)),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='postings', to='fitur_pencarian.searchdocument')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('term', 'document'), name='uniq_search_posting')],
+            },
+        ),
+        migrations.RunPython(create_engine_structures, drop_engine_structures),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2025-12-10 08:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fitur_pencarian', '0006_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('keyword', models.CharField(max_length=255)),
+                ('scope', models.CharField(choices=[('all', 'Semua Konten'), ('news', 'Berita'), ('products', 'Produk')], default='all', max_length=20)),
+                ('search_count', models.PositiveIntegerField(default=0)),
+                ('result_total', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-date', '-search_count'],
+                'indexes': [models.Index(fields=['date', 'scope'], name='fitur_penca_date_5108b2_idx')],
+                'constraints': [models.UniqueConstraint(fields=('date', 'keyword', 'scope'), name='uniq_search_daily_stat')],
+            },
+        ),
+    ]
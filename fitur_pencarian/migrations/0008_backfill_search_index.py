@@ -0,0 +1,42 @@
+from django.db import migrations
+
+
+def backfill(apps, schema_editor):
+    # ajax_search_results menjawab dari indeks, jadi data yang sudah ada diindeks
+    # di sini (tanpa harus menjalankan rebuild_search_index manual setelah deploy).
+    # Model asli dipakai karena search.document_for butuh kelasnya; kolom dibatasi
+    # dengan only() supaya tidak bergantung pada kolom yang ditambah belakangan.
+    from fitur_pencarian import search
+    from portal_berita.models import Berita
+    from shop.models import Product
+
+    if schema_editor.connection.alias != "default":
+        return
+    backend = search.get_backend()
+    news = (
+        Berita.objects.filter(is_published=True)
+        .select_related("kategori")
+        .only("id", "judul", "konten", "is_published", "kategori__nama")
+        .order_by()
+    )
+    search.index_instances(news.iterator(chunk_size=500), backend)
+    products = (
+        Product.objects.filter(status="active")
+        .select_related("category", "brand")
+        .only("id", "name", "description", "status", "category__name", "brand__name")
+        .order_by()
+    )
+    search.index_instances(products.iterator(chunk_size=500), backend)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fitur_pencarian', '0007_search_daily_stat'),
+        ('portal_berita', '0009_crawl_state'),
+        ('shop', '0004_category_path'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -129,3 +129,78 @@ class SearchLog(TimeStampedModel):
     def __str__(self) -> str:
         user = self.user.username if self.user_id else "anon"
         return f"{self.keyword} ({self.scope}) oleh {user}"
+
+
+class SearchDailyStat(models.Model):
+    """Rekap harian SearchLog per keyword dan scope (diisi rollup_search_stats)."""
+
+    date = models.DateField()
+    keyword = models.CharField(max_length=255)
+    scope = models.CharField(
+        max_length=20,
+        choices=SearchPreference.SearchScope.choices,
+        default=SearchPreference.SearchScope.ALL,
+    )
+    search_count = models.PositiveIntegerField(default=0)
+    # jumlah, bukan rata-rata, supaya bisa dijumlahkan lintas hari
+    result_total = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        ordering = ["-date", "-search_count"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["date", "keyword", "scope"], name="uniq_search_daily_stat"
+            )
+        ]
+        indexes = [models.Index(fields=["date", "scope"])]
+
+    def __str__(self) -> str:
+        return f"{self.date} {self.keyword} ({self.scope}): {self.search_count}"
+
+    @property
+    def avg_result_count(self):
+        return self.result_total / self.search_count if self.search_count else 0
+
+
+class SearchDocument(models.Model):
+    """Teks ternormalisasi dari Berita/Product yang sudah diindeks."""
+
+    class Kind(models.TextChoices):
+        NEWS = "news", "Berita"
+        PRODUCT = "product", "Produk"
+
+    kind = models.CharField(max_length=10, choices=Kind.choices)
+    object_id = models.CharField(max_length=64)
+    body = models.TextField(blank=True)
+    length = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["kind", "object_id"], name="uniq_search_document"
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.kind}:{self.object_id}"
+
+
+class SearchPosting(models.Model):
+    """Satu entri posting list: term -> dokumen beserta term frequency."""
+
+    document = models.ForeignKey(
+        SearchDocument, on_delete=models.CASCADE, related_name="postings"
+    )
+    term = models.CharField(max_length=64)
+    tf = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["term", "document"], name="uniq_search_posting"
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.term} -> {self.document_id} ({self.tf})"
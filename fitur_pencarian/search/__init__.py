@@ -0,0 +1,121 @@
+"""Indeks pencarian full-text untuk berita dan produk.
+
+Dokumen diindeks ulang lewat signal setiap kali Berita/Product disimpan,
+sehingga ``ajax_search_results`` tidak perlu lagi memindai tabel dengan
+``icontains``. Backend dipilih lewat ``SEARCH_BACKEND``:
+
+* ``"auto"`` (default) - FTS5 di SQLite, tsvector di PostgreSQL,
+  posting list untuk database lain;
+* ``"postings"``, ``"sqlite_fts"``, ``"postgres"``;
+* atau dotted path ke kelas backend.
+
+Jalankan ``manage.py rebuild_search_index`` setelah migrasi pertama atau
+setelah mengganti backend.
+"""
+
+from itertools import islice
+
+from django.conf import settings
+from django.db import connection
+from django.utils.module_loading import import_string
+
+from fitur_pencarian.models import SearchDocument
+
+from .backends import PostgresSearchBackend, PostingIndexBackend, SQLiteFTSBackend
+
+NEWS = SearchDocument.Kind.NEWS
+PRODUCT = SearchDocument.Kind.PRODUCT
+
+BACKENDS = {
+    "postings": PostingIndexBackend,
+    "sqlite_fts": SQLiteFTSBackend,
+    "postgres": PostgresSearchBackend,
+}
+
+
+def get_backend():
+    name = getattr(settings, "SEARCH_BACKEND", "auto")
+    if name == "auto":
+        if connection.vendor == "postgresql":
+            return PostgresSearchBackend()
+        if connection.vendor == "sqlite" and SQLiteFTSBackend.is_available():
+            return SQLiteFTSBackend()
+        return PostingIndexBackend()
+    if name in BACKENDS:
+        return BACKENDS[name]()
+    return import_string(name)()
+
+
+def _kind_of(instance):
+    from portal_berita.models import Berita
+    from shop.models import Product
+
+    if isinstance(instance, Berita):
+        return NEWS
+    if isinstance(instance, Product):
+        return PRODUCT
+    return None
+
+
+def document_for(instance):
+    """Teks yang diindeks, atau ``None`` jika objek tidak boleh muncul di hasil."""
+    kind = _kind_of(instance)
+    if kind == NEWS:
+        if not instance.is_published:
+            return None
+        kategori = instance.kategori.nama if instance.kategori_id else ""
+        # judul diulang agar bobotnya lebih tinggi dari isi
+        return " ".join([instance.judul, instance.judul, kategori, instance.konten])
+    if kind == PRODUCT:
+        if instance.status != "active":
+            return None
+        brand = instance.brand.name if instance.brand_id else ""
+        return " ".join(
+            [instance.name, instance.name, brand, instance.category.name, instance.description]
+        )
+    return None
+
+
+def index_instance(instance, backend=None):
+    kind = _kind_of(instance)
+    if kind is None:
+        return
+    backend = backend or get_backend()
+    text = document_for(instance)
+    if text is None:
+        backend.remove(kind, instance.pk)
+    else:
+        backend.index(kind, instance.pk, text)
+
+
+def index_instances(instances, backend=None, batch_size=500):
+    """Versi bulk ``index_instance`` untuk importer (query per batch, bukan per objek).
+
+    Relasi yang ikut diindeks (kategori, brand) sebaiknya sudah dimuat.
+    """
+    backend = backend or get_backend()
+    iterator = iter(instances)
+    while batch := list(islice(iterator, batch_size)):
+        documents = {}
+        for instance in batch:
+            kind = _kind_of(instance)
+            if kind is None:
+                continue
+            text = document_for(instance)
+            if text is None:
+                backend.remove(kind, instance.pk)
+            else:
+                documents.setdefault(kind, []).append((instance.pk, text))
+        for kind, items in documents.items():
+            backend.index_many(kind, items)
+
+
+def remove_instance(instance, backend=None):
+    kind = _kind_of(instance)
+    if kind is not None:
+        (backend or get_backend()).remove(kind, instance.pk)
+
+
+def search_ids(kind, query, limit=None):
+    """``object_id`` hasil pencarian, urut berdasarkan relevansi (default semua)."""
+    return get_backend().search(kind, query, limit=limit)
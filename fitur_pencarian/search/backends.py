@@ -0,0 +1,246 @@
+"""Backend indeks pencarian.
+
+Semua backend menyimpan ``SearchDocument`` (teks ternormalisasi). Yang
+berbeda hanya struktur indeks dan cara ranking:
+
+* ``PostingIndexBackend``  - posting list ``SearchPosting`` + BM25 di Python,
+  jalan di database apa pun.
+* ``SQLiteFTSBackend``     - tabel virtual FTS5 dengan ``bm25()`` (development).
+* ``PostgresSearchBackend`` - kolom ``tsvector`` + indeks GIN (production).
+"""
+
+import math
+from collections import Counter, defaultdict
+
+from django.db import connection, transaction
+from django.db.models import Avg, Count
+
+from fitur_pencarian.models import SearchDocument, SearchPosting
+
+from .text import query_terms, tokenize
+
+
+class BaseSearchBackend:
+    def index(self, kind, object_id, text):
+        tokens = tokenize(text)
+        object_id = str(object_id)
+        with transaction.atomic():
+            document, _ = SearchDocument.objects.update_or_create(
+                kind=kind,
+                object_id=object_id,
+                defaults={"body": " ".join(tokens), "length": len(tokens)},
+            )
+            self._index_document(document, tokens)
+        return document
+
+    def index_many(self, kind, items):
+        """Indeks banyak dokumen sekaligus; ``items`` berisi ``(object_id, text)``.
+
+        Query-nya per panggilan, bukan per dokumen: satu upsert
+        ``SearchDocument``, satu query untuk id-nya, lalu ``_index_documents``.
+        """
+        tokens_by_id = {str(object_id): tokenize(text) for object_id, text in items}
+        if not tokens_by_id:
+            return []
+        with transaction.atomic():
+            SearchDocument.objects.bulk_create(
+                [
+                    SearchDocument(kind=kind, object_id=object_id, body=" ".join(tokens), length=len(tokens))
+                    for object_id, tokens in tokens_by_id.items()
+                ],
+                update_conflicts=True,
+                unique_fields=["kind", "object_id"],
+                update_fields=["body", "length", "updated_at"],
+            )
+            # pk hasil upsert tidak selalu terisi, jadi dibaca ulang
+            documents = list(
+                SearchDocument.objects.filter(kind=kind, object_id__in=tokens_by_id).order_by()
+            )
+            self._index_documents([(d, tokens_by_id[d.object_id]) for d in documents])
+        return documents
+
+    def remove(self, kind, object_id):
+        with transaction.atomic():
+            documents = list(
+                SearchDocument.objects.filter(kind=kind, object_id=str(object_id))
+            )
+            for document in documents:
+                self._remove_document(document)
+            SearchDocument.objects.filter(pk__in=[d.pk for d in documents]).delete()
+
+    def clear(self):
+        with transaction.atomic():
+            self._clear()
+            SearchDocument.objects.all().delete()
+
+    def search(self, kind, query, limit=None):
+        """Kembalikan ``object_id`` yang cocok, urut dari skor tertinggi.
+
+        Semua term harus ada di dokumen (AND); term terakhir dicocokkan sebagai
+        prefix. ``limit=None`` berarti semua hasil.
+        """
+        raise NotImplementedError
+
+    # hook untuk subclass
+    def _index_document(self, document, tokens):
+        pass
+
+    def _index_documents(self, pairs):
+        for document, tokens in pairs:
+            self._index_document(document, tokens)
+
+    def _remove_document(self, document):
+        pass
+
+    def _clear(self):
+        pass
+
+
+class PostingIndexBackend(BaseSearchBackend):
+    k1 = 1.2
+    b = 0.75
+
+    def _index_document(self, document, tokens):
+        SearchPosting.objects.filter(document=document).delete()
+        SearchPosting.objects.bulk_create(
+            SearchPosting(document=document, term=term, tf=tf)
+            for term, tf in Counter(tokens).items()
+        )
+
+    def _index_documents(self, pairs):
+        SearchPosting.objects.filter(document__in=[document for document, _ in pairs]).delete()
+        SearchPosting.objects.bulk_create(
+            (
+                SearchPosting(document=document, term=term, tf=tf)
+                for document, tokens in pairs
+                for term, tf in Counter(tokens).items()
+            ),
+            batch_size=1000,
+        )
+
+    def _clear(self):
+        SearchPosting.objects.all().delete()
+
+    def search(self, kind, query, limit=None):
+        terms, prefix = query_terms(query)
+        if prefix is None:
+            return []
+
+        postings = SearchPosting.objects.filter(document__kind=kind)
+        lookup = postings.filter(term__in=terms) | postings.filter(term__startswith=prefix)
+        rows = list(
+            lookup.values_list("term", "tf", "document__object_id", "document__length")
+        )
+        if not rows:
+            return []
+
+        stats = SearchDocument.objects.filter(kind=kind).aggregate(
+            total=Count("id"), avg_length=Avg("length")
+        )
+        total_docs = stats["total"] or 1
+        avg_length = stats["avg_length"] or 1
+
+        doc_freq = Counter(term for term, _, _, _ in rows)
+        scores = defaultdict(float)
+        matched = defaultdict(set)
+        for term, tf, object_id, length in rows:
+            df = doc_freq[term]
+            idf = math.log(1 + (total_docs - df + 0.5) / (df + 0.5))
+            norm = tf + self.k1 * (1 - self.b + self.b * length / avg_length)
+            scores[object_id] += idf * tf * (self.k1 + 1) / norm
+            matched[object_id].add(term)
+
+        # AND: setiap term lengkap harus ada, dan prefix cocok dengan salah satu term
+        required = set(terms)
+        ranked = sorted(
+            (
+                item for item in scores.items()
+                if required <= matched[item[0]]
+                and any(term.startswith(prefix) for term in matched[item[0]])
+            ),
+            key=lambda item: (-item[1], item[0]),
+        )
+        return [object_id for object_id, _ in ranked[:limit]]
+
+
+class SQLiteFTSBackend(BaseSearchBackend):
+    table = "fitur_pencarian_searchfts"
+
+    def _index_document(self, document, tokens):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE rowid = %s", [document.pk])
+            cursor.execute(
+                f"INSERT INTO {self.table} (rowid, body, kind, object_id) "
+                "VALUES (%s, %s, %s, %s)",
+                [document.pk, document.body, document.kind, document.object_id],
+            )
+
+    def _index_documents(self, pairs):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {self.table} WHERE rowid = %s",
+                [[document.pk] for document, _ in pairs],
+            )
+            cursor.executemany(
+                f"INSERT INTO {self.table} (rowid, body, kind, object_id) "
+                "VALUES (%s, %s, %s, %s)",
+                [[d.pk, d.body, d.kind, d.object_id] for d, _ in pairs],
+            )
+
+    def _remove_document(self, document):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE rowid = %s", [document.pk])
+
+    def _clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+
+    def search(self, kind, query, limit=None):
+        terms, prefix = query_terms(query)
+        if prefix is None:
+            return []
+        # token sudah [a-z0-9]+, aman dibungkus tanda kutip FTS5
+        match = " AND ".join([f'"{t}"' for t in terms] + [f'"{prefix}"*'])
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT object_id FROM {self.table} "
+                f"WHERE {self.table} MATCH %s AND kind = %s "
+                f"ORDER BY bm25({self.table}) LIMIT %s",
+                [match, kind, -1 if limit is None else limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    # hasil cek per database; get_backend() dipanggil di setiap request
+    _available = {}
+
+    @classmethod
+    def is_available(cls):
+        key = (connection.alias, connection.settings_dict["NAME"])
+        if key not in cls._available:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+                    [cls.table],
+                )
+                cls._available[key] = cursor.fetchone() is not None
+        return cls._available[key]
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    # kolom tsv adalah generated column, jadi index() cukup menulis body
+
+    def search(self, kind, query, limit=None):
+        terms, prefix = query_terms(query)
+        if prefix is None:
+            return []
+        tsquery = " & ".join(terms + [f"{prefix}:*"])
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT object_id FROM fitur_pencarian_searchdocument "
+                "WHERE kind = %s AND tsv @@ to_tsquery('simple', %s) "
+                "ORDER BY ts_rank_cd(tsv, to_tsquery('simple', %s)) DESC, object_id "
+                "LIMIT %s",  # LIMIT NULL = tanpa batas
+                [kind, tsquery, tsquery, limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
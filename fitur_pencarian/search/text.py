@@ -0,0 +1,52 @@
+"""Normalisasi dan tokenisasi teks Indonesia/Inggris untuk indeks pencarian."""
+
+import re
+import unicodedata
+
+MAX_TERM_LENGTH = 64
+
+STOPWORDS = frozenset(
+    """
+    ada adalah agar akan atau bagi bahwa belum bisa dalam dan dari dengan di
+    dia hingga ia ini itu juga kami kata ke kita lebih mereka namun oleh pada
+    para saat saja sang sangat saya sebagai sedang sejak setelah sudah tak
+    telah tersebut tetapi tidak untuk yaitu yakni yang
+    a an and are as at be by for from has have in is it its of on or that the
+    this to was were will with
+    """.split()
+)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+# posesif bahasa Indonesia: "bolanya" -> "bola". "-lah"/"-kah" sengaja tidak
+# dipotong karena merusak kata dasar seperti "sekolah" dan "langkah".
+_SUFFIXES = ("nya",)
+
+
+def normalize(text):
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return text.lower()
+
+
+def _stem(token):
+    for suffix in _SUFFIXES:
+        if len(token) > len(suffix) + 2 and token.endswith(suffix):
+            return token[: -len(suffix)]
+    return token
+
+
+def tokenize(text):
+    tokens = []
+    for token in _TOKEN_RE.findall(normalize(text)):
+        if token in STOPWORDS:
+            continue
+        tokens.append(_stem(token)[:MAX_TERM_LENGTH])
+    return tokens
+
+
+def query_terms(query):
+    """Token dari query; token terakhir dipakai sebagai prefix (search-as-you-type)."""
+    terms = list(dict.fromkeys(tokenize(query)))
+    if not terms:
+        return [], None
+    return terms[:-1], terms[-1]
@@ -0,0 +1,253 @@
+"""Penulisan ``SearchLog`` secara asinkron dan batch.
+
+``ajax_search_results`` hanya memasukkan entri ke antrean in-process
+(berukuran tetap); thread latar belakang mengumpulkan entri lalu menulisnya
+dengan satu ``bulk_create`` per batch. Ketikan beruntun dari sesi yang sama
+("sep", "sepa", "sepatu") digabung menjadi satu baris berisi query terakhir:
+entri yang masih bisa disambung ditahan di memori sampai
+``SEARCH_LOG_COALESCE_WINDOW`` lewat tanpa ketikan baru, baru kemudian ditulis.
+Sisa antrean di-flush saat proses berhenti (``atexit``).
+
+Pengaturan:
+
+* ``SEARCH_LOG_MODE``           - "async" (default; "sync" saat test) atau "sync"
+  (langsung ``create``)
+* ``SEARCH_LOG_SAMPLE_RATE``    - 0.0-1.0, porsi pencarian yang dicatat
+* ``SEARCH_LOG_QUEUE_SIZE``     - kapasitas antrean; entri dibuang jika penuh
+* ``SEARCH_LOG_BATCH_SIZE``     - jumlah baris maksimum per ``bulk_create``
+* ``SEARCH_LOG_FLUSH_INTERVAL`` - detik maksimum entri menunggu di batch
+* ``SEARCH_LOG_COALESCE_WINDOW`` - jeda (detik) antar ketikan yang masih digabung
+"""
+
+import atexit
+import logging
+import queue
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+from .models import SearchLog
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+@dataclass
+class PendingLog:
+    keyword: str
+    scope: str
+    result_count: int
+    user_id: object = None
+    session_key: str = ""
+    preference_id: object = None
+    logged_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def identity(self):
+        if not self.user_id and not self.session_key:
+            return None
+        return (self.user_id, self.session_key, self.scope, self.preference_id)
+
+    def continues(self, other, window):
+        """True jika ``other`` adalah ketikan lanjutan (atau hapus) dari entri ini."""
+        if other.logged_at - self.logged_at > window:
+            return False
+        return other.keyword.startswith(self.keyword) or self.keyword.startswith(other.keyword)
+
+    def to_model(self):
+        return SearchLog(
+            keyword=self.keyword,
+            scope=self.scope,
+            result_count=self.result_count,
+            user_id=self.user_id,
+            session_key=self.session_key or "",
+            preference_id=self.preference_id,
+        )
+
+
+class SearchLogWriter:
+    def __init__(
+        self,
+        queue_size=10000,
+        batch_size=200,
+        flush_interval=2.0,
+        coalesce_window=10.0,
+        sample_rate=1.0,
+    ):
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.coalesce_window = coalesce_window
+        self.sample_rate = sample_rate
+        self.dropped = 0
+        self._batch = []
+        self._latest = {}
+        self._thread = None
+        self._lock = threading.Lock()
+
+    # sisi request -----------------------------------------------------------
+
+    def submit(self, entry):
+        """Masukkan entri ke antrean tanpa pernah memblokir request."""
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return False
+        try:
+            self.queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        return True
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="search-log-writer", daemon=True
+                )
+                self._thread.start()
+
+    def close(self, timeout=5.0):
+        """Hentikan thread dan tulis semua entri yang tersisa."""
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            self.drain()
+            return
+        try:
+            self.queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        thread.join(timeout)
+
+    # sisi worker ------------------------------------------------------------
+
+    def _add(self, entry):
+        identity = entry.identity
+        previous = self._latest.get(identity) if identity else None
+        if previous is not None and previous.continues(entry, self.coalesce_window):
+            previous.keyword = entry.keyword
+            previous.result_count = entry.result_count
+            previous.logged_at = entry.logged_at
+            return
+        self._batch.append(entry)
+        if identity:
+            self._latest[identity] = entry
+
+    def drain(self, force=True):
+        """Ambil semua entri di antrean lalu tulis. Mengembalikan jumlah baris.
+
+        ``force=False`` menahan entri yang jendela penggabungannya belum lewat.
+        """
+        while True:
+            try:
+                entry = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is not _STOP:
+                self._add(entry)
+        return self.flush(force=force)
+
+    def _take_ready(self, force):
+        """Keluarkan entri yang siap ditulis dari ``_batch`` (dan ``_latest``)."""
+        if force:
+            batch, self._batch, self._latest = self._batch, [], {}
+            return batch
+        now = time.monotonic()
+        ready, waiting = [], []
+        for entry in self._batch:
+            identity = entry.identity
+            if identity is None or now - entry.logged_at > self.coalesce_window:
+                ready.append(entry)
+                if identity is not None and self._latest.get(identity) is entry:
+                    del self._latest[identity]
+            else:
+                waiting.append(entry)
+        self._batch = waiting
+        return ready
+
+    def flush(self, force=False):
+        batch = self._take_ready(force)
+        if not batch:
+            return 0
+        written = 0
+        for start in range(0, len(batch), self.batch_size):
+            chunk = batch[start : start + self.batch_size]
+            try:
+                SearchLog.objects.bulk_create([entry.to_model() for entry in chunk])
+                written += len(chunk)
+            except Exception:  # noqa: BLE001 - log hilang lebih baik daripada thread mati
+                logger.exception("Gagal menulis %s SearchLog", len(chunk))
+        return written
+
+    def _run(self):
+        deadline = None
+        try:
+            while True:
+                timeout = None if deadline is None else max(0, deadline - time.monotonic())
+                try:
+                    entry = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    entry = None
+
+                if entry is _STOP:
+                    self.drain()
+                    return
+                if entry is not None:
+                    self._add(entry)
+                    if deadline is None:
+                        deadline = time.monotonic() + self.flush_interval
+
+                if len(self._batch) >= self.batch_size or (
+                    deadline is not None and time.monotonic() >= deadline
+                ):
+                    close_old_connections()
+                    # batch yang terlalu besar ditulis walau jendelanya belum lewat
+                    self.flush(force=len(self._batch) >= self.queue.maxsize)
+                    deadline = time.monotonic() + self.flush_interval if self._batch else None
+        finally:
+            connection.close()
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is not None:
+            _writer.start()  # hidupkan lagi jika thread-nya mati
+        else:
+            _writer = SearchLogWriter(
+                queue_size=getattr(settings, "SEARCH_LOG_QUEUE_SIZE", 10000),
+                batch_size=getattr(settings, "SEARCH_LOG_BATCH_SIZE", 200),
+                flush_interval=getattr(settings, "SEARCH_LOG_FLUSH_INTERVAL", 2.0),
+                coalesce_window=getattr(settings, "SEARCH_LOG_COALESCE_WINDOW", 10.0),
+                sample_rate=getattr(settings, "SEARCH_LOG_SAMPLE_RATE", 1.0),
+            )
+            _writer.start()
+            atexit.register(_writer.close)
+    return _writer
+
+
+def log_search(request, keyword, scope, result_count, preference=None):
+    # sesi anonim baru belum punya key; tanpa key entri tidak bisa digabung
+    # (identity None) dan tercatat dengan session_key kosong
+    if not request.session.session_key:
+        request.session.create()
+    entry = PendingLog(
+        keyword=keyword,
+        scope=scope,
+        result_count=result_count,
+        user_id=request.user.pk if request.user.is_authenticated else None,
+        session_key=request.session.session_key or "",
+        preference_id=preference.pk if preference else None,
+    )
+    if getattr(settings, "SEARCH_LOG_MODE", "async") == "sync":
+        entry.to_model().save()
+        return
+    get_writer().submit(entry)
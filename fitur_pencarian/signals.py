@@ -0,0 +1,66 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from fitur_pencarian import filter_options, search
+from portal_berita.models import Berita, KategoriBerita
+from portal_berita.news_import import news_loaded
+from shop.models import Brand, Category, Product
+from shop.product_import import products_imported
+
+
+@receiver(post_save, sender=Berita)
+@receiver(post_save, sender=Product)
+def reindex_document(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    search.index_instance(instance)
+
+
+@receiver(post_delete, sender=Berita)
+@receiver(post_delete, sender=Product)
+def remove_document(sender, instance, **kwargs):
+    search.remove_instance(instance)
+
+
+@receiver(news_loaded)
+def index_loaded_news(sender, berita, **kwargs):
+    # load_detik_news memakai bulk_create, jadi post_save tidak terkirim;
+    # diindeks per batch juga, bukan per baris
+    search.index_instances(berita)
+
+
+@receiver(products_imported)
+def index_imported_products(sender, products, brands, **kwargs):
+    search.index_instances(products)
+    if brands:
+        filter_options.invalidate()
+
+
+# nama kategori/brand ikut diindeks, jadi dokumen terkait perlu diperbarui
+
+
+@receiver(post_save, sender=KategoriBerita)
+def reindex_news_category(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    search.index_instances(
+        instance.berita.filter(is_published=True).select_related("kategori").iterator(chunk_size=500)
+    )
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Brand)
+def reindex_product_group(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    products = instance.products.filter(status="active").select_related("category", "brand")
+    search.index_instances(products.iterator(chunk_size=500))
+
+
+@receiver(post_save, sender=KategoriBerita)
+@receiver(post_delete, sender=KategoriBerita)
+@receiver(post_save, sender=Brand)
+@receiver(post_delete, sender=Brand)
+def filter_options_changed(sender, instance, **kwargs):
+    # perubahan Category ikut terdeteksi lewat versi pohon kategori
+    filter_options.invalidate()
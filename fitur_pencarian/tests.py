@@ -1,8 +1,29 @@
+import datetime
+import importlib
+import time
+from unittest import mock
+from types import SimpleNamespace
+from io import StringIO
+
+from django.apps import apps
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.test import TestCase, TransactionTestCase, override_settings
 from django.urls import reverse
 
-from .models import SearchPreference
+from portal_berita.models import Berita, KategoriBerita
+from shop.models import Brand, Category, Product
+
+from . import search
+from .models import SearchDailyStat, SearchDocument, SearchLog, SearchPreference
+from .search.backends import PostingIndexBackend, SQLiteFTSBackend
+from .forms import SearchForm
+from .search.text import query_terms, tokenize
+from . import search_log
+from .search_log import PendingLog, SearchLogWriter
 
 
 class SearchPreferenceAjaxTests(TestCase):
@@ -43,3 +64,432 @@ class SearchPreferenceAjaxTests(TestCase):
         preference.refresh_from_db()
         self.assertEqual(preference.label, "Diskon Sepak Bola")
         self.assertEqual(preference.default_scope, SearchPreference.SearchScope.NEWS)
+
+
+class SearchTextTests(TestCase):
+    def test_tokenize_normalizes_and_drops_stopwords(self):
+        self.assertEqual(
+            tokenize("Gol Ronaldo dan Pelé di Piala Dunia!"),
+            ["gol", "ronaldo", "pele", "piala", "dunia"],
+        )
+
+    def test_possessive_suffix_is_stripped(self):
+        self.assertEqual(tokenize("Sepatunya"), ["sepatu"])
+        self.assertEqual(tokenize("sekolah"), ["sekolah"])
+
+    def test_last_term_becomes_prefix(self):
+        self.assertEqual(query_terms("sepatu lar"), (["sepatu"], "lar"))
+        self.assertEqual(query_terms("yang dan"), ([], None))
+
+
+class SearchIndexMixin:
+    backend_name = None
+
+    def setUp(self):
+        self.settings_override = override_settings(
+            SEARCH_BACKEND=self.backend_name, SEARCH_LOG_MODE="sync"
+        )
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        # migrasi 0008 sudah mengindeks produk seed; mulai dari indeks kosong
+        search.get_backend().clear()
+
+        self.kategori = KategoriBerita.objects.create(nama="Sepak Bola")
+        self.match_report = Berita.objects.create(
+            judul="Timnas menang di Piala Asia",
+            konten="Gol tunggal dicetak pada menit akhir.",
+            kategori=self.kategori,
+            is_published=True,
+        )
+        self.transfer = Berita.objects.create(
+            judul="Kabar transfer musim panas",
+            konten="Klub mengincar pemain dari Piala Asia.",
+            is_published=True,
+        )
+        self.draft = Berita.objects.create(
+            judul="Draft piala", konten="Belum terbit", is_published=False
+        )
+        category = Category.objects.create(name="Running Gear")
+        brand = Brand.objects.create(name="Larico")
+        self.shoe = Product.objects.create(
+            name="Sepatu Lari Ultra", category=category, brand=brand, price=100, stock=5
+        )
+
+    def test_ranks_title_match_first(self):
+        self.assertEqual(
+            search.search_ids(search.NEWS, "piala asia"),
+            [str(self.match_report.pk), str(self.transfer.pk)],
+        )
+
+    def test_prefix_matches_last_term(self):
+        self.assertEqual(search.search_ids(search.NEWS, "timn"), [str(self.match_report.pk)])
+        self.assertEqual(search.search_ids(search.PRODUCT, "sepatu la"), [str(self.shoe.pk)])
+
+    def test_category_and_brand_names_are_searchable(self):
+        self.assertEqual(search.search_ids(search.NEWS, "sepak bola"), [str(self.match_report.pk)])
+        self.assertEqual(search.search_ids(search.PRODUCT, "larico"), [str(self.shoe.pk)])
+
+        self.shoe.brand.name = "Kencang"
+        self.shoe.brand.save()
+        self.assertEqual(search.search_ids(search.PRODUCT, "larico"), [])
+        self.assertEqual(search.search_ids(search.PRODUCT, "kencang"), [str(self.shoe.pk)])
+
+    def test_unpublished_and_deleted_items_are_not_indexed(self):
+        self.assertNotIn(str(self.draft.pk), search.search_ids(search.NEWS, "draft"))
+
+        self.transfer.delete()
+        self.assertEqual(search.search_ids(search.NEWS, "transfer"), [])
+
+        self.shoe.status = "archived"
+        self.shoe.save()
+        self.assertEqual(search.search_ids(search.PRODUCT, "sepatu"), [])
+
+    def test_rebuild_command(self):
+        SearchDocument.objects.all().delete()
+        call_command("rebuild_search_index", stdout=StringIO())
+        self.assertEqual(search.search_ids(search.NEWS, "timnas"), [str(self.match_report.pk)])
+
+    @override_settings(SEARCH_MAX_CANDIDATES=1)
+    def test_view_reads_bounded_ranking(self):
+        response = self.client.get(
+            reverse("api_search:search_results"), {"query": "piala", "search_in": "news"}
+        )
+        self.assertEqual([item["title"] for item in response.json()["news"]], [self.match_report.judul])
+
+    def test_migration_backfills_existing_rows(self):
+        search.get_backend().clear()
+        migration = importlib.import_module("fitur_pencarian.migrations.0008_backfill_search_index")
+        migration.backfill(apps, SimpleNamespace(connection=connection))
+        self.assertEqual(search.search_ids(search.NEWS, "timnas"), [str(self.match_report.pk)])
+        self.assertIn(str(self.shoe.pk), search.search_ids(search.PRODUCT, "larico"))
+        self.assertNotIn(str(self.draft.pk), search.search_ids(search.NEWS, "draft"))
+
+    def test_ajax_results_use_index(self):
+        response = self.client.get(
+            reverse("api_search:search_results"), {"query": "piala", "search_in": "all"}
+        )
+        self.assertEqual(response.status_code, 200)
+        titles = [item["title"] for item in response.json()["news"]]
+        self.assertEqual(titles, [self.match_report.judul, self.transfer.judul])
+        self.assertEqual(SearchLog.objects.get().keyword, "piala")
+
+    def test_bulk_index_queries_do_not_grow_with_batch(self):
+        def load(prefix, count):
+            rows = Berita.objects.bulk_create(
+                Berita(judul=f"{prefix} {i}", konten="Liga sepak bola", kategori=self.kategori, is_published=True)
+                for i in range(count)
+            )
+            with CaptureQueriesContext(connection) as ctx:
+                search.index_instances(rows)
+            return rows, len(ctx)
+
+        small, small_queries = load("Kecil", 5)
+        large, large_queries = load("Besar", 120)
+        # per-baris akan menjadi ratusan query; di sini hanya INSERT posting
+        # yang bisa terbagi beberapa batch
+        self.assertLessEqual(large_queries, small_queries + 2)
+        self.assertEqual(len(search.search_ids(search.NEWS, "besar")), 120)
+
+        # upsert: dokumen yang sudah ada ditimpa, bukan diduplikasi
+        large[0].judul = "Juara baru"
+        search.index_instances(large[:1])
+        self.assertEqual(search.search_ids(search.NEWS, "juara"), [str(large[0].pk)])
+        self.assertEqual(len(search.search_ids(search.NEWS, "besar")), 119)
+
+    def test_all_terms_must_match(self):
+        # "kabar" hanya ada di berita transfer, "piala" ada di keduanya
+        self.assertEqual(search.search_ids(search.NEWS, "kabar piala"), [str(self.transfer.pk)])
+        self.assertEqual(search.search_ids(search.NEWS, "timnas transfer"), [])
+
+    def test_filters_apply_before_ranking_is_cut(self):
+        for i in range(210):
+            Berita.objects.create(judul=f"Piala {i}", konten="Piala piala", is_published=True)
+        # berita di kategori yang difilter berperingkat paling bawah (dokumen panjang)
+        other = KategoriBerita.objects.create(nama="Bulu Tangkis")
+        low = Berita.objects.create(
+            judul="Laporan", konten="piala " + "kata " * 300, kategori=other, is_published=True
+        )
+        self.assertGreater(search.search_ids(search.NEWS, "piala").index(str(low.pk)), 200)
+
+        response = self.client.get(
+            reverse("api_search:search_results"),
+            {"query": "piala", "search_in": "news", "news_category": str(other.pk)},
+        )
+        self.assertEqual([item["title"] for item in response.json()["news"]], ["Laporan"])
+
+
+class PostingIndexBackendTests(SearchIndexMixin, TestCase):
+    backend_name = "postings"
+
+    def test_backend_selected(self):
+        self.assertIsInstance(search.get_backend(), PostingIndexBackend)
+
+    @override_settings(SEARCH_BACKEND="auto")
+    def test_fts_availability_is_memoized(self):
+        search.get_backend()
+        with self.assertNumQueries(0):
+            search.get_backend()
+
+
+class SQLiteFTSBackendTests(SearchIndexMixin, TestCase):
+    backend_name = "sqlite_fts"
+
+    def setUp(self):
+        if not SQLiteFTSBackend.is_available():
+            self.skipTest("FTS5 tidak tersedia")
+        super().setUp()
+
+
+class SearchLogWriterTests(TestCase):
+    def entry(self, keyword, session_key="abc", **kwargs):
+        kwargs.setdefault("scope", SearchPreference.SearchScope.ALL)
+        kwargs.setdefault("result_count", 1)
+        return PendingLog(keyword=keyword, session_key=session_key, **kwargs)
+
+    def test_keystrokes_from_one_session_are_coalesced(self):
+        writer = SearchLogWriter()
+        for keyword in ["se", "sep", "sepatu", "sepat", "sepatu lari"]:
+            writer.submit(self.entry(keyword))
+        writer.submit(self.entry("bola"))
+        writer.submit(self.entry("sepatu", session_key="other"))
+
+        with self.assertNumQueries(1):
+            self.assertEqual(writer.drain(), 3)
+        self.assertEqual(
+            sorted(SearchLog.objects.values_list("keyword", "session_key")),
+            [("bola", "abc"), ("sepatu", "other"), ("sepatu lari", "abc")],
+        )
+
+    def test_anonymous_entries_without_session_are_not_coalesced(self):
+        writer = SearchLogWriter()
+        writer.submit(self.entry("sep", session_key=""))
+        writer.submit(self.entry("sepatu", session_key=""))
+        self.assertEqual(writer.drain(), 2)
+
+    def test_coalescing_spans_flushes_until_window_expires(self):
+        writer = SearchLogWriter(coalesce_window=10)
+        writer.submit(self.entry("sep"))
+        self.assertEqual(writer.drain(force=False), 0)  # masih dalam jendela
+        writer.submit(self.entry("sepatu"))
+        writer.submit(self.entry("bola", session_key="old", logged_at=time.monotonic() - 20))
+        self.assertEqual(writer.drain(force=False), 1)
+        self.assertEqual(writer.drain(), 1)
+        self.assertEqual(
+            sorted(SearchLog.objects.values_list("keyword", flat=True)), ["bola", "sepatu"]
+        )
+
+    def test_first_anonymous_search_gets_a_session_key(self):
+        url = reverse("api_search:search_results")
+        writer = SearchLogWriter()
+        with override_settings(SEARCH_LOG_MODE="async"), \
+                mock.patch.object(search_log, "get_writer", return_value=writer):
+            for keyword in ["sep", "sepatu"]:
+                self.client.get(url, {"query": keyword, "search_in": "all"})
+        self.assertEqual(writer.drain(), 1)
+        log = SearchLog.objects.get()
+        self.assertEqual(log.keyword, "sepatu")
+        self.assertEqual(log.session_key, self.client.session.session_key)
+        self.assertTrue(log.session_key)
+
+    def test_get_writer_restarts_dead_thread(self):
+        writer = search_log.get_writer()
+        self.addCleanup(writer.close)
+        writer.close()
+        self.assertFalse(writer._thread.is_alive())
+        self.assertIs(search_log.get_writer(), writer)
+        self.assertTrue(writer._thread.is_alive())
+
+    def test_coalesce_window(self):
+        writer = SearchLogWriter(coalesce_window=5)
+        writer.submit(self.entry("sep", logged_at=0))
+        writer.submit(self.entry("sepatu", logged_at=10))
+        self.assertEqual(writer.drain(), 2)
+
+    def test_bounded_queue_drops_overflow(self):
+        writer = SearchLogWriter(queue_size=2)
+        for keyword in ["a", "b", "c"]:
+            writer.submit(self.entry(keyword, session_key=""))
+        self.assertEqual(writer.dropped, 1)
+        self.assertEqual(writer.drain(), 2)
+
+    def test_sampling(self):
+        writer = SearchLogWriter(sample_rate=0)
+        self.assertFalse(writer.submit(self.entry("bola")))
+        self.assertEqual(writer.drain(), 0)
+
+
+class SearchLogWriterThreadTests(TransactionTestCase):
+    def test_close_flushes_pending_entries(self):
+        writer = SearchLogWriter(flush_interval=60)
+        writer.start()
+        writer.submit(PendingLog(keyword="bola", scope="all", result_count=3))
+        writer.close()
+
+        self.assertFalse(writer._thread.is_alive())
+        self.assertEqual(list(SearchLog.objects.values_list("keyword", flat=True)), ["bola"])
+
+
+class SearchAnalyticsRollupTests(TestCase):
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.staff = get_user_model().objects.create_user(
+            username="staff", password="secret123", is_staff=True
+        )
+
+    def log(self, keyword, days_ago=0, result_count=4, scope="all"):
+        entry = SearchLog.objects.create(keyword=keyword, scope=scope, result_count=result_count)
+        created = timezone.now() - datetime.timedelta(days=days_ago)
+        SearchLog.objects.filter(pk=entry.pk).update(created_at=created)
+
+    def test_rollup_groups_per_day_and_is_idempotent(self):
+        self.log("sepatu", days_ago=1, result_count=2)
+        self.log("sepatu", days_ago=1, result_count=6)
+        self.log("bola", days_ago=1, scope="news")
+        self.log("sepatu")
+
+        call_command("rollup_search_stats", stdout=StringIO())
+        call_command("rollup_search_stats", stdout=StringIO())
+
+        yesterday = SearchDailyStat.objects.get(
+            date=self.today - datetime.timedelta(days=1), keyword="sepatu"
+        )
+        self.assertEqual(yesterday.search_count, 2)
+        self.assertEqual(yesterday.avg_result_count, 4)
+        self.assertEqual(SearchDailyStat.objects.count(), 3)
+
+    def test_incremental_rollup_starts_at_last_rolled_day(self):
+        self.log("lama", days_ago=5)
+        call_command("rollup_search_stats", stdout=StringIO())
+        # log sebelum hari terakhir yang direkap tidak dipindai ulang
+        self.log("terlambat", days_ago=10)
+        self.log("baru")
+        call_command("rollup_search_stats", stdout=StringIO())
+
+        self.assertEqual(
+            sorted(SearchDailyStat.objects.values_list("keyword", flat=True)), ["baru", "lama"]
+        )
+
+    def test_prune_keeps_recent_and_unrolled_logs(self):
+        self.log("lama", days_ago=100)
+        self.log("baru", days_ago=1)
+        call_command("rollup_search_stats", "--retention-days=30", stdout=StringIO())
+
+        self.assertEqual(list(SearchLog.objects.values_list("keyword", flat=True)), ["baru"])
+        self.assertTrue(SearchDailyStat.objects.filter(keyword="lama").exists())
+
+        # rebuild di atas hari yang log mentahnya sudah dihapus tidak menghapus rekap
+        since = (self.today - datetime.timedelta(days=120)).isoformat()
+        out = StringIO()
+        call_command("rollup_search_stats", f"--since={since}", "--retention-days=30", stdout=out)
+        self.assertIn("may already be pruned", out.getvalue())
+        self.assertTrue(SearchDailyStat.objects.filter(keyword="lama").exists())
+
+    def test_analytics_endpoint_reads_rollups_in_range(self):
+        self.log("sepatu", days_ago=1)
+        self.log("sepatu", days_ago=1)
+        self.log("bola", days_ago=40, scope="news")
+        call_command("rollup_search_stats", "--retention-days=0", stdout=StringIO())
+        self.client.force_login(self.staff)
+        url = reverse("api_search:analytics")
+
+        with self.assertNumQueries(5):  # sesi, user, rekap terakhir, rekap, log mentah
+            data = self.client.get(url).json()
+        self.assertEqual(data["top_queries"], [{"keyword": "sepatu", "total": 2, "avg_result_count": 4.0}])
+
+        start = (self.today - datetime.timedelta(days=60)).isoformat()
+        data = self.client.get(url, {"start": start}).json()
+        self.assertEqual([row["keyword"] for row in data["top_queries"]], ["sepatu", "bola"])
+        self.assertEqual(data["range"]["start"], start)
+
+        self.assertEqual(self.client.get(url, {"start": "kemarin"}).status_code, 400)
+
+        # hanya end: start dihitung mundur 29 hari dari end
+        end = self.today - datetime.timedelta(days=35)
+        data = self.client.get(url, {"end": end.isoformat()}).json()
+        self.assertEqual(data["range"]["start"], (end - datetime.timedelta(days=29)).isoformat())
+        self.assertEqual([row["keyword"] for row in data["top_queries"]], ["bola"])
+
+
+    def test_analytics_includes_searches_not_yet_rolled_up(self):
+        self.log("sepatu", days_ago=2)
+        call_command("rollup_search_stats", "--retention-days=0", stdout=StringIO())
+        # setelah rollup: hari ini belum direkap sama sekali
+        self.log("sepatu")
+        self.log("bola", scope="news")
+        self.client.force_login(self.staff)
+
+        data = self.client.get(reverse("api_search:analytics")).json()
+        self.assertEqual(
+            data["top_queries"],
+            [
+                {"keyword": "sepatu", "total": 2, "avg_result_count": 4.0},
+                {"keyword": "bola", "total": 1, "avg_result_count": 4.0},
+            ],
+        )
+        self.assertEqual(
+            data["scope_breakdown"], [{"scope": "all", "total": 2}, {"scope": "news", "total": 1}]
+        )
+
+    def test_partially_rolled_day_is_not_counted_twice(self):
+        self.log("sepatu")
+        call_command("rollup_search_stats", "--retention-days=0", stdout=StringIO())
+        self.log("sepatu")
+        self.client.force_login(self.staff)
+
+        data = self.client.get(reverse("api_search:analytics")).json()
+        self.assertEqual(data["top_queries"][0]["total"], 2)
+
+    def test_prune_keeps_days_skipped_by_rollup(self):
+        self.log("celah", days_ago=100)
+        self.log("lama", days_ago=60)
+        self.log("baru", days_ago=1)
+        since = (self.today - datetime.timedelta(days=60)).isoformat()
+        out = StringIO()
+        call_command("rollup_search_stats", f"--since={since}", "--retention-days=30", stdout=out)
+
+        self.assertEqual(
+            sorted(SearchLog.objects.values_list("keyword", flat=True)), ["baru", "celah"]
+        )
+        gap = (self.today - datetime.timedelta(days=100)).isoformat()
+        self.assertIn(f"--since={gap}", out.getvalue())
+
+        call_command("rollup_search_stats", f"--since={gap}", "--retention-days=30", stdout=StringIO())
+        self.assertTrue(SearchDailyStat.objects.filter(keyword="celah").exists())
+        self.assertEqual(list(SearchLog.objects.values_list("keyword", flat=True)), ["baru"])
+
+
+class FilterOptionsTests(TestCase):
+    def setUp(self):
+        self.parent = Category.objects.create(name="Sepak Bola")
+        self.child = Category.objects.create(name="Sepatu", parent=self.parent)
+        self.url = reverse("api_search:filter_options")
+
+    def test_endpoint_is_cached_and_uses_full_paths(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(3):  # hanya aggregate validator; body dari cache
+            data = self.client.get(self.url).json()
+        names = {item["id"]: item["name"] for item in data["product_categories"]}
+        self.assertEqual(names[str(self.child.pk)], "Sepak Bola / Sepatu")
+
+    def test_invalidated_by_category_brand_and_news_category_changes(self):
+        self.client.get(self.url)
+        self.parent.name = "Football"
+        self.parent.save()
+        Brand.objects.create(name="Zeta")
+        KategoriBerita.objects.create(nama="Basket")
+
+        data = self.client.get(self.url).json()
+        self.assertIn("Football / Sepatu", [item["name"] for item in data["product_categories"]])
+        self.assertIn("Zeta", [item["name"] for item in data["brands"]])
+        self.assertIn("Basket", [item["name"] for item in data["news_categories"]])
+
+    def test_search_form_renders_from_cache(self):
+        SearchForm().as_p()
+        with self.assertNumQueries(0):
+            html = SearchForm().as_p()
+        self.assertIn("Sepak Bola / Sepatu", html)
+        self.assertIn("All Products", html)
+
+        form = SearchForm({"search_in": "all", "product_category": str(self.child.pk)})
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.cleaned_data["product_category"], self.child)
@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+from datetime import date, timedelta
+
+from django.conf import settings
 from django.contrib.auth.decorators import login_required, user_passes_test
-from django.db.models import Count, Q
+from django.db.models import Q
 from django.db import IntegrityError
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, render
@@ -10,11 +13,15 @@ from django.utils import timezone
 from django.views.decorators.http import require_GET, require_POST
 from django.urls import reverse
 
-from portal_berita.models import Berita, KategoriBerita
-from shop.models import Product, Category, Brand
+from portal_berita.models import Berita
+from shop.models import Product
+from sport_watch.conditional import conditional
 
+from . import analytics, search
+from . import filter_options
 from .forms import SearchForm, SearchPreferenceForm
-from .models import SearchPreference, SearchLog
+from .models import SearchPreference
+from .search_log import log_search
 
 
 def _get_available_preferences(user):
@@ -125,6 +132,29 @@ def _serialize_product_item(product, is_staff=False):
     }
 
 
+def _candidate_limit():
+    # batas atas peringkat yang dibaca per request; filter tetap diterapkan
+    # sebelum halaman dipotong, hanya ekor peringkat yang sangat panjang dibuang
+    return getattr(settings, "SEARCH_MAX_CANDIDATES", 5000)
+
+
+def _ranked_page(queryset, ranked_ids, size, chunk_size=500):
+    """``size`` objek pertama dari ``queryset`` menurut urutan ``ranked_ids``.
+
+    Filter (kategori, brand, harga, ...) sudah ada di ``queryset``; peringkat
+    dibaca per chunk sampai halaman penuh, jadi tidak ada hasil yang terpotong
+    sebelum filter dijalankan.
+    """
+    page = []
+    for start in range(0, len(ranked_ids), chunk_size):
+        ids = ranked_ids[start:start + chunk_size]
+        found = {str(obj.pk): obj for obj in queryset.filter(pk__in=ids)}
+        page.extend(found[object_id] for object_id in ids if object_id in found)
+        if len(page) >= size:
+            break
+    return page[:size]
+
+
 def _update_recent_searches(request, payload):
     recent_searches = request.session.get("recent_searches", [])
     recent_searches = [
@@ -166,26 +196,14 @@ def ajax_search_results(request):
     search_scope = cleaned_data.get("search_in") or SearchPreference.SearchScope.ALL
 
     news_results = Berita.objects.filter(is_published=True)
-    if query:
-        news_results = news_results.filter(
-            Q(judul__icontains=query)
-            | Q(konten__icontains=query)
-            | Q(kategori__nama__icontains=query)
-        )
     if cleaned_data.get("news_category"):
         news_results = news_results.filter(kategori=cleaned_data["news_category"])
 
     product_results = Product.objects.filter(status="active")
-    if query:
-        product_results = product_results.filter(
-            Q(name__icontains=query)
-            | Q(description__icontains=query)
-            | Q(category__name__icontains=query)
-            | Q(brand__name__icontains=query)
-        )
     if cleaned_data.get("product_category"):
+        # termasuk produk di subkategori (prefix materialized path)
         product_results = product_results.filter(
-            category=cleaned_data["product_category"]
+            cleaned_data["product_category"].subtree_q()
         )
     if cleaned_data.get("brand"):
         product_results = product_results.filter(brand=cleaned_data["brand"])
@@ -209,20 +227,31 @@ def ajax_search_results(request):
     elif search_scope == SearchPreference.SearchScope.PRODUCTS:
         news_results = Berita.objects.none()
 
-    news_data = [
-        _serialize_news_item(berita, request.user.is_staff)
-        for berita in news_results.select_related("kategori")[:8]
-    ]
+    news_results = news_results.select_related("kategori")
+    product_results = product_results.select_related("category", "brand")
+    if query:
+        # filter diterapkan ke seluruh hasil pencarian, baru dipotong per halaman
+        news_page = (
+            _ranked_page(news_results, search.search_ids(search.NEWS, query, limit=_candidate_limit()), 8)
+            if search_scope != SearchPreference.SearchScope.PRODUCTS
+            else []
+        )
+        product_page = (
+            _ranked_page(product_results, search.search_ids(search.PRODUCT, query, limit=_candidate_limit()), 8)
+            if search_scope != SearchPreference.SearchScope.NEWS
+            else []
+        )
+    else:
+        news_page = news_results[:8]
+        product_page = product_results[:8]
+
+    news_data = [_serialize_news_item(berita, request.user.is_staff) for berita in news_page]
     product_data = [
-        _serialize_product_item(product, request.user.is_staff)
-        for product in product_results.select_related("category", "brand")[:8]
+        _serialize_product_item(product, request.user.is_staff) for product in product_page
     ]
 
     total_results = len(news_data) + len(product_data)
 
-    if not request.session.session_key:
-        request.session.create()
-
     payload = {
         "query": query,
         "scope": search_scope,
@@ -232,14 +261,8 @@ def ajax_search_results(request):
     }
     _update_recent_searches(request, payload)
 
-    SearchLog.objects.create(
-        user=request.user if request.user.is_authenticated else None,
-        session_key=request.session.session_key,
-        keyword=query,
-        scope=search_scope,
-        preference=preference,
-        result_count=total_results,
-    )
+    # ditulis di background (key sesi baru dibuat oleh log_search)
+    log_search(request, query, search_scope, total_results, preference=preference)
 
     return JsonResponse(
         {
@@ -375,40 +398,31 @@ def ajax_search_analytics(request):
             },
             status=403,
         )
-    top_queries = list(
-        SearchLog.objects.values("keyword")
-        .annotate(total=Count("id"))
-        .order_by("-total")[:8]
-    )
-    scope_breakdown = list(
-        SearchLog.objects.values("scope").annotate(total=Count("id")).order_by("-total")
-    )
-    return JsonResponse(
-        {
-            "top_queries": top_queries,
-            "scope_breakdown": scope_breakdown,
-        }
-    )
+    # default: 30 hari sampai end (inklusif), format ?start=YYYY-MM-DD&end=YYYY-MM-DD
+    end = timezone.localdate()
+    try:
+        if request.GET.get("end"):
+            end = date.fromisoformat(request.GET["end"])
+        start = end - timedelta(days=29)
+        if request.GET.get("start"):
+            start = date.fromisoformat(request.GET["start"])
+    except ValueError:
+        return JsonResponse(
+            {"error": "Tanggal harus berformat YYYY-MM-DD.", "code": "invalid_date"},
+            status=400,
+        )
+    if start > end:
+        return JsonResponse(
+            {"error": "start tidak boleh setelah end.", "code": "invalid_range"},
+            status=400,
+        )
+
+    data = analytics.summary(start, end)
+    data["range"] = {"start": start.isoformat(), "end": end.isoformat()}
+    return JsonResponse(data)
 
 
 @require_GET
+@conditional(etag_func=filter_options.data_state)
 def ajax_filter_options(request):
-    news_categories = [
-        {"id": str(category.id), "name": category.nama}
-        for category in KategoriBerita.objects.order_by("nama")
-    ]
-    categories = [
-        {"id": str(category.id), "name": category.full_path}
-        for category in Category.objects.order_by("name")
-    ]
-    brands = [
-        {"id": str(brand.id), "name": brand.name}
-        for brand in Brand.objects.order_by("name")
-    ]
-    return JsonResponse(
-        {
-            "news_categories": news_categories,
-            "product_categories": categories,
-            "brands": brands,
-        }
-    )
+    return JsonResponse(filter_options.options_for_state(filter_options.data_state(request)))
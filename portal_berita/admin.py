@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Berita, KategoriBerita
+from .models import Berita, CrawlState, KategoriBerita
 
 admin.site.register(Berita)
-admin.site.register(KategoriBerita)
\ No newline at end of file
+admin.site.register(KategoriBerita)
+admin.site.register(CrawlState)
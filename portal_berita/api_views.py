@@ -1,8 +1,9 @@
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
+from django.db import transaction
 from django.shortcuts import get_object_or_404
-from .models import Berita, NewsReaction
+from .models import REACTION_CHOICES, Berita, NewsReaction
 from .serializers import BeritaSerializer, CommentSerializer
 
 class BeritaListCreate(generics.ListCreateAPIView):
@@ -27,11 +28,21 @@ def react_to_news(request, id):
     
     if not reaction_type:
         return Response({'error': 'Reaction type is required'}, status=status.HTTP_400_BAD_REQUEST)
+    if reaction_type not in {key for key, _ in REACTION_CHOICES}:
+        return Response({'error': 'Invalid reaction choice.'}, status=status.HTTP_400_BAD_REQUEST)
         
-    reaction, created = NewsReaction.objects.update_or_create(
-        berita=berita,
-        user=request.user,
-        defaults={'reaction_type': reaction_type}
-    )
+    with transaction.atomic():
+        existing = (
+            NewsReaction.objects.select_for_update()
+            .filter(berita=berita, user=request.user)
+            .values_list('reaction_type', flat=True)
+            .first()
+        )
+        reaction, created = NewsReaction.objects.update_or_create(
+            berita=berita,
+            user=request.user,
+            defaults={'reaction_type': reaction_type}
+        )
+        berita.apply_reaction_change(existing, reaction_type)
     
     return Response({'status': 'success', 'created': created})
@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+from sport_watch.caching import is_shared
+
+
+@register()
+def view_counter_cache_check(app_configs, **kwargs):
+    alias = getattr(settings, "NEWS_VIEW_CACHE_ALIAS", "default")
+    if getattr(settings, "NEWS_VIEW_COUNT_MODE", "auto") == "buffered" and not is_shared(alias):
+        return [
+            Warning(
+                "NEWS_VIEW_COUNT_MODE is 'buffered' but the cache is process-local.",
+                hint=(
+                    "Buffered views are lost on worker restart and flush_news_views "
+                    "cannot see them. Configure a shared cache (CACHE_BACKEND=Redis/"
+                    "Memcached) or use NEWS_VIEW_COUNT_MODE=auto."
+                ),
+                id="portal_berita.W001",
+            )
+        ]
+    return []
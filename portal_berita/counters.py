@@ -0,0 +1,28 @@
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from portal_berita.models import REACTION_CHOICES, Berita, Comment, NewsReaction
+
+
+def _count_subquery(queryset):
+    subquery = (
+        queryset.filter(berita=OuterRef("pk"))
+        .order_by()
+        .values("berita")
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    return Coalesce(Subquery(subquery, output_field=IntegerField()), Value(0))
+
+
+def rebuild_counters(queryset=None):
+    """Hitung ulang comment_count dan <reaction>_count dalam satu UPDATE."""
+    if queryset is None:
+        queryset = Berita.objects.all()
+
+    updates = {"comment_count": _count_subquery(Comment.objects.all())}
+    for key, _ in REACTION_CHOICES:
+        updates[f"{key}_count"] = _count_subquery(
+            NewsReaction.objects.filter(reaction_type=key)
+        )
+    return queryset.update(**updates)
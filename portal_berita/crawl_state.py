@@ -0,0 +1,100 @@
+"""State crawl untuk scraper inkremental (detik, kompas).
+
+``CrawlStateStore`` menyimpan ETag, Last-Modified dan hash konten per URL di
+tabel ``CrawlState``. Artikel yang sudah pernah diambil (ada di ``CrawlState``
+atau sudah tersimpan sebagai ``Berita.sumber``) dilewati; halaman indeks
+diminta dengan ``If-None-Match``/``If-Modified-Since`` sehingga halaman yang
+tidak berubah cukup dijawab 304. Perubahan ditulis per batch lewat ``flush()``.
+"""
+
+import hashlib
+
+from django.utils import timezone
+
+from .models import Berita, CrawlState
+
+FLUSH_EVERY = 100
+
+
+def content_hash(content):
+    return hashlib.sha1(content).hexdigest()
+
+
+class CrawlStateStore:
+    def __init__(self, enabled=True):
+        # enabled=False (mis. --full): semua URL dianggap baru, state tetap dicatat
+        self.enabled = enabled
+        self._states = {}
+        self._dirty = {}
+
+    def load(self, urls):
+        """Muat state untuk ``urls`` yang belum dimuat, dengan satu query."""
+        missing = [url for url in urls if url not in self._states]
+        if missing:
+            for state in CrawlState.objects.filter(url__in=missing):
+                self._states[state.url] = state
+            for url in missing:
+                self._states.setdefault(url, None)
+
+    def known(self, urls):
+        """Subset ``urls`` yang sudah pernah di-crawl atau sudah ada sebagai Berita."""
+        if not self.enabled:
+            return set()
+        urls = list(urls)
+        self.load(urls)
+        seen = {url for url in urls if self._states.get(url) is not None}
+        rest = [url for url in urls if url not in seen]
+        if rest:
+            seen.update(Berita.objects.filter(sumber__in=rest).values_list("sumber", flat=True))
+        return seen
+
+    def conditional_headers(self, url):
+        if not self.enabled:
+            return {}
+        self.load([url])
+        state = self._states.get(url)
+        headers = {}
+        if state is not None:
+            if state.etag:
+                headers["If-None-Match"] = state.etag
+            if state.last_modified:
+                headers["If-Modified-Since"] = state.last_modified
+        return headers
+
+    def record(self, result):
+        """Catat hasil fetch; mengembalikan True jika konten baru/berubah."""
+        now = timezone.now()
+        self.load([result.url])
+        state = self._states.get(result.url)
+        if state is None:
+            state = CrawlState(url=result.url, first_seen=now, last_changed=now)
+            self._states[result.url] = state
+
+        changed = False
+        if result.ok:
+            digest = content_hash(result.content)
+            changed = digest != state.content_hash
+            state.content_hash = digest
+            state.etag = result.etag
+            state.last_modified = result.last_modified
+            if changed:
+                state.last_changed = now
+        state.last_checked = now
+
+        self._dirty[result.url] = state
+        if len(self._dirty) >= FLUSH_EVERY:
+            self.flush()
+        return changed
+
+    def flush(self):
+        if not self._dirty:
+            return 0
+        rows = list(self._dirty.values())
+        CrawlState.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=["url"],
+            update_fields=["etag", "last_modified", "content_hash", "last_checked", "last_changed"],
+        )
+        self._dirty.clear()
+        return len(rows)
@@ -0,0 +1,96 @@
+"""Cache untuk halaman utama berita (list_news).
+
+Setiap section (feed, trending, skor, produk) dirender sekali lalu disimpan
+sebagai HTML. Key cache memuat token versi per sumber data ("news",
+"scores", "products"); signal cukup mengganti token untuk membatalkan semua
+fragment terkait. Data per-user (``user_reactions_json``, navbar) tidak ikut
+di-cache sehingga fragment bisa dipakai bersama.
+
+Backend diatur lewat ``NEWS_HOME_CACHE_ALIAS`` (default: cache "default").
+Token versi di cache per proses berumur ``CACHE_VERSION_TTL`` detik (lihat
+``sport_watch.caching``); validator ETag API tidak memakai token ini.
+"""
+
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+
+from sport_watch.caching import version_timeout
+
+KEY_PREFIX = "news_home"
+SECTIONS = ("news", "scores", "products")
+
+
+def _alias():
+    return getattr(settings, "NEWS_HOME_CACHE_ALIAS", "default")
+
+
+def _cache():
+    return caches[_alias()]
+
+
+def _timeout():
+    return getattr(settings, "NEWS_HOME_CACHE_TIMEOUT", 60)
+
+
+def _version_key(section):
+    return f"{KEY_PREFIX}:version:{section}"
+
+
+def section_version(section):
+    cache = _cache()
+    version = cache.get(_version_key(section))
+    if version is None:
+        cache.add(_version_key(section), uuid.uuid4().hex, timeout=version_timeout(_alias()))
+        version = cache.get(_version_key(section))
+    return version
+
+
+def invalidate(section):
+    _cache().set(_version_key(section), uuid.uuid4().hex, timeout=version_timeout(_alias()))
+
+
+def fragment(name, section, build, vary=""):
+    """Ambil fragment dari cache, atau panggil ``build()`` lalu simpan."""
+    cache = _cache()
+    key = f"{KEY_PREFIX}:fragment:{name}:{section_version(section)}:{vary}"
+    value = cache.get(key)
+    if value is None:
+        value = build()
+        cache.set(key, value, _timeout())
+    return value
+
+
+def response_key(request, page):
+    versions = ":".join(section_version(section) for section in SECTIONS)
+    return f"{KEY_PREFIX}:response:{versions}:{request.path}:{page}"
+
+
+def is_shareable_request(request):
+    # hanya pengunjung anonim tanpa cookie (sesi, pesan, cart) yang dapat
+    # menerima respons penuh dari cache
+    return (
+        request.method == "GET"
+        and not request.user.is_authenticated
+        and not request.COOKIES
+    )
+
+
+def get_response(request, page):
+    if not is_shareable_request(request):
+        return None
+    return _cache().get(response_key(request, page))
+
+
+def store_response(request, page, content):
+    if is_shareable_request(request):
+        _cache().set(response_key(request, page), content, _timeout())
+
+
+def cached_featured_product_ids():
+    return _cache().get(f"{KEY_PREFIX}:featured_product_ids") or set()
+
+
+def remember_featured_product_ids(ids):
+    _cache().set(f"{KEY_PREFIX}:featured_product_ids", set(ids), timeout=None)
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from portal_berita.view_counter import flush_views, is_buffered
+
+
+class Command(BaseCommand):
+    help = 'Flushes buffered Berita view counts from the cache into the database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep flushing every --interval seconds.')
+        parser.add_argument('--interval', type=int, default=60, help='Seconds between flushes when --loop is set.')
+
+    def handle(self, *args, **options):
+        if not is_buffered():
+            self.stdout.write(self.style.WARNING('View buffering is off (NEWS_VIEW_COUNT_MODE is "exact", or "auto" with a process-local cache); nothing to flush.'))
+            return
+
+        while True:
+            flushed = flush_views()
+            self.stdout.write(self.style.SUCCESS(f'Flushed {flushed} buffered views.'))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
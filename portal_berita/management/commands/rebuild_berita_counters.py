@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from portal_berita.counters import rebuild_counters
+from portal_berita.models import Berita
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the denormalized comment and reaction counters on Berita.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--id', action='append', dest='ids', help='Only rebuild the given Berita id (repeatable).')
+
+    def handle(self, *args, **options):
+        queryset = Berita.objects.all()
+        if options['ids']:
+            queryset = queryset.filter(id__in=options['ids'])
+
+        updated = rebuild_counters(queryset)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt counters for {updated} news items.'))
@@ -1,16 +1,30 @@
-import requests
 from bs4 import BeautifulSoup
-import json
 from django.core.management.base import BaseCommand
 import datetime
 from urllib.parse import urljoin
 
+from portal_berita.crawl_state import CrawlStateStore
+from portal_berita.news_import import merge_output
+from sport_watch.scraping import add_fetcher_arguments, fetcher_from_options
+
 class Command(BaseCommand):
     help = 'Scrapes news from sport.detik.com and saves it to a JSON file.'
 
     MAX_ARTICLES = 100 # Target number of articles to scrape
 
+    def add_arguments(self, parser):
+        add_fetcher_arguments(parser)
+        parser.add_argument('--full', action='store_true', help='Ignore the crawl state and fetch every article again.')
+
     def handle(self, *args, **options):
+        state = CrawlStateStore(enabled=not options['full'])
+        with fetcher_from_options(options) as fetcher:
+            try:
+                self.scrape(fetcher, state)
+            finally:
+                state.flush()
+
+    def scrape(self, fetcher, state):
         self.stdout.write(self.style.SUCCESS('Starting scraping from sport.detik.com...'))
 
         base_url = 'https://sport.detik.com/'
@@ -20,9 +34,8 @@ class Command(BaseCommand):
 
         # Find the 'Indeks' link on the main page
         indeks_link = None
-        try:
-            response = requests.get(base_url)
-            response.raise_for_status()
+        response = fetcher.get(base_url)
+        if response.ok:
             soup = BeautifulSoup(response.text, 'html.parser')
             # Look for a link with 'Indeks' in its text or href
             indeks_link_tag = soup.find('a', string=lambda text: text and 'Indeks' in text)
@@ -31,29 +44,29 @@ class Command(BaseCommand):
                 self.stdout.write(self.style.SUCCESS(f"Found Indeks link: {indeks_link}"))
             else:
                 self.stdout.write(self.style.WARNING("Could not find 'Indeks' link on the main page. Scraping only from the main page."))
-        except requests.exceptions.RequestException as e:
-            self.stderr.write(self.style.ERROR(f"Error fetching main URL {base_url}: {e}"))
+        else:
+            self.stderr.write(self.style.ERROR(f"Error fetching main URL {base_url}: {response.error}"))
             return
 
         if indeks_link:
             current_url = indeks_link
 
         while scraped_count < self.MAX_ARTICLES and current_url:
-            try:
-                response = requests.get(current_url)
-                response.raise_for_status()
-            except requests.exceptions.RequestException as e:
-                self.stderr.write(self.style.ERROR(f"Error fetching URL {current_url}: {e}"))
+            response = fetcher.get(current_url, headers=state.conditional_headers(current_url))
+            if response.not_modified:
+                self.stdout.write(self.style.WARNING(f'Index page not modified since last run: {current_url}'))
+                break
+            if not response.ok:
+                self.stderr.write(self.style.ERROR(f"Error fetching URL {current_url}: {response.error}"))
                 break
 
             soup = BeautifulSoup(response.text, 'html.parser')
 
             articles = soup.find_all('article', class_='list-content__item')
 
+            # kumpulkan link dulu, lalu halaman detail diambil paralel
+            pending = []
             for article in articles:
-                if scraped_count >= self.MAX_ARTICLES:
-                    break
-
                 title_tag = article.find('h2')
                 link_tag = article.find('a')
                 image_tag = article.find('img')
@@ -62,36 +75,58 @@ class Command(BaseCommand):
                     title = title_tag.get_text(strip=True)
                     link = link_tag['href']
                     image_url = image_tag['src'] if image_tag and 'src' in image_tag.attrs else ''
-
-                    try:
-                        detail_response = requests.get(link)
-                        detail_response.raise_for_status()
-                        detail_soup = BeautifulSoup(detail_response.text, 'html.parser')
-
-                        # Extract title from the detail page for accuracy
-                        detail_title_tag = detail_soup.find('h1') # Assuming h1 is the main title on the detail page
-                        if detail_title_tag:
-                            title = detail_title_tag.get_text(strip=True)
-                        else:
-                            self.stdout.write(self.style.WARNING(f"Could not find main title on detail page for {link}. Using title from main page."))
-
-                        content_div = detail_soup.find('div', class_='detail__body-text')
-                        content = content_div.get_text(strip=True) if content_div else 'No content found.'
-
-                        news_data.append({
-                            'title': title,
-                            'content': content,
-                            'category': 'Olahraga',
-                            'image_url': image_url,
-                            'source_url': link,
-                            'published_date': str(datetime.datetime.now())
-                        })
-                        self.stdout.write(self.style.SUCCESS(f'Successfully scraped: {title}'))
-                        scraped_count += 1
-                    except requests.exceptions.RequestException as e:
-                        self.stderr.write(self.style.ERROR(f"Error fetching detail URL {link}: {e}"))
-                    except Exception as e:
-                        self.stderr.write(self.style.ERROR(f"Error processing article {title}: {e}"))
+                    pending.append((title, link, image_url))
+
+            # artikel yang sudah pernah diambil dilewati; halaman yang isinya
+            # sudah dikenal semua berarti sisa arsip juga sudah pernah di-crawl
+            seen = state.known(link for _, link, _ in pending)
+            fresh = [item for item in pending if item[1] not in seen]
+            if pending and not fresh:
+                self.stdout.write(self.style.WARNING('Only previously seen articles on this page; stopping.'))
+                break
+            pending = fresh[:self.MAX_ARTICLES - scraped_count]
+            truncated = len(pending) < len(fresh)
+
+            details = fetcher.fetch_all(link for _, link, _ in pending)
+            failed = 0
+            for (title, link, image_url), detail_response in zip(pending, details):
+                if not detail_response.ok:
+                    self.stderr.write(self.style.ERROR(f"Error fetching detail URL {link}: {detail_response.error}"))
+                    failed += 1
+                    continue
+                try:
+                    detail_soup = BeautifulSoup(detail_response.text, 'html.parser')
+
+                    # Extract title from the detail page for accuracy
+                    detail_title_tag = detail_soup.find('h1') # Assuming h1 is the main title on the detail page
+                    if detail_title_tag:
+                        title = detail_title_tag.get_text(strip=True)
+                    else:
+                        self.stdout.write(self.style.WARNING(f"Could not find main title on detail page for {link}. Using title from main page."))
+
+                    content_div = detail_soup.find('div', class_='detail__body-text')
+                    content = content_div.get_text(strip=True) if content_div else 'No content found.'
+
+                    news_data.append({
+                        'title': title,
+                        'content': content,
+                        'category': 'Olahraga',
+                        'image_url': image_url,
+                        'source_url': link,
+                        'published_date': str(datetime.datetime.now())
+                    })
+                    # baru ditandai sudah diambil setelah berhasil di-parse; yang gagal dicoba lagi
+                    state.record(detail_response)
+                    self.stdout.write(self.style.SUCCESS(f'Successfully scraped: {title}'))
+                    scraped_count += 1
+                except Exception as e:
+                    self.stderr.write(self.style.ERROR(f"Error processing article {title}: {e}"))
+                    failed += 1
+
+            # validator halaman indeks baru disimpan jika semua artikelnya berhasil,
+            # supaya artikel yang gagal tidak tertutup jawaban 304 di run berikutnya
+            if not failed and not truncated:
+                state.record(response)
 
             # Find the next page link (adjust selector based on Indeks page structure)
             next_page_link = None
@@ -124,9 +159,16 @@ class Command(BaseCommand):
                 self.stdout.write(self.style.WARNING('No more pages found or target articles reached.'))
                 current_url = None # Stop the loop
 
-        # Write data to JSON file
         file_path = 'detik_sport_news.json'
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(news_data, f, ensure_ascii=False, indent=4)
+        if not news_data:
+            # jangan timpa hasil run sebelumnya yang mungkin belum dimuat
+            self.stdout.write(self.style.WARNING(f'No new articles; {file_path} left unchanged.'))
+            return
+
+        # digabung, bukan ditimpa: artikel run sebelumnya yang belum dimuat
+        # sudah tercatat di crawl state dan tidak akan diambil lagi
+        pending_count = merge_output(file_path, news_data)
 
-        self.stdout.write(self.style.SUCCESS(f'Scraping finished. Data saved to {file_path}'))
+        self.stdout.write(self.style.SUCCESS(
+            f'Scraping finished. Data saved to {file_path} ({pending_count} articles waiting for load_detik_news)'
+        ))
@@ -1,22 +1,37 @@
-import requests
 from bs4 import BeautifulSoup
-import json
 from django.core.management.base import BaseCommand
 import datetime
 from urllib.parse import urljoin
 
+from portal_berita.crawl_state import CrawlStateStore
+from portal_berita.news_import import merge_output
+from sport_watch.scraping import add_fetcher_arguments, fetcher_from_options
+
 class Command(BaseCommand):
     help = 'Scrapes news from kompas.com/sports and saves it to a JSON file.'
 
+    def add_arguments(self, parser):
+        add_fetcher_arguments(parser)
+        parser.add_argument('--full', action='store_true', help='Ignore the crawl state and fetch every article again.')
+
     def handle(self, *args, **options):
+        state = CrawlStateStore(enabled=not options['full'])
+        with fetcher_from_options(options) as fetcher:
+            try:
+                self.scrape(fetcher, state)
+            finally:
+                state.flush()
+
+    def scrape(self, fetcher, state):
         self.stdout.write(self.style.SUCCESS('Starting scraping from kompas.com/sports...'))
         
         url = 'https://www.kompas.com/sports'
-        try:
-            response = requests.get(url)
-            response.raise_for_status()  # Raise an exception for HTTP errors
-        except requests.exceptions.RequestException as e:
-            self.stderr.write(self.style.ERROR(f"Error fetching URL {url}: {e}"))
+        response = fetcher.get(url, headers=state.conditional_headers(url))
+        if response.not_modified:
+            self.stdout.write(self.style.WARNING('Page not modified since last run; nothing to scrape.'))
+            return
+        if not response.ok:
+            self.stderr.write(self.style.ERROR(f"Error fetching URL {url}: {response.error}"))
             return
 
         soup = BeautifulSoup(response.text, 'html.parser')
@@ -26,10 +41,9 @@ class Command(BaseCommand):
         scraped_count = 0
         MAX_ARTICLES = 50
 
+        # kumpulkan link dulu, lalu halaman detail diambil paralel
+        pending = []
         for article in articles:
-            if scraped_count >= MAX_ARTICLES:
-                break
-
             title_tag = article.find('h2') # Placeholder, needs adjustment for Kompas
             link_tag = article.find('a')
             image_tag = article.find('img')
@@ -38,43 +52,65 @@ class Command(BaseCommand):
                 title = title_tag.get_text(strip=True)
                 link = link_tag['href']
                 image_url = image_tag['src'] if image_tag and 'src' in image_tag.attrs else ''
+                pending.append((title, link, image_url))
 
-                try:
-                    # Fetch the detail page for content
-                    detail_response = requests.get(link)
-                    detail_response.raise_for_status()
-                    detail_soup = BeautifulSoup(detail_response.text, 'html.parser')
-                    
-                    # Extract title from the detail page for accuracy
-                    detail_title_tag = detail_soup.find('h1') # Assuming h1 is the main title on the detail page
-                    if detail_title_tag:
-                        title = detail_title_tag.get_text(strip=True)
-                    else:
-                        self.stdout.write(self.style.WARNING(f"Could not find main title on detail page for {link}. Using title from main page."))
-                        # Keep the title from the main page if detail title not found
+        # artikel yang sudah pernah diambil dilewati
+        seen = state.known(link for _, link, _ in pending)
+        fresh = [item for item in pending if item[1] not in seen]
+        pending = fresh[:MAX_ARTICLES]
 
-                    # Extract content (adjust selector as needed)
-                    content_div = detail_soup.find('div', class_='detail__body-text') # Placeholder, needs adjustment for Kompas
-                    content = content_div.get_text(strip=True) if content_div else 'No content found.'
+        details = fetcher.fetch_all(link for _, link, _ in pending)
+        failed = 0
+        for (title, link, image_url), detail_response in zip(pending, details):
+            if not detail_response.ok:
+                self.stderr.write(self.style.ERROR(f"Error fetching detail URL {link}: {detail_response.error}"))
+                failed += 1
+                continue
+            try:
+                detail_soup = BeautifulSoup(detail_response.text, 'html.parser')
+                
+                # Extract title from the detail page for accuracy
+                detail_title_tag = detail_soup.find('h1') # Assuming h1 is the main title on the detail page
+                if detail_title_tag:
+                    title = detail_title_tag.get_text(strip=True)
+                else:
+                    self.stdout.write(self.style.WARNING(f"Could not find main title on detail page for {link}. Using title from main page."))
+                    # Keep the title from the main page if detail title not found
 
-                    news_data.append({
-                        'title': title,
-                        'content': content,
-                        'category': 'Olahraga',
-                        'image_url': image_url,
-                        'source_url': link,
-                        'published_date': str(datetime.datetime.now()) # Using datetime.datetime.now() for consistency, though not strictly needed for JSON
-                    })
-                    self.stdout.write(self.style.SUCCESS(f'Successfully scraped: {title}'))
-                    scraped_count += 1
-                except requests.exceptions.RequestException as e:
-                    self.stderr.write(self.style.ERROR(f"Error fetching detail URL {link}: {e}"))
-                except Exception as e:
-                    self.stderr.write(self.style.ERROR(f"Error processing article {title}: {e}"))
+                # Extract content (adjust selector as needed)
+                content_div = detail_soup.find('div', class_='detail__body-text') # Placeholder, needs adjustment for Kompas
+                content = content_div.get_text(strip=True) if content_div else 'No content found.'
+
+                news_data.append({
+                    'title': title,
+                    'content': content,
+                    'category': 'Olahraga',
+                    'image_url': image_url,
+                    'source_url': link,
+                    'published_date': str(datetime.datetime.now()) # Using datetime.datetime.now() for consistency, though not strictly needed for JSON
+                })
+                # baru ditandai sudah diambil setelah berhasil di-parse; yang gagal dicoba lagi
+                state.record(detail_response)
+                self.stdout.write(self.style.SUCCESS(f'Successfully scraped: {title}'))
+                scraped_count += 1
+            except Exception as e:
+                self.stderr.write(self.style.ERROR(f"Error processing article {title}: {e}"))
+                failed += 1
+
+        # validator halaman baru disimpan jika semua artikelnya berhasil diambil
+        if not failed and len(pending) == len(fresh):
+            state.record(response)
 
-        # Write data to JSON file
         file_path = 'kompas_sports_news.json'
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(news_data, f, ensure_ascii=False, indent=4)
+        if not news_data:
+            # jangan timpa hasil run sebelumnya yang mungkin belum dimuat
+            self.stdout.write(self.style.WARNING(f'No new articles; {file_path} left unchanged.'))
+            return
+
+        # digabung, bukan ditimpa: artikel run sebelumnya yang belum dimuat
+        # sudah tercatat di crawl state dan tidak akan diambil lagi
+        pending_count = merge_output(file_path, news_data)
 
-        self.stdout.write(self.style.SUCCESS(f'Scraping finished. Data saved to {file_path}'))
+        self.stdout.write(self.style.SUCCESS(
+            f'Scraping finished. Data saved to {file_path} ({pending_count} articles waiting for load_detik_news)'
+        ))
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.18 on 2025-12-08 09:14
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+REACTION_TYPES = ["like", "love", "fire", "wow", "sad"]
+
+
+def backfill_counters(apps, schema_editor):
+    Berita = apps.get_model('portal_berita', 'Berita')
+    Comment = apps.get_model('portal_berita', 'Comment')
+    NewsReaction = apps.get_model('portal_berita', 'NewsReaction')
+
+    def count_of(queryset):
+        subquery = (
+            queryset.filter(berita=OuterRef('pk'))
+            .order_by()
+            .values('berita')
+            .annotate(total=Count('pk'))
+            .values('total')
+        )
+        return Coalesce(Subquery(subquery, output_field=IntegerField()), Value(0))
+
+    updates = {'comment_count': count_of(Comment.objects.all())}
+    for key in REACTION_TYPES:
+        updates[f'{key}_count'] = count_of(NewsReaction.objects.filter(reaction_type=key))
+    Berita.objects.update(**updates)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portal_berita', '0007_newsreaction'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='berita',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='berita',
+            name='fire_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='berita',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='berita',
+            name='love_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='berita',
+            name='sad_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='berita',
+            name='wow_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2025-12-13 10:21
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portal_berita', '0008_berita_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CrawlState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.CharField(max_length=500, unique=True)),
+                ('etag', models.CharField(blank=True, max_length=255)),
+                ('last_modified', models.CharField(blank=True, max_length=64)),
+                ('content_hash', models.CharField(blank=True, max_length=40)),
+                ('first_seen', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_checked', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_changed', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='berita',
+            name='sumber',
+            field=models.CharField(blank=True, db_index=True, max_length=255),
+        ),
+    ]
@@ -1,6 +1,5 @@
 import uuid
 from django.db import models
-from django.db.models import Count
 from django.contrib.auth import get_user_model
 from django.utils.text import slugify
 from django.utils import timezone
@@ -23,6 +22,13 @@ REACTION_EMOJI_MAP = {
     "sad": "\U0001F622",  # 😢
 }
 
+REACTION_COUNTER_FIELDS = [f"{key}_count" for key, _ in REACTION_CHOICES]
+
+
+def reaction_counter_field(reaction_type):
+    return f"{reaction_type}_count"
+
+
 class KategoriBerita(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     nama = models.CharField(max_length=100, unique=True)
@@ -58,11 +64,19 @@ class Berita(models.Model):
         null=True,
         related_name="berita",
     )
-    sumber = models.CharField(max_length=255, blank=True)
+    sumber = models.CharField(max_length=255, blank=True, db_index=True)
     is_published = models.BooleanField(default=False)
     tanggal_dibuat = models.DateTimeField(default=timezone.now)
     tanggal_diperbarui = models.DateTimeField(auto_now=True)
 
+    # counter denormalisasi, dijaga oleh view (F()) dan rebuild_berita_counters
+    comment_count = models.PositiveIntegerField(default=0)
+    like_count = models.PositiveIntegerField(default=0)
+    love_count = models.PositiveIntegerField(default=0)
+    fire_count = models.PositiveIntegerField(default=0)
+    wow_count = models.PositiveIntegerField(default=0)
+    sad_count = models.PositiveIntegerField(default=0)
+
     class Meta:
         ordering = ["-tanggal_dibuat"]
 
@@ -78,27 +92,32 @@ class Berita(models.Model):
     def berita_hot(self):
         return self.views >= 100
 
-    @property
-    def comment_count(self):
-        return self.comments.count()
-
     @property
     def reaction_counts(self):
-        counts = {key: 0 for key, _ in REACTION_CHOICES}
-        if (
-            hasattr(self, "_prefetched_objects_cache")
-            and "reactions" in self._prefetched_objects_cache
-        ):
-            for reaction in self.reactions.all():
-                counts[reaction.reaction_type] += 1
-        else:
-            aggregated = (
-                self.reactions.values("reaction_type")
-                .annotate(total=Count("reaction_type"))
-            )
-            for item in aggregated:
-                counts[item["reaction_type"]] = item["total"]
-        return counts
+        return {
+            key: getattr(self, reaction_counter_field(key))
+            for key, _ in REACTION_CHOICES
+        }
+
+    def bump_comment_count(self, delta=1):
+        Berita.objects.filter(pk=self.pk).update(
+            comment_count=models.F("comment_count") + delta
+        )
+        self.refresh_from_db(fields=["comment_count"])
+
+    def apply_reaction_change(self, old_type=None, new_type=None):
+        """Geser counter reaksi: old_type -1, new_type +1 (boleh None)."""
+        if old_type == new_type:
+            return
+        changes = {}
+        if old_type:
+            field = reaction_counter_field(old_type)
+            changes[field] = models.F(field) - 1
+        if new_type:
+            field = reaction_counter_field(new_type)
+            changes[field] = models.F(field) + 1
+        Berita.objects.filter(pk=self.pk).update(**changes)
+        self.refresh_from_db(fields=list(changes))
 
     @property
     def reaction_summary(self):
@@ -154,3 +173,18 @@ class NewsReaction(models.Model):
 
     def __str__(self):
         return f'{self.user} reacted {self.reaction_type} to {self.berita}'
+
+
+class CrawlState(models.Model):
+    """Status crawl per URL untuk scraper inkremental (lihat ``portal_berita.crawl_state``)."""
+
+    url = models.CharField(max_length=500, unique=True)
+    etag = models.CharField(max_length=255, blank=True)
+    last_modified = models.CharField(max_length=64, blank=True)
+    content_hash = models.CharField(max_length=40, blank=True)
+    first_seen = models.DateTimeField(default=timezone.now)
+    last_checked = models.DateTimeField(default=timezone.now)
+    last_changed = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return self.url
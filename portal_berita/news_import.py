@@ -0,0 +1,169 @@
+"""Loader bulk untuk hasil scraper berita (``load_detik_news``).
+
+Input berupa array JSON (format ``scrape_detik_sport``) atau NDJSON (satu
+objek per baris, dibaca streaming). Item diproses per batch: judul yang sudah
+ada dicek dengan satu query ``IN``, tanggal di-parse di depan, lalu batch
+ditulis dengan ``bulk_create`` di dalam satu transaksi.
+
+``bulk_create`` tidak mengirim ``post_save``, jadi setelah transaksi selesai
+dikirim ``news_loaded`` (berisi daftar ``Berita`` baru) supaya cache beranda
+dan indeks pencarian ikut diperbarui.
+
+Scraper menulis hasilnya lewat ``merge_output``: artikel yang sudah ditandai di
+crawl state tapi belum dimuat tetap ada di file sampai loader menyimpannya.
+"""
+
+import datetime
+import json
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+from itertools import islice
+
+from django.db import transaction
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .models import Berita, KategoriBerita
+
+DEFAULT_CATEGORY = "Olahraga"
+
+# dikirim setelah commit dengan argumen ``berita`` (list Berita yang baru dibuat)
+news_loaded = Signal()
+
+
+@dataclass
+class LoadResult:
+    created: int = 0
+    existing: int = 0
+    duplicate: int = 0
+    invalid: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+
+
+def iter_items(path):
+    """Yield item dari ``path``; NDJSON dibaca baris per baris tanpa memuat seluruh file."""
+    with open(path, "r", encoding="utf-8") as fh:
+        head = fh.read(1)
+        while head.isspace():
+            head = fh.read(1)
+        if head == "[":
+            fh.seek(0)
+            yield from json.load(fh)
+            return
+        fh.seek(0)
+        for line in fh:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def merge_output(path, items):
+    """Gabungkan ``items`` ke file output scraper (array JSON); kembalikan jumlah item di file.
+
+    Item lama yang belum menjadi ``Berita`` dipertahankan (run berikutnya
+    tidak akan mengambilnya lagi karena sudah tercatat di crawl state), item
+    yang sudah dimuat dibuang supaya file tidak terus membesar. Ditulis atomic.
+    """
+    merged = {}
+    if os.path.exists(path):
+        for item in iter_items(path):
+            merged[item.get("source_url") or item.get("title")] = item
+    for item in items:
+        merged[item.get("source_url") or item.get("title")] = item
+
+    loaded = set(
+        Berita.objects.filter(sumber__in=[i["source_url"] for i in merged.values() if i.get("source_url")])
+        .values_list("sumber", flat=True)
+    )
+    rows = [item for item in merged.values() if item.get("source_url") not in loaded]
+
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".part")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump(rows, fh, ensure_ascii=False, indent=4)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+    return len(rows)
+
+
+def parse_date(value):
+    """``datetime`` aware dari string ISO; ``None`` jika kosong/tidak valid."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def load_news(items, batch_size=1000, dry_run=False, category=DEFAULT_CATEGORY):
+    """Simpan ``items`` sebagai ``Berita`` terbit; mengembalikan ``LoadResult``.
+
+    Dengan ``dry_run`` semua pengecekan tetap jalan tapi transaksi di-rollback.
+    """
+    result = LoadResult()
+    started = time.monotonic()
+    created = []
+    seen = set()
+
+    with transaction.atomic():
+        kategori, _ = KategoriBerita.objects.get_or_create(nama=category)
+        now = timezone.now()
+
+        for chunk in _chunks(items, batch_size):
+            rows = []
+            for item in chunk:
+                title = (item.get("title") or "").strip()
+                content = item.get("content")
+                if not title or not content:
+                    result.invalid += 1
+                    continue
+                if title in seen:
+                    result.duplicate += 1
+                    continue
+                seen.add(title)
+                rows.append(Berita(
+                    judul=title,
+                    konten=content,
+                    kategori=kategori,
+                    thumbnail=item.get("image_url") or "",
+                    sumber=item.get("source_url") or "",
+                    is_published=True,
+                    tanggal_dibuat=parse_date(item.get("published_date")) or now,
+                ))
+
+            existing = set(
+                Berita.objects.filter(judul__in=[row.judul for row in rows])
+                .order_by()
+                .values_list("judul", flat=True)
+            )
+            rows = [row for row in rows if row.judul not in existing]
+            result.existing += len(existing)
+            if rows:
+                Berita.objects.bulk_create(rows, batch_size=batch_size)
+                created.extend(rows)
+            result.batches += 1
+
+        result.created = len(created)
+        if dry_run:
+            transaction.set_rollback(True)
+        elif created:
+            transaction.on_commit(lambda: news_loaded.send(sender=Berita, berita=created))
+
+    result.seconds = time.monotonic() - started
+    return result
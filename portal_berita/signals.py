@@ -0,0 +1,51 @@
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from portal_berita import home_cache
+from portal_berita.models import Berita, Comment
+from portal_berita.news_import import news_loaded
+from scoreboard.models import Scoreboard
+from shop.models import Product
+from shop.product_import import products_imported
+
+
+@receiver(post_save, sender=Berita)
+@receiver(post_delete, sender=Berita)
+def berita_changed(sender, instance, **kwargs):
+    home_cache.invalidate("news")
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    # pasangan bump_comment_count(); juga terpanggil untuk balasan yang ikut terhapus
+    Berita.objects.filter(pk=instance.berita_id).update(
+        comment_count=Greatest(F("comment_count") - 1, Value(0))
+    )
+
+
+@receiver(news_loaded)
+def berita_loaded(sender, berita, **kwargs):
+    home_cache.invalidate("news")
+
+
+@receiver(post_save, sender=Scoreboard)
+@receiver(post_delete, sender=Scoreboard)
+def scoreboard_changed(sender, instance, **kwargs):
+    home_cache.invalidate("scores")
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def product_changed(sender, instance, **kwargs):
+    # hanya produk featured (sekarang atau yang sedang tampil) yang relevan
+    if instance.is_featured or str(instance.pk) in home_cache.cached_featured_product_ids():
+        home_cache.invalidate("products")
+
+
+@receiver(products_imported)
+def products_imported_changed(sender, products, **kwargs):
+    featured = home_cache.cached_featured_product_ids()
+    if any(p.is_featured or str(p.pk) in featured for p in products):
+        home_cache.invalidate("products")
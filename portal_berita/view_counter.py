@@ -0,0 +1,153 @@
+"""Buffered view counter for Berita.
+
+Setiap hit ``detail_news`` hanya menambah counter di Django cache. Counter
+tersebut dipindahkan ke kolom ``Berita.views`` oleh ``flush_views`` (paling
+sering sekali per ``NEWS_VIEW_FLUSH_INTERVAL`` detik, atau lewat command
+``flush_news_views``) dengan satu UPDATE per artikel.
+
+Semua operasi memakai ``incr``/``decr``/``add`` yang atomic di Redis dan
+Memcached: counter per artikel, dan daftar artikel "dirty" berupa slot
+bernomor (``<prefix>:dirty:<n>``) yang nomornya diambil dari counter urutan.
+Artikel didaftarkan ke slot baru setiap kali counternya naik dari 0, dan oleh
+flush jika masih ada sisa view yang masuk selama flush berjalan.
+
+Mendaftar butuh dua langkah (``incr`` nomor slot, lalu ``set`` slot), jadi flush
+bisa melihat nomor slot yang isinya belum ditulis. Cursor tidak dimajukan
+melewati slot kosong seperti itu; slot baru dianggap hilang (dilewati) jika
+masih kosong pada flush berikutnya.
+
+Buffer hanya berguna jika cache dibagi antar proses (worker dan command).
+``NEWS_VIEW_COUNT_MODE``:
+
+- ``"auto"`` (default): buffered jika cache bersama, selain itu exact.
+- ``"buffered"``: selalu buffered; dengan cache per proses (LocMem) hanya
+  cocok untuk satu proses (dev/test), lihat check ``portal_berita.W001``.
+- ``"exact"``: UPDATE langsung setiap view.
+"""
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import F
+
+from portal_berita.models import Berita
+from sport_watch.caching import is_shared
+
+KEY_PREFIX = "news_views"
+SEQ_KEY = f"{KEY_PREFIX}:seq"
+CURSOR_KEY = f"{KEY_PREFIX}:cursor"
+GAP_KEY = f"{KEY_PREFIX}:gap"
+FLUSH_LEASE_KEY = f"{KEY_PREFIX}:flush_lease"
+FLUSH_LOCK_KEY = f"{KEY_PREFIX}:flush_lock"
+FLUSH_LOCK_TIMEOUT = 300
+
+
+def _alias():
+    return getattr(settings, "NEWS_VIEW_CACHE_ALIAS", "default")
+
+
+def _cache():
+    return caches[_alias()]
+
+
+def _counter_key(pk):
+    return f"{KEY_PREFIX}:{pk}"
+
+
+def _slot_key(n):
+    return f"{KEY_PREFIX}:dirty:{n}"
+
+
+def _incr(cache, key, delta=1):
+    cache.add(key, 0, timeout=None)
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        # key hilang di antara add dan incr (eviction)
+        cache.set(key, delta, timeout=None)
+        return delta
+
+
+def is_buffered():
+    mode = getattr(settings, "NEWS_VIEW_COUNT_MODE", "auto")
+    if mode == "auto":
+        return is_shared(_alias())
+    return mode != "exact"
+
+
+def pending_views(pk):
+    if not is_buffered():
+        return 0
+    return _cache().get(_counter_key(pk)) or 0
+
+
+def _mark_dirty(cache, pk):
+    cache.set(_slot_key(_incr(cache, SEQ_KEY)), pk, timeout=None)
+
+
+def record_view(berita):
+    """Catat satu view. Nilai ``berita.views`` di memori ikut diperbarui."""
+    if not is_buffered():
+        berita.increment_views()
+        return
+
+    cache = _cache()
+    pending = _incr(cache, _counter_key(berita.pk))
+    if pending == 1:
+        _mark_dirty(cache, berita.pk)
+
+    berita.views += pending
+
+    # lease: hanya satu request per interval yang menjalankan flush
+    interval = getattr(settings, "NEWS_VIEW_FLUSH_INTERVAL", 60)
+    if cache.add(FLUSH_LEASE_KEY, 1, timeout=interval):
+        flush_views()
+
+
+def flush_views():
+    """Pindahkan counter dari cache ke DB. Mengembalikan jumlah view yang ditulis."""
+    cache = _cache()
+    # satu flusher pada satu waktu (request dan command bisa bersamaan)
+    if not cache.add(FLUSH_LOCK_KEY, 1, timeout=FLUSH_LOCK_TIMEOUT):
+        return 0
+    try:
+        cursor = cache.get(CURSOR_KEY) or 0
+        seq = cache.get(SEQ_KEY) or 0
+        if seq <= cursor:
+            return 0
+        found = cache.get_many([_slot_key(n) for n in range(cursor + 1, seq + 1)])
+        dirty = set(found.values())
+
+        # majukan cursor hanya sampai slot kosong pertama: slot itu mungkin
+        # sedang ditulis (antara incr seq dan set slot). Slot sesudahnya tetap
+        # diproses sekarang dan dibaca lagi nanti; decr membuat itu aman.
+        done = cursor
+        for n in range(cursor + 1, seq + 1):
+            if _slot_key(n) not in found:
+                if cache.get(GAP_KEY) != n:
+                    cache.set(GAP_KEY, n, timeout=None)
+                    break
+                # masih kosong sejak flush sebelumnya: penulisnya gagal, lewati
+            done = n
+        if done > cursor:
+            cache.set(CURSOR_KEY, done, timeout=None)
+            cache.delete_many([_slot_key(n) for n in range(cursor + 1, done + 1)])
+
+        flushed = 0
+        for pk in dirty:
+            key = _counter_key(pk)
+            count = cache.get(key) or 0
+            if not count:
+                continue
+            # decr (bukan delete) supaya view yang masuk selama flush tidak hilang
+            try:
+                remaining = cache.decr(key, count)
+            except ValueError:
+                remaining = 0
+            if remaining > 0:
+                # incr selama flush tidak melihat transisi dari 0, daftarkan ulang
+                _mark_dirty(cache, pk)
+            Berita.objects.filter(pk=pk).update(views=F("views") + count)
+            flushed += count
+        return flushed
+    finally:
+        cache.delete(FLUSH_LOCK_KEY)
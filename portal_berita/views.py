@@ -6,8 +6,16 @@ from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth.forms import AuthenticationForm, UserCreationForm
 from django.core import serializers
-from django.http import HttpResponseForbidden, HttpResponseRedirect, JsonResponse
+from django.db import transaction
+from django.db.models import Count, Max, Sum
+from django.http import (
+    HttpResponse,
+    HttpResponseForbidden,
+    HttpResponseRedirect,
+    JsonResponse,
+)
 from django.shortcuts import get_object_or_404, redirect, render
+from django.template.loader import render_to_string
 from django.urls import reverse
 from django.utils.html import strip_tags
 from django.utils.timesince import timesince
@@ -30,6 +38,9 @@ from portal_berita.models import (
     KategoriBerita,
     NewsReaction,
 )
+from portal_berita import home_cache
+from sport_watch.conditional import conditional
+from portal_berita.view_counter import record_view
 
 
 def is_admin(user):
@@ -50,7 +61,7 @@ from django.views.decorators.cache import never_cache
 @never_cache
 def detail_news(request, id):
     news = get_object_or_404(Berita, id=id)
-    news.increment_views()
+    record_view(news)
 
     comments = Comment.objects.filter(berita=news, parent=None).order_by("-created_at")
 
@@ -69,6 +80,7 @@ def detail_news(request, id):
                 new_comment.parent = Comment.objects.get(id=parent_id)
 
             new_comment.save()
+            news.bump_comment_count()
             return redirect("portal_berita:detail_news", id=id)
     else:
         comment_form = CommentForm()
@@ -130,70 +142,133 @@ def logout_view(request):
     return redirect("portal_berita:login")
 
 
-from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.core.paginator import EmptyPage, Paginator
 
 
-def list_news(request):
+def _page_number(raw):
+    try:
+        return max(int(raw), 1)
+    except (TypeError, ValueError):
+        return 1
+
+
+def _render_home_feed(page):
     news_queryset = (
         Berita.objects.filter(is_published=True)
         .select_related("kategori", "penulis")
-        .prefetch_related("reactions")
         .order_by("-tanggal_dibuat")
     )
-    all_news = list(news_queryset)
-    featured_news = all_news[0] if all_news else None
-    other_news_list = all_news[1:] if len(all_news) > 1 else []
+    # featured + satu halaman saja yang diambil dari DB
+    featured_news = news_queryset.first()
+    other_news_queryset = (
+        news_queryset.exclude(pk=featured_news.pk) if featured_news else news_queryset
+    )
 
-    # Paginate other_news_list
-    paginator = Paginator(other_news_list, 6)  # Show 6 news items per page
-    page = request.GET.get("page", 1)
+    paginator = Paginator(other_news_queryset, 6)  # Show 6 news items per page
     try:
         other_news = paginator.page(page)
-    except PageNotAnInteger:
-        other_news = paginator.page(1)
     except EmptyPage:
         other_news = paginator.page(paginator.num_pages)
 
+    visible_news = list(other_news.object_list)
+    if featured_news:
+        visible_news.append(featured_news)
+
+    html = render_to_string(
+        "portal_berita/_home_feed.html",
+        {"featured_news": featured_news, "other_news": other_news},
+    )
+    return {
+        "html": html,
+        "news_ids": [str(news.id) for news in visible_news],
+        "has_next_page": other_news.has_next(),
+        "next_page_number": other_news.next_page_number()
+        if other_news.has_next()
+        else None,
+    }
+
+
+def _render_home_popular():
     most_popular_news = Berita.objects.filter(is_published=True).order_by("-views")[:5]
+    return {
+        "html": render_to_string(
+            "portal_berita/_home_popular.html",
+            {"most_popular_news": most_popular_news},
+        )
+    }
+
+
+def _render_home_scores():
     try:
-        live_scores = Scoreboard.objects.filter(status__in=["live", "recent"]).order_by(
-            "-tanggal"
-        )[:3]
+        live_scores = list(
+            Scoreboard.objects.filter(status__in=["live", "recent"]).order_by(
+                "-tanggal"
+            )[:3]
+        )
     except Exception:
         live_scores = []
+    return {
+        "html": render_to_string(
+            "portal_berita/_home_scores.html", {"live_scores": live_scores}
+        )
+    }
 
+
+def _render_home_products():
     try:
-        featured_products = Product.objects.filter(is_featured=True, status="active")[
-            :3
-        ]
+        featured_products = list(
+            Product.objects.filter(is_featured=True, status="active")[:3]
+        )
     except Exception:
         featured_products = []
+    home_cache.remember_featured_product_ids(str(p.pk) for p in featured_products)
+    return {
+        "html": render_to_string(
+            "portal_berita/_home_products.html",
+            {"featured_products": featured_products},
+        )
+    }
+
+
+def list_news(request):
+    page = _page_number(request.GET.get("page", 1))
+
+    # pengunjung anonim tanpa cookie mendapat respons penuh dari cache
+    cached = home_cache.get_response(request, page)
+    if cached is not None:
+        return HttpResponse(cached)
+
+    home_feed = home_cache.fragment(
+        "feed", "news", lambda: _render_home_feed(page), vary=page
+    )
+    home_popular = home_cache.fragment("popular", "news", _render_home_popular)
+    home_scores = home_cache.fragment("scores", "scores", _render_home_scores)
+    home_products = home_cache.fragment("products", "products", _render_home_products)
 
-    news_ids = [news.id for news in all_news]
+    # reaksi user disuntikkan terpisah agar fragment bisa dipakai bersama
     user_reactions = {}
-    if request.user.is_authenticated and news_ids:
+    if request.user.is_authenticated and home_feed["news_ids"]:
         user_reactions = {
             str(reaction.berita_id): reaction.reaction_type
             for reaction in NewsReaction.objects.filter(
                 user=request.user,
-                berita_id__in=news_ids,
+                berita_id__in=home_feed["news_ids"],
             )
         }
 
     context = {
-        "featured_news": featured_news,
-        "other_news": other_news,
-        "most_popular_news": most_popular_news,
-        "live_scores": live_scores,
-        "featured_products": featured_products,
-        "has_next_page": other_news.has_next(),
-        "next_page_number": other_news.next_page_number()
-        if other_news.has_next()
-        else None,
+        "home_feed": home_feed,
+        "home_popular": home_popular,
+        "home_scores": home_scores,
+        "home_products": home_products,
+        "has_next_page": home_feed["has_next_page"],
+        "next_page_number": home_feed["next_page_number"],
         "user_reactions_json": json.dumps(user_reactions),
         "reaction_login_url": reverse("portal_berita:login"),
     }
-    return render(request, "portal_berita/list_news.html", context)
+    response = render(request, "portal_berita/list_news.html", context)
+    home_cache.store_response(request, page, response.content)
+    return response
 
 
 def load_more_news(request):
@@ -202,14 +277,14 @@ def load_more_news(request):
 
     all_news = (
         Berita.objects.filter(is_published=True)
-        .prefetch_related("reactions")
+        .select_related("kategori")
         .order_by("-tanggal_dibuat")
     )
-    # Exclude the featured news if it exists
-    if all_news.exists():
-        all_news = all_news[1:]  # Skip the first one (featured)
-
-    news_to_load = list(all_news[offset : offset + limit])
+    # Skip the featured news (first row) and fetch one extra row for has_more
+    start = offset + 1
+    news_to_load = list(all_news[start : start + limit + 1])
+    has_more = len(news_to_load) > limit
+    news_to_load = news_to_load[:limit]
 
     user_reaction_map = {}
     if request.user.is_authenticated and news_to_load:
@@ -251,8 +326,6 @@ def load_more_news(request):
             }
         )
 
-    has_more = (offset + limit) < len(all_news)
-
     return JsonResponse({"news": data, "has_more": has_more})
 
 
@@ -279,25 +352,30 @@ def react_to_news(request, id):
 
     berita = get_object_or_404(Berita, id=id)
 
-    reaction, created = NewsReaction.objects.get_or_create(
-        berita=berita,
-        user=request.user,
-        defaults={"reaction_type": reaction_type},
-    )
+    with transaction.atomic():
+        reaction, created = NewsReaction.objects.select_for_update().get_or_create(
+            berita=berita,
+            user=request.user,
+            defaults={"reaction_type": reaction_type},
+        )
 
-    if not created:
-        if reaction.reaction_type == reaction_type:
-            reaction.delete()
-            user_reaction = None
-            state = "removed"
+        if not created:
+            previous = reaction.reaction_type
+            if previous == reaction_type:
+                reaction.delete()
+                user_reaction = None
+                state = "removed"
+            else:
+                reaction.reaction_type = reaction_type
+                reaction.save(update_fields=["reaction_type"])
+                user_reaction = reaction_type
+                state = "updated"
         else:
-            reaction.reaction_type = reaction_type
-            reaction.save(update_fields=["reaction_type"])
+            previous = None
             user_reaction = reaction_type
-            state = "updated"
-    else:
-        user_reaction = reaction_type
-        state = "created"
+            state = "created"
+
+        berita.apply_reaction_change(previous, user_reaction)
 
     return JsonResponse(
         {
@@ -310,14 +388,35 @@ def react_to_news(request, id):
     )
 
 
+def _news_list_version(request):
+    # views/reaksi berubah lewat UPDATE tanpa menyentuh tanggal_diperbarui,
+    # jadi counter-nya ikut dijumlahkan (per jenis, supaya like -> love terlihat)
+    return tuple(
+        Berita.objects.filter(is_published=True)
+        .aggregate(
+            count=Count("id"),
+            updated=Max("tanggal_diperbarui"),
+            views=Sum("views"),
+            comments=Sum("comment_count"),
+            like=Sum("like_count"),
+            love=Sum("love_count"),
+            fire=Sum("fire_count"),
+            wow=Sum("wow_count"),
+            sad=Sum("sad_count"),
+        )
+        .values()
+    )
+
+
 @require_GET
+@conditional(etag_func=_news_list_version, per_user=True)
 def news_list_json(request):
     per_page = max(1, min(int(request.GET.get("per_page", 6)), 30))
     page_number = request.GET.get("page", 1)
     news_queryset = (
         Berita.objects.filter(is_published=True)
         .order_by("-tanggal_dibuat")
-        .prefetch_related("reactions")
+        .select_related("kategori", "penulis")
     )
     paginator = Paginator(news_queryset, per_page)
     page_obj = paginator.get_page(page_number)
@@ -613,6 +712,7 @@ def create_comment_flutter(request, id):
     news = get_object_or_404(Berita, id=id)
 
     comment = Comment.objects.create(berita=news, user=request.user, content=content)
+    news.bump_comment_count()
 
     return JsonResponse(
         {
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scoreboard', '0004_scoreboard_logo_tim1_scoreboard_logo_tim2'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scoreboard',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
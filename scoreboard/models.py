@@ -26,6 +26,8 @@ class Scoreboard(models.Model):
     tanggal = models.DateTimeField(default=timezone.now)
     sport = models.CharField(max_length=10, choices=SPORT_CHOICES)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='upcoming')
+    # validator ETag /api/scoreboard/ (lihat scoreboard.views.scores_version)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.tim1} vs {self.tim2} ({self.sport}) - {self.status}"
@@ -3,12 +3,15 @@ from django.utils import timezone
 from django.contrib.auth.decorators import user_passes_test, login_required
 from .models import Scoreboard
 from .forms import ScoreBoardForm
+from django.db.models import Count, Max
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
 from django.utils.html import strip_tags
 import json
 
+from sport_watch.conditional import conditional
+
 
 def _extract_request_data(request):
     """
@@ -102,6 +105,13 @@ def delete_score(request, pk):
         return redirect('scoreboard:scoreboard_management')
     return render(request, 'scoreboard/confirm_delete.html', {'score': item})
 
+def scores_version(request):
+    # dari data, bukan token versi di cache: skor yang diubah proses lain
+    # (worker lain, import_scoreboard_csv) tetap mengganti ETag
+    return tuple(Scoreboard.objects.aggregate(n=Count('id'), updated=Max('updated_at')).values())
+
+
+@conditional(etag_func=scores_version)
 def filter_scores(request):
     status = request.GET.get('status')
     sport = request.GET.get('sport')
@@ -4,6 +4,8 @@ from .models import Category, Brand, Product, ProductImage, Review
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
     list_display = ("full_path", "parent", "created_at")
+    # full_path/parent memakai pohon kategori yang di-cache (shop.category_tree)
+    list_select_related = ("parent",)
     search_fields = ("name", "slug")
     prepopulated_fields = {"slug": ("name",)}
 
@@ -22,6 +24,7 @@ class ProductAdmin(admin.ModelAdmin):
     list_display = ("name", "category", "brand", "price", "sale_price",
                     "stock", "status", "is_featured", "rating_avg", "rating_count")
     list_filter  = ("status", "is_featured", "category", "brand")
+    list_select_related = ("category", "brand")
     search_fields = ("name", "slug", "description")
     prepopulated_fields = {"slug": ("name",)}
     inlines = [ProductImageInline]
@@ -0,0 +1,142 @@
+"""Pohon kategori produk yang dimuat sekali lalu di-cache.
+
+``Category.full_path`` dulu berjalan ke atas lewat ``parent`` (satu query per
+leluhur). Di sini seluruh tabel Category dibaca dengan satu query, path dan
+turunan dihitung di memori, lalu disimpan di Django cache. Signal di
+``shop.signals`` memanggil ``invalidate()`` setiap kali Category berubah.
+
+Setiap proses juga menyimpan salinan lokal yang hanya dipakai selama token
+versi di cache masih sama, jadi pemanggilan berulang (mis. ``__str__`` untuk
+setiap opsi select) cukup membaca satu string dari cache.
+
+Dengan cache per proses (LocMem) invalidasi dari worker atau command lain
+tidak terlihat, jadi token versi dan salinan lokal kedaluwarsa setelah
+``CACHE_VERSION_TTL`` detik; dengan Redis/Memcached invalidasi langsung berlaku.
+"""
+
+import time
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+from sport_watch.caching import version_timeout
+
+VERSION_KEY = "shop:category_tree:version"
+TREE_KEY = "shop:category_tree:{version}"
+TIMEOUT = 60 * 60
+
+# (versi, pohon, kedaluwarsa) - diganti sebagai satu tuple supaya aman antar-thread
+_local = (None, None, 0.0)
+
+
+class CategoryTree:
+    def __init__(self, rows):
+        # rows: (id, name, slug, parent_id, path)
+        self.nodes = {}
+        self.children = {}
+        self.by_slug = {}
+        for pk, name, slug, parent_id, path in rows:
+            self.nodes[pk] = {"name": name, "slug": slug, "parent_id": parent_id, "path": path}
+            self.children.setdefault(parent_id, []).append(pk)
+            self.by_slug.setdefault(slug, []).append(pk)
+        self.paths = {}
+        self.ancestors = {}
+        for pk in self.nodes:
+            self._resolve(pk)
+
+    def _resolve(self, pk):
+        if pk in self.ancestors:
+            return self.ancestors[pk]
+        chain, seen, node = [], set(), pk
+        # iteratif agar aman untuk pohon dalam; ``seen`` menjaga data siklik
+        while node is not None and node in self.nodes and node not in seen:
+            seen.add(node)
+            chain.append(node)
+            node = self.nodes[node]["parent_id"]
+        chain.reverse()
+        for depth, node in enumerate(chain):
+            if node not in self.ancestors:
+                self.ancestors[node] = chain[:depth]
+                self.paths[node] = " / ".join(self.nodes[n]["name"] for n in chain[: depth + 1])
+        return self.ancestors[pk]
+
+    def __contains__(self, pk):
+        return pk in self.nodes
+
+    def full_path(self, pk):
+        return self.paths.get(pk, "")
+
+    def descendant_ids(self, pk, include_self=True):
+        result = [pk] if include_self else []
+        stack = list(self.children.get(pk, ()))
+        while stack:
+            node = stack.pop()
+            result.append(node)
+            stack.extend(self.children.get(node, ()))
+        return result
+
+    def subtree_q(self, slug, field="category"):
+        """Q untuk objek di kategori ``slug`` beserta semua turunannya.
+
+        Tiap kategori cocok menjadi satu prefix ``path__startswith``; slug hanya
+        unik per parent sehingga bisa ada lebih dari satu kategori.
+        """
+        q = Q(pk__in=[])
+        for pk in self.by_slug.get(slug, ()):
+            path = self.nodes[pk]["path"]
+            if path:
+                q |= Q(**{f"{field}__path__startswith": path})
+        return q
+
+    def options(self):
+        """``(id, full_path)`` untuk semua kategori, urut berdasarkan path."""
+        return sorted(
+            ((pk, self.paths[pk]) for pk in self.nodes), key=lambda item: item[1].lower()
+        )
+
+
+def _build():
+    from shop.models import Category
+
+    rows = Category.objects.order_by().values_list("id", "name", "slug", "parent_id", "path")
+    return CategoryTree(rows)
+
+
+def current_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, timeout=version_timeout())
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def get_tree(fresh=False):
+    """Pohon kategori dari cache; ``fresh=True`` membaca ulang dari DB tanpa cache."""
+    global _local
+    if fresh:
+        return _build()
+    version = current_version()
+    local_version, local_tree, expires = _local
+    if local_version == version and time.monotonic() < expires:
+        return local_tree
+    key = TREE_KEY.format(version=version)
+    tree = cache.get(key)
+    if tree is None:
+        tree = _build()
+        cache.set(key, tree, TIMEOUT)
+    ttl = version_timeout()
+    _local = (version, tree, float("inf") if ttl is None else time.monotonic() + ttl)
+    return tree
+
+
+def _bump():
+    cache.set(VERSION_KEY, uuid.uuid4().hex, timeout=version_timeout())
+
+
+def invalidate():
+    # sekali sekarang, sekali lagi setelah commit: request lain bisa saja
+    # membangun ulang pohon dari data lama sebelum transaksi selesai
+    _bump()
+    transaction.on_commit(_bump)
@@ -0,0 +1,129 @@
+"""Ekspor katalog produk (``show_json``) secara streaming.
+
+Produk dibaca dengan ``.iterator(chunk_size=...)`` dan di-encode per baris,
+jadi memori puncak tidak lagi bergantung pada ukuran katalog dan klien mulai
+menerima data sebelum query selesai. Validator (ETag/Last-Modified) dihitung
+dari satu aggregate supaya katalog yang tidak berubah cukup dijawab 304.
+"""
+
+import hashlib
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Max
+
+from .models import Product
+
+EXPORT_CHUNK_SIZE = 500
+# baris yang digabung per potongan body; menghindari ribuan write kecil
+ROWS_PER_WRITE = 50
+
+NDJSON_CONTENT_TYPE = "application/x-ndjson"
+
+_encoder = DjangoJSONEncoder(ensure_ascii=True)
+
+
+def export_queryset():
+    return (
+        Product.objects
+        .filter(status="active")
+        .select_related("category", "brand", "created_by")
+        .order_by("-created_at", "-id")
+    )
+
+
+def product_row(p):
+    return {
+        "model": "shop.product",
+        "pk": str(p.id),
+        "fields": {
+            "created_at": p.created_at.isoformat(),
+            "updated_at": p.updated_at.isoformat(),
+            "created_by": p.created_by_id,
+            "owner_username": (
+                p.created_by.username if p.created_by_id else None
+            ),
+            "category": p.category.name if p.category else "",
+            "brand": p.brand.name if p.brand else None,
+            "name": p.name,
+            "slug": p.slug,
+            "description": p.description,
+            "price": str(p.price),
+            "sale_price": str(p.sale_price) if p.sale_price is not None else None,
+            "currency": p.currency,          # mis. "IDR"
+            "stock": p.stock,
+            "total_sold": p.total_sold,
+            "thumbnail": p.thumbnail or "",
+            "is_featured": p.is_featured,
+            "status": p.status,              # "active"
+            "rating_avg": float(p.rating_avg),
+            "rating_count": p.rating_count,
+        },
+    }
+
+
+def _encoded_rows(qs, chunk_size):
+    for p in qs.iterator(chunk_size=chunk_size):
+        yield _encoder.encode(product_row(p))
+
+
+def iter_json_array(qs=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """Potongan body berupa satu JSON array, identik dengan ``JsonResponse(list)``."""
+    rows = _encoded_rows(qs if qs is not None else export_queryset(), chunk_size)
+    yield "["
+    buf, first = [], True
+    for row in rows:
+        buf.append(row)
+        if len(buf) >= ROWS_PER_WRITE:
+            yield ("" if first else ", ") + ", ".join(buf)
+            buf, first = [], False
+    if buf:
+        yield ("" if first else ", ") + ", ".join(buf)
+    yield "]"
+
+
+def iter_ndjson(qs=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """Satu objek JSON per baris (``application/x-ndjson``)."""
+    rows = _encoded_rows(qs if qs is not None else export_queryset(), chunk_size)
+    buf = []
+    for row in rows:
+        buf.append(row + "\n")
+        if len(buf) >= ROWS_PER_WRITE:
+            yield "".join(buf)
+            buf = []
+    if buf:
+        yield "".join(buf)
+
+
+def catalogue_state(request=None):
+    """``(etag, last_modified)`` katalog aktif, dari satu aggregate.
+
+    Memakai ``updated_at`` terbaru produk beserta brand/kategorinya (nama
+    keduanya ikut diekspor) dan jumlah produk, supaya penghapusan produk juga
+    mengubah ETag. Hasil disimpan di ``request`` karena decorator ``condition``
+    memanggil fungsi ETag dan Last-Modified secara terpisah.
+    """
+    cached = getattr(request, "_catalogue_state", None)
+    if cached is not None:
+        return cached
+
+    row = export_queryset().order_by().aggregate(
+        count=Count("id"),
+        product=Max("updated_at"),
+        category=Max("category__updated_at"),
+        brand=Max("brand__updated_at"),
+    )
+    stamps = [row[k] for k in ("product", "category", "brand") if row[k] is not None]
+    last_modified = max(stamps) if stamps else None
+    raw = "|".join([str(row["count"])] + [str(row[k]) for k in ("product", "category", "brand")])
+    state = (hashlib.md5(raw.encode()).hexdigest(), last_modified)
+    if request is not None:
+        request._catalogue_state = state
+    return state
+
+
+def wants_ndjson(request):
+    fmt = request.GET.get("format", "").lower()
+    if fmt:
+        return fmt == "ndjson"
+    return NDJSON_CONTENT_TYPE in request.headers.get("Accept", "")
@@ -1,15 +1,26 @@
 import json
 from django.core.management.base import BaseCommand
-from shop.models import Product, Category, Brand
+from shop.product_import import ProductImportPipeline
 from django.contrib.auth import get_user_model
-from django.utils.text import slugify
 from decimal import Decimal
 
+KNOWN_BRANDS = ("Nike", "Adidas", "New Balance", "Puma", "Converse", "Vans", "Crocs", "Asics")
+
+
+def infer_brand(name):
+    # Attempt to infer brand from product name
+    for brand in KNOWN_BRANDS:
+        if brand in name:
+            return brand
+    return "Unknown Brand"
+
+
 class Command(BaseCommand):
     help = 'Imports product data from a JSON file into the Product model.'
 
     def add_arguments(self, parser):
         parser.add_argument('json_file', type=str, help='Path to the JSON file containing product data.')
+        parser.add_argument('--batch-size', type=int, default=500, help='Products written per bulk upsert.')
 
     def handle(self, *args, **options):
         json_file_path = options['json_file']
@@ -26,66 +37,47 @@ class Command(BaseCommand):
             self.stdout.write(self.style.ERROR(f"Invalid JSON in file: {json_file_path}"))
             return
 
-        # Get or create default category and brand
-        default_category, _ = Category.objects.get_or_create(name='Scraped Products', defaults={'slug': 'scraped-products'})
-        default_brand, _ = Brand.objects.get_or_create(name='Unknown Brand', defaults={'slug': 'unknown-brand'})
-
-        for item in products_data:
-            name = item.get('name', 'Unknown Product')
-            if not name or name == 'Unknown Product':
-                continue
+        pipeline = ProductImportPipeline(
+            key=('name', 'category'),
+            batch_size=options['batch_size'],
+            default_category='Scraped Products',
+        )
+        rows = []
+        with pipeline.stage('parse'):
+            for item in products_data:
+                name = item.get('name', 'Unknown Product')
+                if not name or name == 'Unknown Product':
+                    pipeline.stats.skipped += 1
+                    continue
 
-            price_val = item.get('price', '0')
-            image_url = item.get('image_url', '')
-            product_url = item.get('product_url', '')
+                price_val = item.get('price', '0')
+                image_url = item.get('image_url', '')
+                product_url = item.get('product_url', '')
 
-            try:
-                # Clean and convert price to Decimal
-                price_str = str(price_val)
-                price = Decimal(price_str.replace('Rp.', '').replace('.', '').strip())
-            except (ValueError, TypeError):
-                price = Decimal('0.00')
+                try:
+                    # Clean and convert price to Decimal
+                    price_str = str(price_val)
+                    price = Decimal(price_str.replace('Rp.', '').replace('.', '').strip())
+                except (ValueError, TypeError, ArithmeticError):
+                    price = Decimal('0.00')
 
-            if price == Decimal('0.00'):
-                continue
+                if price == Decimal('0.00'):
+                    pipeline.stats.skipped += 1
+                    continue
 
-            # Attempt to infer brand from product name
-            brand_name_inferred = "Unknown Brand"
-            if "Nike" in name:
-                brand_name_inferred = "Nike"
-            elif "Adidas" in name:
-                brand_name_inferred = "Adidas"
-            elif "New Balance" in name:
-                brand_name_inferred = "New Balance"
-            elif "Puma" in name:
-                brand_name_inferred = "Puma"
-            elif "Converse" in name:
-                brand_name_inferred = "Converse"
-            elif "Vans" in name:
-                brand_name_inferred = "Vans"
-            elif "Crocs" in name:
-                brand_name_inferred = "Crocs"
-            elif "Asics" in name:
-                brand_name_inferred = "Asics"
-            
-            product_brand, _ = Brand.objects.get_or_create(name=brand_name_inferred, defaults={'slug': slugify(brand_name_inferred)})
-            
-            # Create or update the Product object
-            Product.objects.update_or_create(
-                name=name,
-                defaults={
+                rows.append({
+                    'name': name,
+                    'category': 'Scraped Products',
+                    'brand': infer_brand(name),
+                    'created_by_id': admin_user.pk,
                     'price': price,
                     'thumbnail': image_url,
                     'description': f"Original Product URL: {product_url}",
-                    'category': default_category, 
-                    'brand': product_brand, 
-                    'created_by': admin_user,
                     'stock': 10, # Default stock
                     'is_featured': False,
                     'status': 'active',
                     'currency': 'IDR',
-                }
-            )
-            self.stdout.write(self.style.SUCCESS(f"Imported/Updated product: {name}"))
+                })
 
-        self.stdout.write(self.style.SUCCESS("Product import complete."))
+        stats = pipeline.run(rows)
+        self.stdout.write(self.style.SUCCESS(f"Product import complete. {stats.summary()}"))
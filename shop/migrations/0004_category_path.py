@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2025-12-11 09:37
+
+from django.db import migrations, models
+
+
+def fill_paths(apps, schema_editor):
+    Category = apps.get_model('shop', 'Category')
+    rows = list(Category.objects.values_list('id', 'parent_id'))
+    children = {}
+    for pk, parent_id in rows:
+        children.setdefault(parent_id, []).append(pk)
+
+    paths = {}
+    stack = [(pk, '') for pk in children.get(None, [])]
+    while stack:
+        pk, prefix = stack.pop()
+        paths[pk] = f'{prefix}{pk.hex}/'
+        stack.extend((child, paths[pk]) for child in children.get(pk, []))
+
+    for pk, path in paths.items():
+        Category.objects.filter(pk=pk).update(path=path)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0003_alter_brand_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=330),
+        ),
+        migrations.RunPython(fill_paths, migrations.RunPython.noop),
+    ]
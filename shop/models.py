@@ -1,10 +1,15 @@
 # shop/models.py
 import uuid
-from django.db import models
+from functools import partial
+from django.db import models, transaction
+from django.db.models import Value
+from django.db.models.functions import Concat, Substr
 from django.utils.text import slugify
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator, MaxValueValidator
 
+from shop.slugs import save_with_unique_slug
+
 User = get_user_model()
 
 
@@ -25,6 +30,9 @@ class Category(TimeStampedUUIDModel):
     parent = models.ForeignKey(
         'self', null=True, blank=True, on_delete=models.CASCADE, related_name='children'
     )
+    # materialized path: "<id leluhur>/.../<id sendiri>/" (uuid hex), dijaga oleh save()
+    # sehingga satu subtree = satu query prefix (path__startswith)
+    path = models.CharField(max_length=330, db_index=True, editable=False, default="")
 
     class Meta:
         ordering = ["name"]
@@ -36,17 +44,47 @@ class Category(TimeStampedUUIDModel):
 
     @property
     def full_path(self) -> str:
-        # tampilkan path lengkap
+        # tampilkan path lengkap; leluhur diambil dari pohon yang di-cache
+        from shop.category_tree import get_tree
+
+        if not self.parent_id:
+            return self.name
+        tree = get_tree()
+        if self.parent_id in tree:
+            return f"{tree.full_path(self.parent_id)} / {self.name}"
         names, node = [self.name], self.parent
         while node:
             names.append(node.name)
             node = node.parent
         return " / ".join(reversed(names))
 
+    def subtree_q(self, field="category"):
+        """Q untuk objek yang ``field``-nya kategori ini atau turunannya."""
+        return models.Q(**{f"{field}__path__startswith": self.path})
+
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.name)
-        super().save(*args, **kwargs)
+
+        old_path = self.path
+        parent_path = ""
+        if self.parent_id:
+            parent_path = Category.objects.values_list("path", flat=True).get(pk=self.parent_id)
+            if old_path and parent_path.startswith(old_path):
+                raise ValueError("Kategori tidak boleh dipindah ke dalam turunannya sendiri.")
+        self.path = f"{parent_path}{self.pk.hex}/"
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and self.path != old_path:
+            kwargs["update_fields"] = {*update_fields, "path"}
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if old_path and old_path != self.path:
+                # pindah parent: tulis ulang path seluruh turunan dengan satu UPDATE
+                Category.objects.filter(path__startswith=old_path).exclude(pk=self.pk).update(
+                    path=Concat(Value(self.path), Substr("path", len(old_path) + 1))
+                )
 
 
 class Brand(TimeStampedUUIDModel):
@@ -62,16 +100,10 @@ class Brand(TimeStampedUUIDModel):
         return self.name
 
     def save(self, *args, **kwargs):
-        base_slug = slugify(self.slug or self.name) or "brand"
-        candidate = base_slug
-        suffix = 1
-
-        while Brand.objects.filter(slug=candidate).exclude(pk=self.pk).exists():
-            suffix += 1
-            candidate = f"{base_slug}-{suffix}"
-
-        self.slug = candidate
-        super().save(*args, **kwargs)
+        # slug eksplisit dipertahankan selama belum dipakai brand lain
+        save_with_unique_slug(
+            self, partial(super().save, *args, **kwargs), self.slug or self.name, fallback="brand"
+        )
 
 
 class Product(TimeStampedUUIDModel):
@@ -159,15 +191,10 @@ class Product(TimeStampedUUIDModel):
         self.save(update_fields=["stock", "updated_at"])
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            base = slugify(self.name)
-            #  unik walau nama sama
-            candidate, i = base, 1
-            while Product.objects.filter(slug=candidate).exclude(pk=self.pk).exists():
-                i += 1
-                candidate = f"{base}-{i}"
-            self.slug = candidate
-        super().save(*args, **kwargs)
+        if self.slug:
+            return super().save(*args, **kwargs)
+        #  unik walau nama sama
+        save_with_unique_slug(self, partial(super().save, *args, **kwargs), self.name, fallback="product")
 
 
 class ProductImage(TimeStampedUUIDModel):
@@ -0,0 +1,79 @@
+# shop/pagination.py
+# keyset (cursor) pagination untuk katalog produk
+import base64
+import json
+import uuid
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _keys_for_sort(sort):
+    # urutan kunci sesuai dengan order_by di products_json
+    if sort in ("price_asc", "price_desc"):
+        return ("effective_price", "created_at", "id")
+    return ("created_at", "id")
+
+
+def encode_cursor(obj, sort):
+    values = []
+    for key in _keys_for_sort(sort):
+        value = getattr(obj, key)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        values.append(str(value))
+    raw = json.dumps({"s": sort or "", "k": values}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token, sort):
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        values = data["k"]
+        cursor_sort = data["s"]
+    except (ValueError, TypeError, KeyError):
+        raise InvalidCursor("cursor tidak valid")
+
+    keys = _keys_for_sort(sort)
+    if cursor_sort != (sort or "") or len(values) != len(keys):
+        raise InvalidCursor("cursor tidak cocok dengan sort")
+
+    parsed = {}
+    try:
+        for key, value in zip(keys, values):
+            if key == "effective_price":
+                parsed[key] = Decimal(value)
+            elif key == "created_at":
+                parsed[key] = datetime.fromisoformat(value)
+            else:
+                parsed[key] = uuid.UUID(value)
+    except (ValueError, TypeError, InvalidOperation):
+        raise InvalidCursor("cursor tidak valid")
+    return parsed
+
+
+def keyset_filter(qs, sort, cursor):
+    """Ambil baris sesudah ``cursor`` tanpa OFFSET.
+
+    Urutan harus sama dengan ``order_by`` yang dipakai view:
+    price_asc  -> effective_price ASC, created_at DESC, id DESC
+    price_desc -> effective_price DESC, created_at DESC, id DESC
+    lainnya    -> created_at DESC, id DESC
+    """
+    created_at, pk = cursor["created_at"], cursor["id"]
+    tail = Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+
+    if sort in ("price_asc", "price_desc"):
+        price = cursor["effective_price"]
+        if sort == "price_asc":
+            head = Q(effective_price__gt=price)
+        else:
+            head = Q(effective_price__lt=price)
+        return qs.filter(head | (Q(effective_price=price) & tail))
+    return qs.filter(tail)
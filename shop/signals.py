@@ -1,13 +1,16 @@
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.db.models import Avg, Count
-from .models import Review, Product
+from . import category_tree
+from .models import Category, Review, Product
+from .product_import import products_imported
 
 def _recalc(product: Product):
     agg = product.reviews.aggregate(avg=Avg("rating"), cnt=Count("id"))
     product.rating_avg = agg["avg"] or 0
     product.rating_count = agg["cnt"] or 0
-    product.save(update_fields=["rating_avg", "rating_count"])
+    # updated_at ikut disimpan: ETag katalog/produk dihitung dari MAX(updated_at)
+    product.save(update_fields=["rating_avg", "rating_count", "updated_at"])
 
 @receiver(post_save, sender=Review)
 def review_saved(sender, instance, **kwargs):
@@ -16,3 +19,14 @@ def review_saved(sender, instance, **kwargs):
 @receiver(post_delete, sender=Review)
 def review_deleted(sender, instance, **kwargs):
     _recalc(instance.product)
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed(sender, instance, **kwargs):
+    category_tree.invalidate()
+
+@receiver(products_imported)
+def categories_imported(sender, categories, **kwargs):
+    # kategori dari importer dibuat dengan bulk_create (tanpa post_save)
+    if categories:
+        category_tree.invalidate()
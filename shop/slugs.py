@@ -0,0 +1,93 @@
+"""Alokasi slug unik untuk ``Product`` dan ``Brand``.
+
+Dulu ``save()`` mencoba ``nama``, ``nama-2``, ``nama-3``, ... dengan satu query
+per percobaan, jadi nama populer (dan importer) menjadi kuadratik. Sekarang:
+
+- ``next_slug`` membaca slug ``<base>`` / ``<base>-<n>`` dengan satu query
+  (regex, bukan ``startswith`` yang ikut memuat ``<base>-apa-saja``) lalu
+  memakai suffix tertinggi + 1.
+- ``save_with_unique_slug`` menjalankan save di dalam savepoint; jika proses lain
+  lebih dulu memakai slug yang sama (``IntegrityError``), slug dihitung ulang
+  dan save diulang.
+- ``SlugAllocator`` untuk batch (importer): semua slug dimuat sekali lalu
+  dibagikan di memori.
+"""
+
+import re
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils.text import slugify
+
+MAX_ATTEMPTS = 5
+
+
+def _base(value, fallback, max_length):
+    # sisakan ruang untuk suffix "-<n>"
+    return (slugify(value) or fallback)[: max_length - 8].strip("-") or fallback
+
+
+def next_slug(model, value, fallback="item", exclude_pk=None):
+    """Slug unik untuk ``value``: base jika masih kosong, selain itu base-(max+1).
+
+    ``<base>-<n>`` hanya dihitung sebagai suffix bentrok jika nama barisnya
+    sendiri tidak menghasilkan slug itu, jadi "air-max-90" milik produk
+    "Air Max 90" tidak membuat "Air Max" berikutnya menjadi "air-max-91".
+    """
+    max_length = model._meta.get_field("slug").max_length
+    base = _base(value, fallback, max_length)
+    rows = model._default_manager.filter(
+        Q(slug=base) | Q(slug__regex=rf"^{re.escape(base)}-[0-9]+$")
+    )
+    if exclude_pk is not None:
+        rows = rows.exclude(pk=exclude_pk)
+
+    taken = set()
+    highest = 1
+    for slug, name in rows.values_list("slug", "name").order_by():
+        taken.add(slug)
+        if slug != base and _base(name, fallback, max_length) != slug:
+            highest = max(highest, int(slug.rpartition("-")[2]))
+    if base not in taken:
+        return base
+    n = highest + 1
+    while f"{base}-{n}" in taken:  # slug alami yang kebetulan berbentuk suffix
+        n += 1
+    return f"{base}-{n}"
+
+
+def save_with_unique_slug(instance, save, value, fallback="item"):
+    """Isi ``instance.slug`` lalu panggil ``save()``; diulang jika slug direbut proses lain."""
+    model = type(instance)
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        instance.slug = next_slug(model, value, fallback, exclude_pk=instance.pk)
+        try:
+            with transaction.atomic():
+                return save()
+        except IntegrityError:
+            # hanya bentrok slug yang diulang; constraint lain tetap dilempar
+            clash = model._default_manager.filter(slug=instance.slug).exclude(pk=instance.pk)
+            if attempt == MAX_ATTEMPTS or not clash.exists():
+                raise
+
+
+class SlugAllocator:
+    """Slug unik di memori terhadap set slug yang sudah ada (dimuat sekali)."""
+
+    def __init__(self, taken, fallback="item"):
+        self.taken = set(taken)
+        self.fallback = fallback
+        self._next = {}
+
+    def allocate(self, value):
+        base = slugify(value) or self.fallback
+        candidate = base
+        if candidate in self.taken:
+            # lanjut dari suffix terakhir yang dibagikan untuk base ini
+            i = self._next.get(base, 2)
+            while f"{base}-{i}" in self.taken:
+                i += 1
+            candidate = f"{base}-{i}"
+            self._next[base] = i + 1
+        self.taken.add(candidate)
+        return candidate
@@ -1,10 +1,23 @@
 # shop/tests.py
+import json
+import os
+import tempfile
+import time
+from datetime import timedelta
 from decimal import Decimal
+from io import StringIO
+from unittest import mock
+from django.conf import settings
+from django.core.management import call_command
 from django.test import TestCase
 from django.urls import reverse
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from django.utils.text import slugify
-from shop.models import Category, Brand, Product
+from shop import category_tree
+from shop.models import Category, Brand, Product, Review
+from shop.product_import import ProductImportPipeline
+from shop.slugs import SlugAllocator, next_slug
 
 # Create your tests here.
 
@@ -98,3 +111,333 @@ class TestAdminViews(TestCase):
         self.assertEqual(self.client.get(url).status_code, 302)
         self.client.login(username="staff", password="x")
         self.assertEqual(self.client.get(url).status_code, 200)
+
+
+class TestProductsCursorPagination(TestCase):
+    def setUp(self):
+        self.cat = make_category("Shoes", slug="shoes")
+        self.brand = make_brand("Puma")
+        for i in range(7):
+            make_product(name=f"P{i}", category=self.cat, brand=self.brand, price=100 + (i % 3) * 10)
+
+    def _walk(self, sort=None):
+        url = reverse("api_shop:products")
+        params = {"cursor": "", "per_page": 3}
+        if sort:
+            params["sort"] = sort
+        seen = []
+        while True:
+            r = self.client.get(url, params)
+            self.assertEqual(r.status_code, 200)
+            data = r.json()
+            self.assertNotIn("total_count", data)
+            seen.extend(item["id"] for item in data["results"])
+            if not data["has_next"]:
+                break
+            params["cursor"] = data["next_cursor"]
+        return seen
+
+    def test_cursor_walk_matches_page_mode(self):
+        for sort in (None, "price_asc", "price_desc"):
+            params = {"per_page": 50}  # seed migration ikut terhitung
+            if sort:
+                params["sort"] = sort
+            expected = [i["id"] for i in self.client.get(reverse("api_shop:products"), params).json()["results"]]
+            self.assertEqual(self._walk(sort), expected)
+
+    def test_total_count_optional_and_bad_cursor(self):
+        url = reverse("api_shop:products")
+        expected = self.client.get(url).json()["total_count"]
+        r = self.client.get(url, {"cursor": "", "with_count": "1"})
+        self.assertEqual(r.json()["total_count"], expected)
+        self.assertEqual(self.client.get(url, {"cursor": "garbage"}).status_code, 400)
+
+
+class TestCategoryTree(TestCase):
+    def setUp(self):
+        self.root = make_category("Olahraga")
+        self.football = make_category("Sepak Bola", parent=self.root)
+        self.boots = make_category("Sepatu", parent=self.football)
+        self.running = make_category("Lari", parent=self.root)
+
+    def test_full_path_uses_cached_tree(self):
+        boots = Category.objects.get(pk=self.boots.pk)
+        category_tree.get_tree()
+        with self.assertNumQueries(0):
+            self.assertEqual(str(boots), "Olahraga / Sepak Bola / Sepatu")
+
+    def test_descendant_ids(self):
+        tree = category_tree.get_tree()
+        self.assertCountEqual(
+            tree.descendant_ids(self.root.pk),
+            [self.root.pk, self.football.pk, self.boots.pk, self.running.pk],
+        )
+        self.assertEqual(tree.descendant_ids(self.boots.pk, include_self=False), [])
+
+    def test_rename_invalidates_tree(self):
+        category_tree.get_tree()
+        self.root.name = "Sport"
+        self.root.save()
+        self.assertEqual(Category.objects.get(pk=self.boots.pk).full_path, "Sport / Sepak Bola / Sepatu")
+
+    def test_edit_from_other_process_visible_after_ttl(self):
+        category_tree.get_tree()
+        # UPDATE tanpa signal, seperti perubahan dari worker lain dengan LocMem
+        Category.objects.filter(pk=self.root.pk).update(name="Sport")
+        self.assertEqual(category_tree.get_tree().full_path(self.boots.pk), "Olahraga / Sepak Bola / Sepatu")
+
+        later = time.time() + settings.CACHE_VERSION_TTL + 1
+        with mock.patch("time.time", return_value=later), \
+                mock.patch("time.monotonic", return_value=time.monotonic() + settings.CACHE_VERSION_TTL + 1):
+            self.assertEqual(category_tree.get_tree().full_path(self.boots.pk), "Sport / Sepak Bola / Sepatu")
+
+    def test_materialized_path_follows_moves(self):
+        self.assertEqual(self.boots.path, f"{self.root.pk.hex}/{self.football.pk.hex}/{self.boots.pk.hex}/")
+
+        self.football.parent = self.running
+        self.football.save()
+        self.boots.refresh_from_db()
+        self.assertEqual(
+            self.boots.path,
+            f"{self.root.pk.hex}/{self.running.pk.hex}/{self.football.pk.hex}/{self.boots.pk.hex}/",
+        )
+
+    def test_cannot_move_into_own_subtree(self):
+        self.root.parent = self.boots
+        with self.assertRaises(ValueError):
+            self.root.save()
+
+    def test_parent_category_filter_includes_descendants(self):
+        boots = make_product(name="Predator", category=self.boots)
+        shirt = make_product(name="Singlet", category=self.running)
+        other = make_product(name="Raket", category=make_category("Tenis"))
+
+        r = self.client.get(reverse("shop:list"), {"category": "sepak-bola"})
+        self.assertContains(r, boots.name)
+        self.assertNotContains(r, shirt.name)
+
+        category_tree.get_tree()
+        self.client.cookies.clear()
+        with self.assertNumQueries(2):  # validator ETag + halaman; slug -> path dari pohon yang di-cache
+            r = self.client.get(
+                reverse("api_shop:products"), {"category": "olahraga", "per_page": 50, "cursor": ""}
+            )
+        names = {item["name"] for item in r.json()["results"]}
+        self.assertEqual(names, {boots.name, shirt.name})
+        self.assertNotIn(other.name, names)
+
+
+class TestCatalogueExport(TestCase):
+    def setUp(self):
+        self.brand = make_brand("Adidas")
+        self.product = make_product(name="Ekspor", brand=self.brand)
+        self.url = reverse("api_shop:shop_json")
+
+    def body(self, response):
+        return b"".join(response.streaming_content).decode()
+
+    def test_streams_same_json_array(self):
+        r = self.client.get(self.url)
+        self.assertTrue(r.streaming)
+        data = json.loads(self.body(r))
+        active = Product.objects.filter(status="active").count()
+        self.assertEqual(len(data), active)
+        row = next(d for d in data if d["pk"] == str(self.product.pk))
+        self.assertEqual(row["fields"]["brand"], "Adidas")
+
+    def test_newest_first_like_meta_ordering(self):
+        newer = make_product(name="Ekspor Baru")
+        Product.objects.filter(pk=newer.pk).update(created_at=timezone.now() + timedelta(seconds=5))
+        data = json.loads(self.body(self.client.get(self.url)))
+        self.assertEqual(data[0]["pk"], str(newer.pk))
+        stamps = [d["fields"]["created_at"] for d in data]
+        self.assertEqual(stamps, sorted(stamps, reverse=True))
+
+    def test_ndjson_variant(self):
+        r = self.client.get(self.url, {"format": "ndjson"})
+        self.assertEqual(r["Content-Type"], "application/x-ndjson")
+        lines = self.body(r).splitlines()
+        self.assertEqual(len(lines), Product.objects.filter(status="active").count())
+        self.assertEqual(json.loads(lines[0])["model"], "shop.product")
+
+    def test_unchanged_catalogue_returns_304(self):
+        r = self.client.get(self.url)
+        etag, last_modified = r["ETag"], r["Last-Modified"]
+        self.assertNotEqual(etag, self.client.get(self.url, {"format": "ndjson"})["ETag"])
+
+        with self.assertNumQueries(1):
+            r = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(r.status_code, 304)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+        Brand.objects.filter(pk=self.brand.pk).update(
+            name="Adidas Baru", updated_at=timezone.now() + timedelta(seconds=5)
+        )
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        self.product.delete()
+        r = self.client.get(self.url)
+        self.assertNotEqual(r["ETag"], etag)
+
+
+    def test_review_changes_export_etag(self):
+        r = self.client.get(self.url)
+        etag, last_modified = r["ETag"], r["Last-Modified"]
+        Review.objects.create(product=self.product, user=make_user("exporter"), rating=5)
+
+        r = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(r.status_code, 200)
+        row = next(d for d in json.loads(self.body(r)) if d["pk"] == str(self.product.pk))
+        self.assertEqual((row["fields"]["rating_avg"], row["fields"]["rating_count"]), (5.0, 1))
+        self.assertNotEqual(r["ETag"], etag)
+
+    def test_review_changes_products_api_etag(self):
+        url = reverse("api_shop:products")
+        etag = self.client.get(url)["ETag"]
+        Review.objects.create(product=self.product, user=make_user("reviewer"), rating=4)
+        r = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(r.status_code, 200)
+        row = next(p for p in r.json()["results"] if p["id"] == str(self.product.pk))
+        self.assertEqual(row["rating_count"], 1)
+
+
+class TestBulkProductImport(TestCase):
+    def write_json(self, data):
+        fd, path = tempfile.mkstemp(suffix=".json")
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump(data, fh)
+        self.addCleanup(os.unlink, path)
+        return path
+
+    def feed(self, n, start=0):
+        return [
+            {"name": f"Nike Air Max {i}", "price": 1500000 + i, "image_url": "", "product_url": f"https://x/{i}"}
+            for i in range(start, start + n)
+        ]
+
+    def test_import_products_creates_then_updates(self):
+        out = StringIO()
+        call_command("import_products", self.write_json(self.feed(30)), stdout=out)
+        self.assertIn("created=30, updated=0", out.getvalue())
+        self.assertIn("rows/s", out.getvalue())
+        self.assertEqual(Product.objects.filter(category__name="Scraped Products", brand__name="Nike").count(), 30)
+        slug = Product.objects.get(name="Nike Air Max 3").slug
+
+        feed = self.feed(40)
+        feed[3]["price"] = 99
+        out = StringIO()
+        call_command("import_products", self.write_json(feed), stdout=out)
+        self.assertIn("created=10, updated=30", out.getvalue())
+        product = Product.objects.get(name="Nike Air Max 3")
+        self.assertEqual((product.price, product.slug), (Decimal("99"), slug))
+        self.assertEqual(Brand.objects.filter(name="Nike").count(), 1)
+
+    def test_query_count_does_not_grow_with_feed(self):
+        def rows(n):
+            return [
+                {"name": f"Jersey {i}", "category": "Jerseys", "brand": "Puma", "price": Decimal("10")}
+                for i in range(n)
+            ]
+
+        ProductImportPipeline(batch_size=50).run(rows(1))
+        with self.assertNumQueries(7):
+            # savepoint, kategori, brand, semua slug, cek produk ada, upsert, release
+            stats = ProductImportPipeline(batch_size=50).run(rows(50))
+        self.assertEqual((stats.created, stats.updated), (49, 1))
+
+    def test_reimport_without_owner_keeps_existing_owner(self):
+        owner = make_user("importer")
+        row = {"name": "Jersey Kandang", "category": "Jerseys", "price": Decimal("10")}
+        ProductImportPipeline().run([{**row, "created_by_id": owner.pk}])
+
+        ProductImportPipeline().run([
+            {**row, "price": Decimal("12")},
+            {**row, "name": "Jersey Tandang", "created_by_id": 99999},
+        ])
+        product = Product.objects.get(name="Jersey Kandang")
+        self.assertEqual((product.price, product.created_by), (Decimal("12"), owner))
+        self.assertIsNone(Product.objects.get(name="Jersey Tandang").created_by)
+
+        other = make_user("editor")
+        ProductImportPipeline().run([{**row, "created_by_id": other.pk}])
+        self.assertEqual(Product.objects.get(name="Jersey Kandang").created_by, other)
+
+    def test_message_import_upserts_by_slug(self):
+        Product.objects.create(name="Jordan", category=Category.objects.create(name="Lama"), price=1)
+        fields = {"name": "Jordan", "category": "Jerseys", "brand": "Nike", "price": "6.00", "slug": "jordan"}
+        data = [
+            {"model": "shop.product", "fields": fields},
+            {"model": "shop.product", "fields": {"name": "Jordan Retro", "category": "Shoes", "price": "7.00"}},
+            {"model": "shop.product", "fields": {**fields, "price": "8.00"}},
+            {"model": "shop.category", "fields": {"name": "x"}},
+        ]
+        out = StringIO()
+        call_command("import_message_products", path=self.write_json(data), stdout=out)
+        self.assertIn("created=1, updated=1, skipped=2", out.getvalue())
+        product = Product.objects.get(slug="jordan")
+        self.assertEqual(
+            (product.category.name, product.brand.name, product.price),
+            ("Jerseys", "Nike", Decimal("8.00")),
+        )
+        retro = Product.objects.get(slug="jordan-retro")
+        self.assertIsNone(retro.brand)
+        self.assertEqual(retro.category.path, f"{retro.category.pk.hex}/")
+
+
+class TestSlugAllocation(TestCase):
+    def setUp(self):
+        self.category = make_category()
+
+    def test_next_slug_uses_highest_suffix_in_one_query(self):
+        for slug in ("air-max", "air-max-2", "air-max-7"):
+            Product.objects.create(name="Air Max", slug=slug, category=make_category(), price=1)
+        for name in ("Air Max Plus", "Air Maxx", "Air Max 90"):
+            Product.objects.create(name=name, category=self.category, price=1)
+        with self.assertNumQueries(1):
+            # "air-max-90" adalah slug alami "Air Max 90", bukan suffix bentrok
+            self.assertEqual(next_slug(Product, "Air Max"), "air-max-8")
+        self.assertEqual(next_slug(Product, "Air Max Plus"), "air-max-plus-2")
+        self.assertEqual(next_slug(Product, "Air Max 90"), "air-max-90-2")
+        self.assertEqual(next_slug(Product, "Air Max 95"), "air-max-95")
+
+    def test_natural_numbered_names_are_not_suffixes(self):
+        Product.objects.create(name="Air Max", category=make_category(), price=1)
+        Product.objects.create(name="Air Max 90", category=self.category, price=1)
+        self.assertEqual(next_slug(Product, "Air Max"), "air-max-2")
+        # tanpa slug base, "<base>-<n>" tidak pernah dihitung sebagai suffix
+        self.assertEqual(next_slug(Product, "Pegasus 40"), "pegasus-40")
+        Product.objects.create(name="Air Max", category=make_category(), price=1)
+        Product.objects.create(name="Air Max 3", category=self.category, price=1)
+        self.assertEqual(next_slug(Product, "Air Max"), "air-max-4")
+
+    def test_model_saves_allocate_unique_slugs(self):
+        products = [
+            Product.objects.create(name="Nike Air Max", category=make_category(), price=1)
+            for _ in range(3)
+        ]
+        self.assertEqual([p.slug for p in products], ["nike-air-max", "nike-air-max-2", "nike-air-max-3"])
+
+        brands = [Brand.objects.create(name="Fleet Feet") for _ in range(2)]
+        self.assertEqual([b.slug for b in brands], ["fleet-feet", "fleet-feet-2"])
+        brands[1].name = "Fleet Feet Store"
+        brands[1].save()
+        self.assertEqual(Brand.objects.get(pk=brands[1].pk).slug, "fleet-feet-2")
+
+    def test_retries_when_slug_is_taken_concurrently(self):
+        Product.objects.create(name="Jordan", category=self.category, price=1)
+        real = next_slug
+        calls = []
+
+        def stale(*args, **kwargs):
+            # percobaan pertama memakai hasil lama, seolah proses lain menyimpan lebih dulu
+            calls.append(args)
+            return "jordan" if len(calls) == 1 else real(*args, **kwargs)
+
+        with mock.patch("shop.slugs.next_slug", side_effect=stale):
+            product = Product.objects.create(name="Jordan", category=make_category(), price=1)
+        self.assertEqual((product.slug, len(calls)), ("jordan-2", 2))
+
+    def test_slug_allocator_continues_suffixes(self):
+        slugs = SlugAllocator(["air-max", "air-max-2"])
+        self.assertEqual([slugs.allocate("Air Max") for _ in range(3)], ["air-max-3", "air-max-4", "air-max-5"])
+        self.assertEqual(slugs.allocate("Lain"), "lain")
@@ -8,13 +8,19 @@ from django.core.paginator import Paginator
 from django.db.models import Q, F
 from .models import Product, Category, Review, Brand
 from .forms import ReviewForm, ProductForm, BrandForm, CategoryForm
-from django.views.decorators.http import require_GET, require_POST
+from . import category_tree, exports
+from .pagination import InvalidCursor, decode_cursor, encode_cursor, keyset_filter
+from django.views.decorators.http import condition, require_GET, require_POST
+from django.http import StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from sport_watch.conditional import conditional
+from django.utils import timezone
 from django.utils.timezone import localtime
 from django.contrib import messages
 from django.urls import reverse
 from django.template.loader import render_to_string
 from django.views.decorators.http import require_http_methods
-from django.db.models import Q, F, Avg, Count 
+from django.db.models import Q, F, Avg, Count, Max
 from django.core.exceptions import PermissionDenied
 from django.db.models.functions import Coalesce
 from django.db.models import DecimalField, F
@@ -32,7 +38,8 @@ def product_list(request):
     sort = request.GET.get("sort")
     q   = request.GET.get("q")
 
-    if cat: qs = qs.filter(category__slug=cat)
+    # kategori induk ikut menampilkan produk di subkategorinya
+    if cat: qs = qs.filter(category_tree.get_tree().subtree_q(cat))
     if q:   qs = qs.filter(Q(name__icontains=q) | Q(description__icontains=q))
 
     
@@ -97,7 +104,7 @@ def create_review(request, product_id):
     agg = product.reviews.aggregate(avg=Avg("rating"), cnt=Count("id"))
     product.rating_avg = agg["avg"] or 0
     product.rating_count = agg["cnt"] or 0
-    product.save(update_fields=["rating_avg", "rating_count"])
+    product.save(update_fields=["rating_avg", "rating_count", "updated_at"])
 
     return JsonResponse({
         "ok": True,
@@ -285,49 +292,61 @@ def product_create(request):
     return redirect("shop:detail", slug=p.slug)
 
 
+@conditional(etag_func=lambda request: exports.catalogue_state(request)[0], per_user=True)
 def products_json(request):
     qs   = Product.objects.filter(status="active").select_related("category","created_by")
     cat  = request.GET.get("category")
     q    = request.GET.get("q")
     sort = request.GET.get("sort")
-    page = int(request.GET.get("page", 1))
     per_page = int(request.GET.get("per_page", 6))
     per_page = max(1, min(per_page, 50))
 
-    if cat: qs = qs.filter(category__slug=cat)
+    # kategori induk ikut menampilkan produk di subkategorinya
+    if cat: qs = qs.filter(category_tree.get_tree().subtree_q(cat))
     if q:   qs = qs.filter(Q(name__icontains=q) | Q(description__icontains=q))
 
     qs = qs.annotate(effective_price=Coalesce("sale_price", "price", output_field=DecimalField()))
+    # id sebagai tie-breaker supaya urutan stabil (dibutuhkan mode cursor)
     if sort == "price_asc":
-        qs = qs.order_by("effective_price", "-created_at")
+        qs = qs.order_by("effective_price", "-created_at", "-id")
     elif sort == "price_desc":
-        qs = qs.order_by(F("effective_price").desc(), "-created_at")
+        qs = qs.order_by(F("effective_price").desc(), "-created_at", "-id")
     elif sort == "featured":
-        qs = qs.filter(is_featured=True).order_by("-created_at")
+        qs = qs.filter(is_featured=True).order_by("-created_at", "-id")
     else:
-        qs = qs.order_by("-created_at")
+        qs = qs.order_by("-created_at", "-id")
+
+    uid = request.user.id if request.user.is_authenticated else None
+
+    # mode cursor: ?cursor= (kosong untuk halaman pertama), tanpa COUNT/OFFSET
+    if "cursor" in request.GET:
+        token = request.GET.get("cursor")
+        page_qs = qs
+        if token:
+            try:
+                page_qs = keyset_filter(qs, sort, decode_cursor(token, sort))
+            except InvalidCursor as e:
+                return JsonResponse({"error": str(e)}, status=400)
+
+        rows = list(page_qs[:per_page + 1])
+        has_next = len(rows) > per_page
+        rows = rows[:per_page]
+
+        payload = {
+            "results": [_product_card(p, uid) for p in rows],
+            "has_next": has_next,
+            "next_cursor": encode_cursor(rows[-1], sort) if has_next else None,
+            "per_page": per_page,
+        }
+        # total_count opsional karena butuh COUNT(*) penuh
+        if request.GET.get("with_count") in ("1", "true"):
+            payload["total_count"] = qs.count()
+        return JsonResponse(payload, status=200)
 
     paginator = Paginator(qs, per_page)
-    page_obj = paginator.get_page(page)
+    page_obj = paginator.get_page(request.GET.get("page", 1))
 
-    items = []
-    uid = request.user.id if request.user.is_authenticated else None
-    for p in page_obj.object_list.select_related("category","created_by"):
-        items.append({
-            "id": str(p.id),
-            "name": p.name,
-            "slug": p.slug,
-            "thumbnail": p.thumbnail,
-            "category": p.category.name if p.category else None,
-            "price": float(p.price),
-            "sale_price": float(p.sale_price) if p.sale_price is not None else None,
-            "discount_percent": p.discount_percent,
-            "in_stock": p.in_stock,
-            "rating_avg": p.rating_avg,
-            "rating_count": p.rating_count,
-            "owner": (p.created_by.username if p.created_by_id else None),
-            "is_owner": (uid is not None and p.created_by_id == uid),
-        })
+    items = [_product_card(p, uid) for p in page_obj.object_list]
     return JsonResponse({
         "results": items,
         "has_next": page_obj.has_next(),
@@ -337,6 +356,24 @@ def products_json(request):
     }, status=200)
 
 
+def _product_card(p, uid):
+    return {
+        "id": str(p.id),
+        "name": p.name,
+        "slug": p.slug,
+        "thumbnail": p.thumbnail,
+        "category": p.category.name if p.category else None,
+        "price": float(p.price),
+        "sale_price": float(p.sale_price) if p.sale_price is not None else None,
+        "discount_percent": p.discount_percent,
+        "in_stock": p.in_stock,
+        "rating_avg": p.rating_avg,
+        "rating_count": p.rating_count,
+        "owner": (p.created_by.username if p.created_by_id else None),
+        "is_owner": (uid is not None and p.created_by_id == uid),
+    }
+
+
 def _is_ajax(request):
    
     return request.headers.get("x-requested-with") == "XMLHttpRequest"
@@ -496,53 +533,43 @@ def category_delete(request, pk):
     
     with transaction.atomic():
      
-        Product.objects.filter(category=cat).update(category=fallback)
+        # updated_at ikut diganti supaya ETag katalog (exports.catalogue_state) berubah
+        Product.objects.filter(category=cat).update(category=fallback, updated_at=timezone.now())
 
-        Category.objects.filter(parent=cat).update(parent=fallback)
+        # save() per anak supaya materialized path subtree ikut dipindah
+        for child in Category.objects.filter(parent=cat):
+            child.parent = fallback
+            child.save()
 
         cat.delete()
 
     messages.success(request, "Category deleted. Semua produk dipindahkan ke 'Uncategorized'.")
     return redirect("shop:manage_shop")
 
-def show_json(request):
-    qs = (
-        Product.objects
-        .filter(status="active")
-        .select_related("category", "brand", "created_by")
-    )
+def _export_etag(request):
+    etag, _ = exports.catalogue_state(request)
+    return f"{etag}-{'ndjson' if exports.wants_ndjson(request) else 'json'}"
 
-    data = []
-    for p in qs:
-        data.append({
-            "model": "shop.product",
-            "pk": str(p.id),
-            "fields": {
-                "created_at": p.created_at.isoformat(),
-                "updated_at": p.updated_at.isoformat(),
-                "created_by": p.created_by_id,
-                "owner_username": (
-                    p.created_by.username if p.created_by_id else None
-                ),
-                "category": p.category.name if p.category else "",
-                "brand": p.brand.name if p.brand else None,
-                "name": p.name,
-                "slug": p.slug,
-                "description": p.description,
-                "price": str(p.price),
-                "sale_price": str(p.sale_price) if p.sale_price is not None else None,
-                "currency": p.currency,          # mis. "IDR"
-                "stock": p.stock,
-                "total_sold": p.total_sold,
-                "thumbnail": p.thumbnail or "",
-                "is_featured": p.is_featured,
-                "status": p.status,              # "active"
-                "rating_avg": float(p.rating_avg),
-                "rating_count": p.rating_count,
-            },
-        })
 
-    return JsonResponse(data, safe=False)
+def _export_last_modified(request):
+    return exports.catalogue_state(request)[1]
+
+
+@require_GET
+@condition(etag_func=_export_etag, last_modified_func=_export_last_modified)
+def show_json(request):
+    """Seluruh produk aktif, di-stream. ``?format=ndjson`` (atau header
+    ``Accept: application/x-ndjson``) mengirim satu produk per baris."""
+    if exports.wants_ndjson(request):
+        response = StreamingHttpResponse(
+            exports.iter_ndjson(), content_type=exports.NDJSON_CONTENT_TYPE
+        )
+    else:
+        response = StreamingHttpResponse(
+            exports.iter_json_array(), content_type="application/json"
+        )
+    patch_vary_headers(response, ["Accept"])
+    return response
 
 # Reviews
 @staff_member_required
@@ -618,7 +645,14 @@ def create_product_flutter(request):
 
 
 
+def _categories_version(request):
+    # dari data (bukan token pohon kategori di cache) supaya perubahan dari
+    # proses lain langsung mengganti ETag
+    return tuple(Category.objects.aggregate(n=Count("id"), updated=Max("updated_at")).values())
+
+
 @require_GET
+@conditional(etag_func=_categories_version)
 def categories_json(request):
     """
     Return list of top-level categories for Flutter:
@@ -638,7 +672,12 @@ def categories_json(request):
     return JsonResponse(data, safe=False, status=200)
 
 
+def _brands_version(request):
+    return tuple(Brand.objects.aggregate(n=Count("id"), updated=Max("updated_at")).values())
+
+
 @require_GET
+@conditional(etag_func=_brands_version)
 def brands_json(request):
     """
     Return list of brands for Flutter:
@@ -707,7 +746,7 @@ def create_review_flutter(request, product_id):
     agg = product.reviews.aggregate(avg=Avg("rating"), cnt=Count("id"))
     product.rating_avg = agg["avg"] or 0
     product.rating_count = agg["cnt"] or 0
-    product.save(update_fields=["rating_avg", "rating_count"])
+    product.save(update_fields=["rating_avg", "rating_count", "updated_at"])
 
     return JsonResponse(
         {
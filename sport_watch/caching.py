@@ -0,0 +1,28 @@
+"""Helper untuk membedakan cache bersama (Redis/Memcached) dan cache per proses.
+
+LocMemCache (default di settings) dan DummyCache tidak dibagi antar worker
+gunicorn maupun management command, jadi fitur yang butuh state bersama
+(mis. buffer view counter) harus mengecek ``is_shared()`` dulu.
+
+Token versi (pohon kategori, opsi filter) yang disimpan di cache per proses
+tidak ikut berubah di proses lain saat di-invalidate, jadi di cache seperti
+itu token diberi umur pendek (``CACHE_VERSION_TTL``) lewat ``version_timeout()``.
+"""
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+PROCESS_LOCAL_BACKENDS = (LocMemCache, DummyCache)
+
+
+def is_shared(alias="default"):
+    return not isinstance(caches[alias], PROCESS_LOCAL_BACKENDS)
+
+
+def version_timeout(alias="default"):
+    """Timeout token versi: tanpa batas di cache bersama, ``CACHE_VERSION_TTL`` detik jika per proses."""
+    if is_shared(alias):
+        return None
+    return getattr(settings, "CACHE_VERSION_TTL", 30)
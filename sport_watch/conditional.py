@@ -0,0 +1,74 @@
+"""Conditional GET (ETag / Last-Modified) untuk endpoint JSON di ``api_router``.
+
+Setiap view menyediakan fungsi validator murah (satu aggregate
+``MAX(updated_at)``/``COUNT``) yang dipanggil sebelum view. Validator dihitung
+dari data, bukan dari token versi di cache: dengan cache per proses token itu
+tidak ikut berubah saat data diubah proses lain, dan klien akan terus
+mendapat 304.
+Jika cocok dengan ``If-None-Match`` / ``If-Modified-Since`` klien, Django
+langsung menjawab 304 tanpa menjalankan query utama maupun serialisasi.
+
+ETag selalu memuat query string (halaman, filter) dan, untuk respons yang
+berisi data per-user, id user yang sedang login.
+"""
+
+import hashlib
+from functools import wraps
+
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+
+def make_etag(*parts):
+    raw = "|".join("" if part is None else str(part) for part in parts)
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def _request_parts(request, per_user):
+    query = "&".join(
+        f"{key}={value}"
+        for key in sorted(request.GET)
+        for value in request.GET.getlist(key)
+    )
+    user = ""
+    if per_user and request.user.is_authenticated:
+        user = request.user.pk
+    return query, user
+
+
+def conditional(etag_func=None, last_modified_func=None, per_user=False):
+    """Decorator view JSON: tambahkan validator dan jawab 304 jika tidak berubah.
+
+    ``etag_func(request, *args, **kwargs)`` mengembalikan penanda versi resource
+    (string/tuple apa pun, atau None untuk melewati ETag).
+    ``last_modified_func`` mengembalikan datetime atau None. ``per_user=True``
+    untuk respons yang berbeda antar user (mis. ``is_owner``, reaksi user).
+    """
+
+    def _etag(request, *args, **kwargs):
+        version = etag_func(request, *args, **kwargs)
+        if version is None:
+            return None
+        return make_etag(version, *_request_parts(request, per_user))
+
+    def decorator(view):
+        conditional_view = condition(
+            etag_func=_etag if etag_func else None,
+            last_modified_func=last_modified_func,
+        )(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            if request.method in ("GET", "HEAD") and response.status_code in (200, 304):
+                # klien tetap wajib revalidasi; 304 cukup murah
+                if per_user:
+                    patch_cache_control(response, private=True, no_cache=True)
+                    patch_vary_headers(response, ["Cookie"])
+                else:
+                    patch_cache_control(response, no_cache=True)
+            return response
+
+        return wrapper
+
+    return decorator
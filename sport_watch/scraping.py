@@ -0,0 +1,205 @@
+"""Engine fetch konkuren untuk command scraper (detik, kompas, footlocker).
+
+``Fetcher`` memakai thread pool berukuran tetap di atas satu
+``requests.Session`` (koneksi di-pool), dengan:
+
+- batas request paralel per host (``per_host``),
+- jeda minimum antar request ke host yang sama (``delay``, supaya sopan),
+- timeout untuk setiap request,
+- retry dengan exponential backoff untuk error jaringan, 429 dan 5xx
+  (``Retry-After`` dihormati).
+
+Hasil selalu berupa ``FetchResult``; kegagalan tidak melempar exception
+sehingga satu artikel yang gagal tidak menghentikan seluruh scraping.
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (compatible; SportWatchBot/1.0)"
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+@dataclass
+class FetchResult:
+    url: str
+    status: int = 0
+    content: bytes = b""
+    encoding: str = "utf-8"
+    error: str = ""
+    attempts: int = 0
+    elapsed: float = 0.0
+    etag: str = ""
+    last_modified: str = ""
+
+    @property
+    def ok(self):
+        return not self.error and 200 <= self.status < 300
+
+    @property
+    def not_modified(self):
+        return self.status == 304
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+
+class _HostGate:
+    """Semaphore + jeda minimum untuk satu host."""
+
+    def __init__(self, concurrency, delay):
+        self.semaphore = threading.BoundedSemaphore(concurrency)
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._next_at = 0.0
+
+    def __enter__(self):
+        self.semaphore.acquire()
+        if self.delay:
+            with self._lock:
+                now = time.monotonic()
+                wait = self._next_at - now
+                self._next_at = max(now, self._next_at) + self.delay
+            if wait > 0:
+                time.sleep(wait)
+        return self
+
+    def __exit__(self, *exc):
+        self.semaphore.release()
+
+
+class Fetcher:
+    def __init__(
+        self,
+        workers=8,
+        per_host=4,
+        delay=0.0,
+        timeout=(5, 20),
+        retries=3,
+        backoff=0.5,
+        user_agent=DEFAULT_USER_AGENT,
+        session=None,
+    ):
+        self.workers = workers
+        self.per_host = per_host
+        self.delay = delay
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        session.headers.setdefault("User-Agent", user_agent)
+        self.session = session
+
+        self._gates = {}
+        self._gates_lock = threading.Lock()
+        self._executor = None
+
+    # -- lifecycle ---------------------------------------------------------
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self.session.close()
+
+    # -- fetching ----------------------------------------------------------
+
+    def _gate(self, url):
+        host = urlparse(url).netloc.lower()
+        with self._gates_lock:
+            gate = self._gates.get(host)
+            if gate is None:
+                gate = self._gates[host] = _HostGate(self.per_host, self.delay)
+            return gate
+
+    def _sleep_before_retry(self, attempt, retry_after=None):
+        if retry_after is not None:
+            time.sleep(retry_after)
+            return
+        # exponential backoff + jitter supaya retry dari banyak thread tidak serempak
+        time.sleep(self.backoff * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5))
+
+    def get(self, url, headers=None):
+        """Ambil satu URL (blocking) dengan retry; selalu mengembalikan ``FetchResult``.
+
+        ``headers`` misalnya ``If-None-Match``/``If-Modified-Since``; jawaban 304
+        bukan error (``result.not_modified``).
+        """
+        result = FetchResult(url=url)
+        started = time.monotonic()
+        for attempt in range(1, self.retries + 2):
+            result.attempts = attempt
+            retry_after = None
+            try:
+                with self._gate(url):
+                    response = self.session.get(url, headers=headers, timeout=self.timeout)
+                result.status = response.status_code
+                result.content = response.content
+                result.encoding = response.encoding or "utf-8"
+                result.etag = response.headers.get("ETag", "")
+                result.last_modified = response.headers.get("Last-Modified", "")
+                result.error = ""
+                if response.status_code not in RETRY_STATUSES:
+                    if not result.ok and not result.not_modified:
+                        result.error = f"HTTP {response.status_code}"
+                    break
+                result.error = f"HTTP {response.status_code}"
+                header = response.headers.get("Retry-After", "")
+                if header.isdigit():
+                    retry_after = min(int(header), 60)
+            except requests.RequestException as exc:
+                result.error = str(exc) or exc.__class__.__name__
+            if attempt <= self.retries:
+                self._sleep_before_retry(attempt, retry_after)
+        result.elapsed = time.monotonic() - started
+        return result
+
+    def fetch_all(self, urls, headers_for=None):
+        """Ambil banyak URL secara paralel; hasil di-yield sesuai urutan ``urls``.
+
+        ``headers_for(url)`` opsional, mengembalikan header tambahan per URL.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="scraper"
+            )
+        urls = list(urls)
+        headers = [headers_for(url) if headers_for else None for url in urls]
+        return self._executor.map(self.get, urls, headers)
+
+
+# -- integrasi management command ---------------------------------------------
+
+def add_fetcher_arguments(parser):
+    parser.add_argument("--workers", type=int, default=8, help="Pages fetched in parallel.")
+    parser.add_argument("--per-host", type=int, default=4, help="Max parallel requests per host.")
+    parser.add_argument("--delay", type=float, default=0.1, help="Minimum seconds between requests to one host.")
+    parser.add_argument("--retries", type=int, default=3, help="Retries for network errors, 429 and 5xx.")
+
+
+def fetcher_from_options(options):
+    return Fetcher(
+        workers=options["workers"],
+        per_host=options["per_host"],
+        delay=options["delay"],
+        retries=options["retries"],
+    )
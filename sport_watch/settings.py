@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 import os
+import sys
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -36,6 +37,9 @@ PRODUCTION = os.getenv("PRODUCTION", "False").lower() == "true"
 
 DEBUG = not PRODUCTION
 
+# manage.py test / pytest
+TESTING = sys.argv[1:2] == ["test"] or "pytest" in sys.modules
+
 ALLOWED_HOSTS = [
     "localhost",
     "127.0.0.1",
@@ -143,6 +147,74 @@ else:
     }
 
 
+# Cache
+# Default: local-memory. Ganti backend lewat env, mis.
+# CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+# CACHE_LOCATION=redis://127.0.0.1:6379/1
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", "sport-watch"),
+    }
+}
+
+# Cache halaman utama berita (fragment + respons anonim)
+# umur token versi (pohon kategori, opsi filter) jika cache per proses (LocMem);
+# dengan Redis/Memcached token tidak kedaluwarsa dan invalidasi langsung terlihat
+CACHE_VERSION_TTL = int(os.getenv("CACHE_VERSION_TTL", "30"))
+
+NEWS_HOME_CACHE_ALIAS = os.getenv("NEWS_HOME_CACHE_ALIAS", "default")
+NEWS_HOME_CACHE_TIMEOUT = int(os.getenv("NEWS_HOME_CACHE_TIMEOUT", "60"))
+
+# News view counter
+# "buffered": view dikumpulkan di cache lalu di-flush per interval (detik);
+#             butuh cache bersama (Redis/Memcached), lihat portal_berita.W001
+# "exact": UPDATE langsung setiap kali halaman detail dibuka
+# "auto": buffered jika CACHE_BACKEND bersama, selain itu exact
+NEWS_VIEW_COUNT_MODE = os.getenv("NEWS_VIEW_COUNT_MODE", "auto")
+NEWS_VIEW_FLUSH_INTERVAL = int(os.getenv("NEWS_VIEW_FLUSH_INTERVAL", "60"))
+
+# Full-text search (fitur_pencarian.search): auto | postings | sqlite_fts | postgres
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "auto")
+# jumlah peringkat teratas yang dibaca ajax_search_results per jenis konten
+SEARCH_MAX_CANDIDATES = int(os.getenv("SEARCH_MAX_CANDIDATES", "5000"))
+
+# SearchLog ditulis batch oleh thread background ("async") atau langsung ("sync");
+# test memakai "sync" supaya tidak ada thread latar belakang
+SEARCH_LOG_MODE = os.getenv("SEARCH_LOG_MODE", "sync" if TESTING else "async")
+SEARCH_LOG_SAMPLE_RATE = float(os.getenv("SEARCH_LOG_SAMPLE_RATE", "1.0"))
+SEARCH_LOG_BATCH_SIZE = int(os.getenv("SEARCH_LOG_BATCH_SIZE", "200"))
+SEARCH_LOG_FLUSH_INTERVAL = float(os.getenv("SEARCH_LOG_FLUSH_INTERVAL", "2"))
+SEARCH_LOG_COALESCE_WINDOW = float(os.getenv("SEARCH_LOG_COALESCE_WINDOW", "10"))
+# log mentah yang sudah direkap (rollup_search_stats) dihapus setelah N hari; 0 = simpan
+SEARCH_LOG_RETENTION_DAYS = int(os.getenv("SEARCH_LOG_RETENTION_DAYS", "90"))
+
+# Cart yang ditinggalkan (collect_abandoned_carts): tamu dengan sesi kedaluwarsa
+# atau cart yang menganggur > N hari dihapus per batch
+CART_GC_IDLE_DAYS = int(os.getenv("CART_GC_IDLE_DAYS", "30"))
+CART_GC_BATCH_SIZE = int(os.getenv("CART_GC_BATCH_SIZE", "500"))
+
+# Proxy gambar (authentication.image_proxy): cache LRU di disk.
+# Default hanya host gambar yang dipakai situs (produk Footlocker, berita Detik).
+# Daftar host bisa diganti, mis. IMAGE_PROXY_ALLOWED_HOSTS=images.example.com,*.cdn.example.com;
+# "*" (host publik mana pun, alamat internal tetap ditolak) harus di-opt-in eksplisit.
+IMAGE_PROXY_ALLOWED_HOSTS = [
+    h.strip()
+    for h in os.getenv("IMAGE_PROXY_ALLOWED_HOSTS", "www.footlocker.id,*.detik.net.id").split(",")
+    if h.strip()
+]
+IMAGE_PROXY_CACHE_DIR = os.getenv("IMAGE_PROXY_CACHE_DIR", str(BASE_DIR / ".cache" / "images"))
+IMAGE_PROXY_CACHE_BYTES = int(os.getenv("IMAGE_PROXY_CACHE_BYTES", str(256 * 1024 * 1024)))
+IMAGE_PROXY_MAX_BYTES = int(os.getenv("IMAGE_PROXY_MAX_BYTES", str(5 * 1024 * 1024)))
+IMAGE_PROXY_TIMEOUT = float(os.getenv("IMAGE_PROXY_TIMEOUT", "10"))
+IMAGE_PROXY_MAX_AGE = int(os.getenv("IMAGE_PROXY_MAX_AGE", str(7 * 24 * 60 * 60)))
+# varian ?w=&h=&format= (butuh Pillow)
+IMAGE_PROXY_MAX_DIMENSION = int(os.getenv("IMAGE_PROXY_MAX_DIMENSION", "1600"))
+IMAGE_PROXY_QUALITY = int(os.getenv("IMAGE_PROXY_QUALITY", "80"))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
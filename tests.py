@@ -10,22 +10,26 @@ app label, which was one of the user requirements.
 from __future__ import annotations
 
 import json
+import threading
+import time
 from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
-from django.contrib.auth import get_user_model
+from django.contrib.auth import get_user_model, login
 from django.contrib.auth.models import AnonymousUser
 from django.contrib.sessions.middleware import SessionMiddleware
-from django.test import Client, RequestFactory, TestCase
+from django.test import Client, RequestFactory, SimpleTestCase, TestCase
 from django.urls import resolve, reverse
 from django.utils import timezone
 
 from fitur_belanja.context_processors import cart_badge
 from fitur_belanja.models import Cart, CartItem
-from fitur_belanja.utils import cart_from_request, get_or_create_cart
+from fitur_belanja.utils import cart_from_request
 from portal_berita.models import Berita, KategoriBerita
 from scoreboard.models import Scoreboard
 from shop.forms import ProductForm
 from shop.models import Brand, Category, Product
+from sport_watch.scraping import Fetcher
 
 
 User = get_user_model()
@@ -141,14 +145,12 @@ class SportWatchTestCase(TestCase):
             unit_price=self.product.final_price,
         )
 
-        # Promote the same request to an authenticated user to trigger merge
-        request.user = self.user
-        merged = get_or_create_cart(request)
+        # Logging in on the same request triggers the merge (user_logged_in)
+        login(request, self.user, backend="django.contrib.auth.backends.ModelBackend")
+        merged = cart_from_request(request)
         self.assertEqual(merged.user, self.user)
         self.assertEqual(merged.item_count, 2)
-        self.assertFalse(
-            Cart.objects.filter(session_key=request.session.session_key, user__isnull=True).exists()
-        )
+        self.assertFalse(Cart.objects.filter(pk=guest_cart.pk).exists())
 
         badge = cart_badge(request)
         self.assertEqual(badge["cart_count"], 2)
@@ -188,13 +190,11 @@ class SportWatchTestCase(TestCase):
         self.assertEqual(response.status_code, 400)
         self.assertFalse(response.json()["ok"])
 
-        cart = Cart.objects.create(user=self.staff)
-        item = CartItem.objects.create(
-            cart=cart,
-            product=self.secondary_product,
-            qty=1,
-            unit_price=self.secondary_product.final_price,
-        )
+        # Logging in merged the guest cart into the staff cart
+        cart = Cart.objects.get(user=self.staff)
+        item = cart.items.get()
+        self.assertEqual((item.product_id, item.qty), (self.secondary_product.id, 2))
+        self.assertFalse(Cart.objects.filter(user=None).exists())
 
         update_url = reverse("api_cart:update_qty")
         response = self.client.post(update_url, {"item_id": item.id, "qty": 5})
@@ -449,3 +449,152 @@ class SportWatchTestCase(TestCase):
         self.assertIn("name", form.fields)
 
 
+
+    # ------------------------------------------------------------------
+    # Conditional GET on the JSON API
+    # ------------------------------------------------------------------
+    def assert_revalidates(self, url, params=None, max_queries=None):
+        first = self.client.get(url, params or {})
+        self.assertEqual(first.status_code, 200)
+        self.assertIn("no-cache", first["Cache-Control"])
+        etag = first["ETag"]
+        if max_queries is None:
+            second = self.client.get(url, params or {}, HTTP_IF_NONE_MATCH=etag)
+        else:
+            with self.assertNumQueries(max_queries):
+                second = self.client.get(url, params or {}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(second.status_code, 304)
+        return etag
+
+    def test_api_endpoints_answer_304_when_unchanged(self):
+        self.assert_revalidates(reverse("api_shop:categories"), max_queries=1)
+        self.assert_revalidates(reverse("api_search:filter_options"), max_queries=3)
+        self.assert_revalidates(reverse("api_scoreboard:scores"), {"status": "live"}, max_queries=1)
+        self.assert_revalidates(reverse("api_shop:brands"), max_queries=1)
+        self.assert_revalidates(reverse("api_shop:products"), {"per_page": 2}, max_queries=1)
+        self.assert_revalidates(reverse("api_news:news_list_json"), max_queries=1)
+
+    def test_api_etag_changes_with_data_and_query(self):
+        url = reverse("api_news:news_list_json")
+        etag = self.assert_revalidates(url)
+        self.assertNotEqual(self.client.get(url, {"page": 2})["ETag"], etag)
+
+        Berita.objects.filter(pk=self.news.pk).update(like_count=5)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        url = reverse("api_scoreboard:scores")
+        etag = self.assert_revalidates(url)
+        self.scoreboard_live.skor_tim1 += 1
+        self.scoreboard_live.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_api_etag_follows_writes_from_other_processes(self):
+        # UPDATE tanpa signal, seperti tulisan dari worker/command lain dengan
+        # cache per proses: ETag hanya bisa berubah jika dihitung dari data
+        later = timezone.now() + timezone.timedelta(seconds=5)
+
+        url = reverse("api_scoreboard:scores")
+        etag = self.assert_revalidates(url)
+        Scoreboard.objects.filter(pk=self.scoreboard_live.pk).update(skor_tim1=99, updated_at=later)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        url = reverse("api_shop:categories")
+        etag = self.assert_revalidates(url)
+        Category.objects.filter(pk=self.category.pk).update(name="Footwear", updated_at=later)
+        r = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(r, "Footwear")
+
+        url = reverse("api_search:filter_options")
+        etag = self.assert_revalidates(url)
+        KategoriBerita.objects.filter(pk=self.kategori.pk).update(nama="Bola Basket")
+        r = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(r, "Bola Basket")
+        self.assertContains(r, "Footwear / Running")
+
+
+class _FixtureSite(BaseHTTPRequestHandler):
+    """Situs lokal untuk menguji engine scraper."""
+
+    lock = threading.Lock()
+    active = 0
+    peak = 0
+    hits = {}
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.active += 1
+            cls.peak = max(cls.peak, cls.active)
+            cls.hits[self.path] = cls.hits.get(self.path, 0) + 1
+            hits = cls.hits[self.path]
+        try:
+            time.sleep(0.05)
+            if self.path.startswith("/flaky") and hits < 3:
+                status, body = 503, b"busy"
+            elif self.path.startswith("/missing"):
+                status, body = 404, b"nope"
+            else:
+                status, body = 200, f"<h1>{self.path}</h1>".encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with cls.lock:
+                cls.active -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+class ScraperFetcherTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _FixtureSite)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base = f"http://127.0.0.1:{cls.server.server_port}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        _FixtureSite.peak = 0
+        _FixtureSite.hits = {}
+
+    def test_fetch_all_is_concurrent_bounded_and_ordered(self):
+        urls = [f"{self.base}/artikel/{i}" for i in range(12)]
+        started = time.monotonic()
+        with Fetcher(workers=8, per_host=3, retries=0) as fetcher:
+            results = list(fetcher.fetch_all(urls))
+        elapsed = time.monotonic() - started
+
+        self.assertEqual([r.url for r in results], urls)
+        self.assertTrue(all(r.ok for r in results))
+        self.assertEqual(results[5].text, "<h1>/artikel/5</h1>")
+        self.assertLessEqual(_FixtureSite.peak, 3)
+        self.assertLess(elapsed, 12 * 0.05)
+
+    def test_retries_with_backoff_but_not_on_client_errors(self):
+        with Fetcher(retries=3, backoff=0.01) as fetcher:
+            flaky = fetcher.get(f"{self.base}/flaky")
+            missing = fetcher.get(f"{self.base}/missing")
+            down = Fetcher(retries=1, backoff=0.01, timeout=0.5).get("http://127.0.0.1:9/")
+
+        self.assertTrue(flaky.ok)
+        self.assertEqual(flaky.attempts, 3)
+        self.assertFalse(missing.ok)
+        self.assertEqual((missing.status, missing.attempts), (404, 1))
+        self.assertFalse(down.ok)
+        self.assertEqual(down.attempts, 2)
+
+    def test_polite_delay_spaces_requests_to_one_host(self):
+        urls = [f"{self.base}/pelan/{i}" for i in range(4)]
+        started = time.monotonic()
+        with Fetcher(workers=4, per_host=4, delay=0.1, retries=0) as fetcher:
+            list(fetcher.fetch_all(urls))
+        self.assertGreaterEqual(time.monotonic() - started, 0.3)